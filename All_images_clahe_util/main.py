@@ -13,7 +13,7 @@ from pathlib import Path
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
-from src.corrector import CLAHECorrector
+from src.corrector import CLAHECorrector, VIDEO_FOURCC
 
 def main():
     parser = argparse.ArgumentParser(
@@ -25,6 +25,10 @@ def main():
   python main.py image.jpg -o output.jpg      # 출력 파일명 지정
   python main.py input_dir/ -d                # 디렉토리 전체 보정
   python main.py image.jpg -c 2.0 -t 16 16    # 파라미터 조정
+  python main.py input_dir/ -s 2.0 8 8 -s 3.0 16 16 --contact-sheet  # 파라미터 스윕
+  python main.py dataset/ -y                  # YOLO 데이터셋 보정 + _clahe 라벨 생성
+  python main.py input_dir/ -d --contrast-threshold 0.2  # 대비가 충분한 이미지는 건너뜀
+  python main.py video.mp4 --frames-dir frames/ --frame-stride 10  # 동영상 10프레임마다 보정 후 이미지 저장
         """
     )
     
@@ -70,6 +74,83 @@ def main():
         help="처리할 이미지 확장자 (디렉토리 모드에서만 사용)"
     )
     
+    parser.add_argument(
+        "--contrast-threshold",
+        type=float,
+        default=None,
+        help="RMS 대비(L 표준편차/255)가 이 값 이상인 이미지는 보정 생략 (기본값: 사용 안함)"
+    )
+    
+    parser.add_argument(
+        "--spread-threshold",
+        type=float,
+        default=None,
+        help="히스토그램 분포폭(L 5~95 백분위 범위/255)이 이 값 이상인 이미지는 보정 생략 (기본값: 사용 안함)"
+    )
+    
+    parser.add_argument(
+        "--video",
+        action="store_true",
+        help="동영상 모드 (입력 확장자가 .mp4/.avi/.mov/.mkv/.m4v이면 자동 적용)"
+    )
+    
+    parser.add_argument(
+        "--frames-dir",
+        type=str,
+        default=None,
+        help="동영상 모드에서 보정된 프레임을 이미지로 저장할 디렉토리"
+    )
+    
+    parser.add_argument(
+        "--frame-stride",
+        type=int,
+        default=1,
+        help="동영상 모드에서 N번째 프레임마다 하나씩만 보정 (기본값: 1)"
+    )
+    
+    parser.add_argument(
+        "-s", "--sweep",
+        nargs=3,
+        action="append",
+        type=float,
+        default=None,
+        metavar=("CLIP", "TILE_W", "TILE_H"),
+        help="파라미터 스윕 조합 (여러 번 지정 가능, 디렉토리 모드에서만 사용)"
+    )
+    
+    parser.add_argument(
+        "--contact-sheet",
+        action="store_true",
+        help="스윕 결과를 원본과 나란히 비교하는 contact sheet 생성"
+    )
+    
+    parser.add_argument(
+        "-y", "--yolo-dataset",
+        action="store_true",
+        help="YOLO 데이터셋 모드 ({split}/images 보정 후 {split}/labels에 _clahe 라벨 생성)"
+    )
+    
+    parser.add_argument(
+        "--splits",
+        nargs="+",
+        default=["train", "valid", "test"],
+        help="YOLO 데이터셋 모드에서 처리할 split (기본값: train valid test)"
+    )
+    
+    parser.add_argument(
+        "--label-mode",
+        choices=["hardlink", "copy"],
+        default="hardlink",
+        help="_clahe 라벨 생성 방식 (기본값: hardlink, 실패시 copy)"
+    )
+    
+    parser.add_argument(
+        "-w", "--workers",
+        type=int,
+        default=None,
+        help="워커 프로세스(동영상 모드에서는 스레드) 수 (기본값: CPU 코어 수)"
+    )
+    
     parser.add_argument(
         "-v", "--verbose",
         action="store_true",
@@ -86,14 +167,79 @@ def main():
     # CLAHE 보정기 생성
     corrector = CLAHECorrector(
         clip_limit=args.clip_limit,
-        tile_grid_size=tuple(args.tile_size)
+        tile_grid_size=tuple(args.tile_size),
+        contrast_threshold=args.contrast_threshold,
+        spread_threshold=args.spread_threshold
     )
     
     if args.verbose:
         print(f"CLAHE 파라미터: clip_limit={args.clip_limit}, tile_size={tuple(args.tile_size)}")
     
     try:
-        if args.directory or os.path.isdir(args.input):
+        if args.video or os.path.splitext(args.input)[1].lower() in VIDEO_FOURCC:
+            # 동영상 모드
+            if args.verbose:
+                print(f"동영상 모드: {args.input} (frame_stride={args.frame_stride})")
+            
+            processed_count = corrector.process_video(
+                input_path=args.input,
+                output_path=args.output,
+                frames_dir=args.frames_dir,
+                frame_stride=args.frame_stride,
+                max_workers=args.workers
+            )
+            
+            if processed_count > 0:
+                print(f"성공: {processed_count}개의 프레임이 보정되었습니다.")
+                return 0
+            else:
+                print("오류: 처리된 프레임이 없습니다.")
+                return 1
+        elif args.yolo_dataset:
+            # YOLO 데이터셋 모드
+            if args.verbose:
+                print(f"YOLO 데이터셋 모드: {args.input} (splits={args.splits}, label_mode={args.label_mode})")
+            
+            processed_count = corrector.process_yolo_dataset(
+                dataset_dir=args.input,
+                output_dir=args.output,
+                splits=tuple(args.splits),
+                extensions=tuple(args.extensions),
+                label_mode=args.label_mode,
+                max_workers=args.workers
+            )
+            
+            if processed_count > 0:
+                print(f"성공: {processed_count}개의 이미지가 보정되었습니다.")
+                return 0
+            else:
+                print("오류: 처리된 이미지가 없습니다.")
+                return 1
+        elif args.sweep:
+            # 파라미터 스윕 모드
+            if not os.path.isdir(args.input):
+                print("오류: 파라미터 스윕은 디렉토리 입력에서만 지원됩니다.")
+                return 1
+            
+            param_sets = [(clip, (int(tile_w), int(tile_h))) for clip, tile_w, tile_h in args.sweep]
+            if args.verbose:
+                print(f"파라미터 스윕 모드: {param_sets}")
+            
+            processed_count = corrector.process_directory_sweep(
+                input_dir=args.input,
+                param_sets=param_sets,
+                output_dir=args.output,
+                extensions=tuple(args.extensions),
+                contact_sheet=args.contact_sheet
+            )
+            
+            if processed_count > 0:
+                print(f"성공: {processed_count}개의 이미지가 스윕 처리되었습니다.")
+                return 0
+            else:
+                print("오류: 처리된 이미지가 없습니다.")
+                return 1
+        elif args.directory or os.path.isdir(args.input):
             # 디렉토리 모드
             if args.verbose:
                 print(f"디렉토리 모드: {args.input}")
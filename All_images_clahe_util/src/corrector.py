@@ -1,24 +1,49 @@
 import cv2
+import json
 import numpy as np
 import os
+import queue
+import shutil
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import Tuple, Optional
+from typing import Dict, List, Tuple, Optional
+
+# 저장소 루트의 quarantine.py(image_scanner.py 격리 목록)를 같이 사용
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from quarantine import load_quarantine
+
+# 이미지별 대비 지표 캐시 파일명 (입력 디렉토리 또는 데이터셋 루트에 저장)
+METRICS_CACHE_NAME = ".clahe_metrics.json"
+# 대비 지표 계산시 축소 디코딩 배율 (1, 2, 4, 8 중 하나, 캐시 버전 키로도 사용)
+METRICS_DOWNSAMPLE = 4
+# 축소 배율별 cv2.imread 플래그
+_REDUCED_COLOR_FLAGS = {1: cv2.IMREAD_COLOR, 2: cv2.IMREAD_REDUCED_COLOR_2,
+                        4: cv2.IMREAD_REDUCED_COLOR_4, 8: cv2.IMREAD_REDUCED_COLOR_8}
+# 확장자별 VideoWriter 코덱
+VIDEO_FOURCC = {'.mp4': 'mp4v', '.m4v': 'mp4v', '.mov': 'mp4v', '.avi': 'XVID', '.mkv': 'XVID'}
 
 class CLAHECorrector:
     """
     CLAHE(Contrast Limited Adaptive Histogram Equalization) 이미지 보정기
     """
     
-    def __init__(self, clip_limit: float = 3.0, tile_grid_size: Tuple[int, int] = (8, 8)):
+    def __init__(self, clip_limit: float = 3.0, tile_grid_size: Tuple[int, int] = (8, 8),
+                 contrast_threshold: Optional[float] = None, spread_threshold: Optional[float] = None):
         """
         CLAHE 보정기 초기화
         
         Args:
             clip_limit: 대비 제한 임계값 (기본값: 3.0)
             tile_grid_size: 타일 격자 크기 (기본값: (8, 8))
+            contrast_threshold: 이 값 이상의 RMS 대비(L 표준편차/255)를 가진 이미지는 보정 생략 (None시 미사용)
+            spread_threshold: 이 값 이상의 히스토그램 분포폭(L 5~95 백분위 범위/255)을 가진 이미지는 보정 생략 (None시 미사용)
         """
         self.clip_limit = clip_limit
         self.tile_grid_size = tile_grid_size
+        self.contrast_threshold = contrast_threshold
+        self.spread_threshold = spread_threshold
         self.clahe = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=tile_grid_size)
     
     def correct_image(self, image: np.ndarray) -> np.ndarray:
@@ -116,15 +141,15 @@ class CLAHECorrector:
             output_path = Path(output_dir)
         
         # 재귀적으로 모든 이미지 파일 찾기
-        image_files = []
-        for ext in extensions:
-            image_files.extend(input_path.rglob(f"*{ext}"))
-            image_files.extend(input_path.rglob(f"*{ext.upper()}"))
+        image_files = self._find_image_files(input_path, extensions)
         
         if not image_files:
             print(f"오류: {input_dir}에서 지원되는 이미지 파일을 찾을 수 없습니다.")
             return 0
         
+        # 대비가 충분한 이미지는 보정 대상에서 제외
+        image_files = self.filter_by_contrast(image_files, input_path)
+        
         # 각 이미지 처리
         processed_count = 0
         for img_file in image_files:
@@ -141,6 +166,457 @@ class CLAHECorrector:
         print(f"총 {processed_count}개의 이미지가 처리되었습니다.")
         return processed_count
     
+    def correct_image_sweep(self, image: np.ndarray, clahe_list: List) -> List[np.ndarray]:
+        """
+        LAB 변환을 한 번만 수행하고 여러 CLAHE 객체를 적용
+        
+        Args:
+            image: 입력 이미지 (BGR 포맷)
+            clahe_list: cv2.createCLAHE로 생성한 CLAHE 객체 리스트
+            
+        Returns:
+            CLAHE 객체 순서대로 보정된 이미지 리스트
+        """
+        if image is None:
+            raise ValueError("입력 이미지가 None입니다.")
+        
+        # BGR -> LAB 변환 및 L 채널 분리는 한 번만 수행
+        lab = cv2.cvtColor(image, cv2.COLOR_BGR2LAB)
+        l = lab[:, :, 0].copy()
+        
+        corrected_images = []
+        for clahe in clahe_list:
+            # 캐시된 L 채널에 CLAHE 적용 후 LAB 버퍼의 L 채널만 교체
+            lab[:, :, 0] = clahe.apply(l)
+            corrected_images.append(cv2.cvtColor(lab, cv2.COLOR_LAB2BGR))
+        
+        return corrected_images
+    
+    def process_directory_sweep(self, input_dir: str, param_sets: List[Tuple[float, Tuple[int, int]]],
+                                output_dir: Optional[str] = None,
+                                extensions: Tuple[str, ...] = ('.jpg', '.jpeg', '.png', '.bmp', '.tiff'),
+                                contact_sheet: bool = False, sheet_height: int = 256) -> int:
+        """
+        여러 (clip_limit, tile_grid_size) 조합을 한 번의 디코딩으로 처리하는 파라미터 스윕
+        
+        각 조합의 결과는 output_dir/clip{clip}_tile{w}x{h}/ 아래에 입력과 같은 구조로 저장되며,
+        contact_sheet 사용시 원본과 모든 결과를 가로로 이어붙인 비교 이미지를
+        output_dir/contact_sheet/ 아래에 저장
+        
+        Args:
+            input_dir: 입력 디렉토리 경로
+            param_sets: (clip_limit, (tile_w, tile_h)) 리스트
+            output_dir: 출력 디렉토리 경로 (None시 input_dir/sweep)
+            extensions: 처리할 이미지 확장자
+            contact_sheet: 비교용 contact sheet 생성 여부
+            sheet_height: contact sheet의 각 이미지 높이 (픽셀)
+            
+        Returns:
+            처리된 이미지 수
+        """
+        input_path = Path(input_dir)
+        if not input_path.exists() or not input_path.is_dir():
+            print(f"오류: {input_dir}는 유효한 디렉토리가 아닙니다.")
+            return 0
+        
+        if not param_sets:
+            print("오류: 스윕할 파라미터 조합이 없습니다.")
+            return 0
+        
+        output_path = input_path / "sweep" if output_dir is None else Path(output_dir)
+        
+        image_files = self._find_image_files(input_path, extensions)
+        if not image_files:
+            print(f"오류: {input_dir}에서 지원되는 이미지 파일을 찾을 수 없습니다.")
+            return 0
+        
+        # 조합별 CLAHE 객체와 출력 폴더는 미리 한 번만 생성
+        clahe_list = []
+        variant_dirs = []
+        for clip_limit, tile_grid_size in param_sets:
+            tile_grid_size = tuple(tile_grid_size)
+            clahe_list.append(cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=tile_grid_size))
+            variant_dirs.append(output_path / f"clip{clip_limit}_tile{tile_grid_size[0]}x{tile_grid_size[1]}")
+        sheet_dir = output_path / "contact_sheet"
+        
+        processed_count = 0
+        for img_file in image_files:
+            image = cv2.imread(str(img_file))
+            if image is None:
+                print(f"오류: {img_file}에서 이미지를 읽을 수 없습니다.")
+                continue
+            
+            try:
+                corrected_images = self.correct_image_sweep(image, clahe_list)
+            except Exception as e:
+                print(f"처리 중 오류 발생: {img_file}: {str(e)}")
+                continue
+            
+            relative_path = img_file.relative_to(input_path)
+            output_name = f"{relative_path.stem}_clahe{relative_path.suffix}"
+            
+            saved = True
+            for variant_dir, corrected_image in zip(variant_dirs, corrected_images):
+                output_file = variant_dir / relative_path.parent / output_name
+                output_file.parent.mkdir(parents=True, exist_ok=True)
+                if not cv2.imwrite(str(output_file), corrected_image):
+                    print(f"오류: {output_file}에 이미지를 저장할 수 없습니다.")
+                    saved = False
+            
+            if contact_sheet:
+                labels = ["original"] + [d.name for d in variant_dirs]
+                sheet = self._build_contact_sheet([image] + corrected_images, labels, sheet_height)
+                sheet_file = sheet_dir / relative_path.parent / f"{relative_path.stem}_sweep.jpg"
+                sheet_file.parent.mkdir(parents=True, exist_ok=True)
+                cv2.imwrite(str(sheet_file), sheet)
+            
+            if saved:
+                processed_count += 1
+        
+        print(f"총 {processed_count}개의 이미지가 {len(clahe_list)}개 조합으로 처리되었습니다.")
+        return processed_count
+    
+    def process_yolo_dataset(self, dataset_dir: str, output_dir: Optional[str] = None,
+                             splits: Tuple[str, ...] = ('train', 'valid', 'test'),
+                             extensions: Tuple[str, ...] = ('.jpg', '.jpeg', '.png', '.bmp', '.tiff'),
+                             label_mode: str = 'hardlink', max_workers: Optional[int] = None) -> int:
+        """
+        YOLO 데이터셋({split}/images, {split}/labels)의 이미지를 보정하고
+        같은 병렬 작업 안에서 대응하는 _clahe 라벨까지 생성
+        
+        Args:
+            dataset_dir: YOLO 데이터셋 루트 경로
+            output_dir: 출력 데이터셋 루트 경로 (None시 원본 split 폴더에 _clahe 파일 추가)
+            splits: 처리할 split 이름
+            extensions: 처리할 이미지 확장자
+            label_mode: 라벨 생성 방식 ('hardlink' 또는 'copy', hardlink 실패시 copy)
+            max_workers: 워커 프로세스 수 (None시 CPU 코어 수)
+            
+        Returns:
+            처리된 이미지 수
+        """
+        if label_mode not in ('hardlink', 'copy'):
+            raise ValueError(f"지원하지 않는 label_mode입니다: {label_mode}")
+        
+        dataset_path = Path(dataset_dir)
+        output_path = dataset_path if output_dir is None else Path(output_dir)
+        extensions = tuple(ext.lower() for ext in extensions)
+        
+        # split별 작업 목록 생성 (이미 보정된 _clahe 이미지와 image_scanner.py로 격리된 이미지는 제외)
+        quarantine = load_quarantine(str(dataset_path))
+        tasks = []
+        for split in splits:
+            images_dir = dataset_path / split / 'images'
+            if not images_dir.is_dir():
+                continue
+            labels_dir = dataset_path / split / 'labels'
+            output_images_dir = output_path / split / 'images'
+            output_labels_dir = output_path / split / 'labels'
+            output_images_dir.mkdir(parents=True, exist_ok=True)
+            output_labels_dir.mkdir(parents=True, exist_ok=True)
+            
+            for entry in os.scandir(images_dir):
+                stem, ext = os.path.splitext(entry.name)
+                if not entry.is_file() or ext.lower() not in extensions or stem.endswith('_clahe'):
+                    continue
+                if os.path.abspath(entry.path) in quarantine:
+                    continue
+                tasks.append((
+                    entry.path,
+                    str(labels_dir / f"{stem}.txt"),
+                    str(output_images_dir / f"{stem}_clahe{ext}"),
+                    str(output_labels_dir / f"{stem}_clahe.txt"),
+                    label_mode
+                ))
+        
+        if not tasks:
+            print(f"오류: {dataset_dir}에서 처리할 이미지를 찾을 수 없습니다.")
+            return 0
+        
+        # 대비가 충분한 이미지는 보정 대상에서 제외
+        if self.contrast_threshold is not None or self.spread_threshold is not None:
+            selected = set(self.filter_by_contrast([Path(task[0]) for task in tasks], dataset_path, max_workers))
+            tasks = [task for task in tasks if Path(task[0]) in selected]
+            if not tasks:
+                print("보정이 필요한 이미지가 없습니다.")
+                return 0
+        
+        processed_count = 0
+        label_count = 0
+        missing_labels = 0
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_dataset_worker,
+                                 initargs=(self.clip_limit, self.tile_grid_size)) as executor:
+            chunksize = max(1, len(tasks) // ((max_workers or os.cpu_count() or 1) * 4))
+            for image_ok, label_status in executor.map(_process_dataset_item, tasks, chunksize=chunksize):
+                if image_ok:
+                    processed_count += 1
+                if label_status == 'missing':
+                    missing_labels += 1
+                elif label_status == 'ok':
+                    label_count += 1
+        
+        print(f"총 {processed_count}개의 이미지와 {label_count}개의 라벨이 처리되었습니다.")
+        if missing_labels:
+            print(f"원본 라벨 파일 없음: {missing_labels}개")
+        return processed_count
+    
+    def process_video(self, input_path: str, output_path: Optional[str] = None,
+                      frames_dir: Optional[str] = None, frame_stride: int = 1,
+                      max_workers: Optional[int] = None, image_ext: str = '.jpg') -> int:
+        """
+        동영상 프레임을 CLAHE 보정하여 동영상 및/또는 이미지로 저장
+        
+        디코딩(reader 스레드), CLAHE 보정(워커 스레드 풀), 인코딩(writer 스레드)을
+        파이프라인으로 실행하며 프레임 순서는 유지됨
+        
+        Args:
+            input_path: 입력 동영상 경로
+            output_path: 출력 동영상 경로 (None이고 frames_dir도 None이면 {stem}_clahe{suffix} 자동 생성)
+            frames_dir: 보정된 프레임을 이미지로 저장할 디렉토리 (None시 저장 안함)
+            frame_stride: N번째 프레임마다 하나씩만 보정 (건너뛰는 프레임은 디코딩하지 않음)
+            max_workers: CLAHE 워커 스레드 수 (None시 CPU 코어 수)
+            image_ext: 프레임 이미지 확장자
+            
+        Returns:
+            보정된 프레임 수
+        """
+        if frame_stride < 1:
+            raise ValueError(f"frame_stride는 1 이상이어야 합니다: {frame_stride}")
+        
+        capture = cv2.VideoCapture(input_path)
+        if not capture.isOpened():
+            print(f"오류: {input_path} 동영상을 열 수 없습니다.")
+            return 0
+        
+        input_path_obj = Path(input_path)
+        if output_path is None and frames_dir is None:
+            output_path = str(input_path_obj.parent / f"{input_path_obj.stem}_clahe{input_path_obj.suffix}")
+        
+        fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+        width = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        
+        writer = None
+        if output_path is not None:
+            os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+            fourcc = cv2.VideoWriter_fourcc(*VIDEO_FOURCC.get(Path(output_path).suffix.lower(), 'mp4v'))
+            writer = cv2.VideoWriter(output_path, fourcc, fps / frame_stride, (width, height))
+            if not writer.isOpened():
+                print(f"오류: {output_path}에 동영상을 저장할 수 없습니다.")
+                capture.release()
+                return 0
+        if frames_dir is not None:
+            os.makedirs(frames_dir, exist_ok=True)
+        
+        max_workers = max_workers or os.cpu_count() or 1
+        # 스레드별 CLAHE 객체 (cv2 CLAHE 객체는 스레드간 공유하지 않음)
+        local = threading.local()
+        
+        def correct_frame(frame: np.ndarray) -> np.ndarray:
+            if not hasattr(local, 'corrector'):
+                local.corrector = CLAHECorrector(self.clip_limit, self.tile_grid_size)
+            return local.corrector.correct_image(frame)
+        
+        # 제출 순서대로 future를 전달하여 writer가 프레임 순서를 유지하도록 함
+        pending = queue.Queue(maxsize=max_workers * 2)
+        errors = []
+        
+        def reader(executor: ThreadPoolExecutor):
+            try:
+                frame_index = 0
+                while True:
+                    if frame_index % frame_stride == 0:
+                        ok, frame = capture.read()
+                        if not ok:
+                            break
+                        pending.put((frame_index, executor.submit(correct_frame, frame)))
+                    elif not capture.grab():
+                        break
+                    frame_index += 1
+            except Exception as e:
+                errors.append(e)
+            finally:
+                pending.put(None)
+        
+        written_count = 0
+        
+        def writer_loop():
+            nonlocal written_count
+            while True:
+                item = pending.get()
+                if item is None:
+                    break
+                frame_index, future = item
+                try:
+                    corrected = future.result()
+                    if writer is not None:
+                        writer.write(corrected)
+                    if frames_dir is not None:
+                        frame_file = os.path.join(frames_dir, f"{input_path_obj.stem}_{frame_index:06d}_clahe{image_ext}")
+                        if not cv2.imwrite(frame_file, corrected):
+                            print(f"오류: {frame_file}에 이미지를 저장할 수 없습니다.")
+                    written_count += 1
+                except Exception as e:
+                    errors.append(e)
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            reader_thread = threading.Thread(target=reader, args=(executor,), daemon=True)
+            writer_thread = threading.Thread(target=writer_loop, daemon=True)
+            reader_thread.start()
+            writer_thread.start()
+            reader_thread.join()
+            writer_thread.join()
+        
+        capture.release()
+        if writer is not None:
+            writer.release()
+        
+        for e in errors:
+            print(f"처리 중 오류 발생: {str(e)}")
+        
+        print(f"총 {written_count}개의 프레임이 보정되었습니다.")
+        if output_path is not None:
+            print(f"보정된 동영상 저장: {output_path}")
+        if frames_dir is not None:
+            print(f"보정된 프레임 저장: {frames_dir}")
+        return written_count
+    
+    def needs_correction(self, metrics: Dict[str, float]) -> bool:
+        """
+        대비 지표가 임계값 미만인지(보정이 필요한지) 판단
+        
+        Args:
+            metrics: rms_contrast, spread 값을 가진 지표 딕셔너리
+            
+        Returns:
+            보정 필요 여부 (설정된 모든 임계값 이상이면 False)
+        """
+        if self.contrast_threshold is None and self.spread_threshold is None:
+            return True
+        if self.contrast_threshold is not None and metrics['rms_contrast'] < self.contrast_threshold:
+            return True
+        if self.spread_threshold is not None and metrics['spread'] < self.spread_threshold:
+            return True
+        return False
+    
+    def filter_by_contrast(self, image_files: List[Path], cache_root: Path,
+                           max_workers: Optional[int] = None) -> List[Path]:
+        """
+        축소 디코딩한 L 채널의 대비 지표로 보정이 필요한 이미지만 선별
+        
+        지표는 cache_root/.clahe_metrics.json에 (크기, 수정시각)과 함께 캐시되므로
+        임계값만 바꿔 다시 실행하면 이미지를 다시 디코딩하지 않음 (읽기 실패도 같은 키로 캐시)
+        
+        Args:
+            image_files: 후보 이미지 경로 리스트
+            cache_root: 지표 캐시를 저장할 디렉토리 (캐시 키는 이 경로 기준 상대 경로)
+            max_workers: 지표 계산 워커 프로세스 수 (None시 CPU 코어 수)
+            
+        Returns:
+            보정이 필요한 이미지 경로 리스트 (지표 계산 실패 이미지는 포함)
+        """
+        if self.contrast_threshold is None and self.spread_threshold is None:
+            return image_files
+        
+        cache_file = Path(cache_root) / METRICS_CACHE_NAME
+        cache = _load_metrics_cache(cache_file)
+        
+        # 크기/수정시각이 같은 캐시 항목은 재사용, 나머지만 다시 계산
+        keys = []
+        misses = []
+        for img_file in image_files:
+            key = img_file.relative_to(cache_root).as_posix()
+            stat = img_file.stat()
+            entry = cache.get(key)
+            if entry is None or entry['size'] != stat.st_size or entry['mtime_ns'] != stat.st_mtime_ns:
+                misses.append((key, str(img_file), stat.st_size, stat.st_mtime_ns))
+            keys.append(key)
+        
+        if misses:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                chunksize = max(1, len(misses) // ((max_workers or os.cpu_count() or 1) * 4))
+                paths = [miss[1] for miss in misses]
+                for (key, _, size, mtime_ns), metrics in zip(
+                        misses, executor.map(compute_contrast_metrics, paths, chunksize=chunksize)):
+                    if metrics is None:
+                        metrics = {'failed': True}
+                    cache[key] = dict(metrics, size=size, mtime_ns=mtime_ns)
+            _save_metrics_cache(cache_file, cache)
+        
+        selected = []
+        failed = 0
+        for img_file, key in zip(image_files, keys):
+            metrics = cache[key]
+            if metrics.get('failed'):
+                failed += 1
+                selected.append(img_file)
+            elif self.needs_correction(metrics):
+                selected.append(img_file)
+        
+        measured = [cache[key] for key in keys if not cache[key].get('failed')]
+        contrasts = np.array([metrics['rms_contrast'] for metrics in measured])
+        spreads = np.array([metrics['spread'] for metrics in measured])
+        print(f"대비 분석: {len(image_files)}개 중 {len(image_files) - len(misses)}개 캐시 사용, "
+              f"{len(selected)}개 보정 대상, {len(image_files) - len(selected)}개 건너뜀")
+        if failed:
+            print(f"  지표 계산 실패: {failed}개 (보정 대상에 포함)")
+        if contrasts.size:
+            print(f"  rms_contrast: min={contrasts.min():.3f}, median={np.median(contrasts):.3f}, max={contrasts.max():.3f}")
+            print(f"  spread: min={spreads.min():.3f}, median={np.median(spreads):.3f}, max={spreads.max():.3f}")
+        print(f"  지표 캐시: {cache_file}")
+        
+        return selected
+    
+    @staticmethod
+    def _build_contact_sheet(images: List[np.ndarray], labels: List[str], sheet_height: int) -> np.ndarray:
+        """
+        이미지들을 같은 높이로 축소하여 가로로 이어붙이고 각 칸에 라벨 표기
+        
+        Args:
+            images: BGR 이미지 리스트 (모두 같은 크기)
+            labels: 각 이미지에 표기할 라벨
+            sheet_height: 각 칸의 높이 (픽셀)
+            
+        Returns:
+            contact sheet 이미지
+        """
+        height, width = images[0].shape[:2]
+        scale = min(1.0, sheet_height / height)
+        cell_size = (max(1, int(round(width * scale))), max(1, int(round(height * scale))))
+        
+        cells = []
+        for image, label in zip(images, labels):
+            if scale < 1.0:
+                cell = cv2.resize(image, cell_size, interpolation=cv2.INTER_AREA)
+            else:
+                cell = image.copy()
+            cv2.putText(cell, label, (5, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 3)
+            cv2.putText(cell, label, (5, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+            cells.append(cell)
+        
+        return np.hstack(cells)
+    
+    @staticmethod
+    def _find_image_files(input_path: Path, extensions: Tuple[str, ...]) -> List[Path]:
+        """
+        디렉토리에서 재귀적으로 이미지 파일 검색 (input_path의 image_scanner.py 격리 목록에 있는 이미지는 제외)
+        
+        Args:
+            input_path: 입력 디렉토리 경로
+            extensions: 처리할 이미지 확장자
+            
+        Returns:
+            이미지 파일 경로 리스트
+        """
+        image_files = []
+        for ext in extensions:
+            image_files.extend(input_path.rglob(f"*{ext}"))
+            image_files.extend(input_path.rglob(f"*{ext.upper()}"))
+        quarantine = load_quarantine(str(input_path))
+        if quarantine:
+            image_files = [img_file for img_file in image_files if os.path.abspath(img_file) not in quarantine]
+        return image_files
+    
     def update_parameters(self, clip_limit: float, tile_grid_size: Tuple[int, int]):
         """
         CLAHE 파라미터 업데이트
@@ -151,4 +627,114 @@ class CLAHECorrector:
         """
         self.clip_limit = clip_limit
         self.tile_grid_size = tile_grid_size
-        self.clahe = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=tile_grid_size)
\ No newline at end of file
+        self.clahe = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=tile_grid_size)
+
+
+def compute_contrast_metrics(image_path: str) -> Optional[Dict[str, float]]:
+    """
+    축소 디코딩한 이미지의 L 채널로 대비 지표 계산
+    
+    Args:
+        image_path: 이미지 경로
+        
+    Returns:
+        {'rms_contrast': L 표준편차/255, 'spread': L 5~95 백분위 범위/255}, 읽기 실패시 None
+    """
+    image = cv2.imread(image_path, _REDUCED_COLOR_FLAGS[METRICS_DOWNSAMPLE])
+    if image is None:
+        return None
+    
+    l = cv2.cvtColor(image, cv2.COLOR_BGR2LAB)[:, :, 0]
+    hist = cv2.calcHist([l], [0], None, [256], [0, 256]).ravel()
+    cdf = np.cumsum(hist) / max(hist.sum(), 1.0)
+    low = int(np.searchsorted(cdf, 0.05))
+    high = int(np.searchsorted(cdf, 0.95))
+    
+    return {
+        'rms_contrast': round(float(l.std()) / 255.0, 5),
+        'spread': round((high - low) / 255.0, 5)
+    }
+
+def _load_metrics_cache(cache_file: Path) -> Dict[str, dict]:
+    """
+    대비 지표 캐시 로드 (없거나 형식이 다르면 빈 캐시)
+    """
+    if not cache_file.exists():
+        return {}
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('downsample') == METRICS_DOWNSAMPLE:
+            return data.get('entries', {})
+    except (OSError, ValueError) as e:
+        print(f"지표 캐시 로드 실패: {cache_file}. 새로 생성합니다. ({e})")
+    return {}
+
+def _save_metrics_cache(cache_file: Path, entries: Dict[str, dict]):
+    """
+    대비 지표 캐시 저장 (임시 파일에 쓴 뒤 교체)
+    """
+    tmp_file = cache_file.with_name(cache_file.name + '.tmp')
+    try:
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({'downsample': METRICS_DOWNSAMPLE, 'entries': entries}, f, ensure_ascii=False)
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        print(f"지표 캐시 저장 실패: {e}")
+
+_worker_corrector: Optional[CLAHECorrector] = None
+
+def _init_dataset_worker(clip_limit: float, tile_grid_size: Tuple[int, int]):
+    """
+    워커 프로세스별 CLAHE 보정기 생성 (CLAHE 객체는 pickle 불가)
+    """
+    global _worker_corrector
+    _worker_corrector = CLAHECorrector(clip_limit=clip_limit, tile_grid_size=tile_grid_size)
+
+def _link_or_copy(src: str, dst: str, label_mode: str):
+    """
+    라벨 파일을 hardlink로 생성하고, 불가능한 경우(다른 파일시스템 등) 복사
+    """
+    if not os.path.isfile(src):
+        raise FileNotFoundError(src)
+    if os.path.lexists(dst):
+        os.remove(dst)
+    if label_mode == 'hardlink':
+        try:
+            os.link(src, dst)
+            return
+        except OSError:
+            pass
+    shutil.copy2(src, dst)
+
+def _process_dataset_item(task: Tuple[str, str, str, str, str]) -> Tuple[bool, str]:
+    """
+    데이터셋 이미지 1개 보정 및 대응 라벨 생성 (멀티프로세싱용)
+    
+    Returns:
+        (이미지 저장 성공 여부, 라벨 상태 'ok' | 'missing' | 'error' | 'skipped')
+    """
+    image_path, label_path, output_image_path, output_label_path, label_mode = task
+    
+    image = cv2.imread(image_path)
+    if image is None:
+        print(f"오류: {image_path}에서 이미지를 읽을 수 없습니다.")
+        return False, 'skipped'
+    
+    try:
+        if not cv2.imwrite(output_image_path, _worker_corrector.correct_image(image)):
+            print(f"오류: {output_image_path}에 이미지를 저장할 수 없습니다.")
+            return False, 'skipped'
+    except Exception as e:
+        print(f"처리 중 오류 발생: {image_path}: {str(e)}")
+        return False, 'skipped'
+    
+    try:
+        _link_or_copy(label_path, output_label_path, label_mode)
+    except FileNotFoundError:
+        return True, 'missing'
+    except Exception as e:
+        print(f"라벨 생성 실패 {label_path}: {e}")
+        return True, 'error'
+    
+    return True, 'ok'
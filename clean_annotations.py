@@ -1,85 +1,106 @@
 #!/usr/bin/env python3
-import json
 import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+from coco_index import CocoIndex
+from coco_stream import CocoStreamWriter, iter_coco_items
+
 def get_image_files(image_dir):
-    """디렉토리에서 이미지 파일명들을 가져와서 이미지 ID 세트로 반환"""
+    """디렉토리에서 이미지 파일명 세트를 반환"""
     image_files = set()
     if os.path.exists(image_dir):
         for file in os.listdir(image_dir):
             if file.lower().endswith(('.jpg', '.jpeg', '.png')):
-                # 파일명에서 이미지 ID 추출 (예: 000000581482.jpg -> 581482)
-                image_id = int(file.split('.')[0])
-                image_files.add(image_id)
+                image_files.add(file)
     return image_files
 
-def clean_coco_json(json_path, valid_image_ids, output_path):
-    """COCO JSON 파일을 정리하여 실제 존재하는 이미지에 대한 데이터만 포함시킴"""
-    print(f"처리 중: {json_path}...")
-    
-    with open(json_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    original_images = len(data.get('images', []))
-    original_annotations = len(data.get('annotations', []))
-    
-    # 이미지 필터링
-    filtered_images = []
-    valid_image_ids_in_json = set()
-    
-    for img in data.get('images', []):
-        if img['id'] in valid_image_ids:
-            filtered_images.append(img)
-            valid_image_ids_in_json.add(img['id'])
-    
-    # 어노테이션 필터링 (유효한 이미지에 대한 어노테이션만 유지)
-    filtered_annotations = []
-    for ann in data.get('annotations', []):
-        if ann['image_id'] in valid_image_ids_in_json:
-            filtered_annotations.append(ann)
-    
-    # 데이터 업데이트
-    data['images'] = filtered_images
-    data['annotations'] = filtered_annotations
-    
-    # 정리된 JSON 저장
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, separators=(',', ':'))
-    
-    print(f"  원본: {original_images}개 이미지, {original_annotations}개 어노테이션")
-    print(f"  필터링 후: {len(filtered_images)}개 이미지, {len(filtered_annotations)}개 어노테이션")
-    print(f"  정리된 파일 저장: {output_path}")
+def collect_json_image_ids(json_path, image_files):
+    """JSON을 스트리밍으로 훑어 실제 존재하는 이미지의 ID만 모음 (annotations가 images보다 앞에 있을 때 사용)"""
+    kept_ids = set()
+    for key, value in iter_coco_items(json_path):
+        if key == 'images' and value['file_name'] in image_files:
+            kept_ids.add(value['id'])
+    return kept_ids
+
+def clean_coco_json(json_path, image_files, output_path):
+    """
+    COCO JSON 파일을 정리하여 실제 존재하는 이미지에 대한 데이터만 포함시킴
+
+    JSON 옆에 CocoIndex sidecar가 이미 있으면 file_name 인덱스로 유지할 image_id를 바로 찾고,
+    없으면 sidecar를 만들지 않고 필터링하는 스트리밍 한 번에서 image_id를 모음
+    (annotations가 images보다 앞에 있는 JSON만 ID 수집용으로 한 번 더 읽음)
+    JSON 전체를 메모리에 올리지 않고 원소 단위로 읽어 바로 기록하므로 메모리에는 유효한 이미지 ID 세트만 유지됨
+
+    :param image_files: 실제 존재하는 이미지 파일명 세트 (JSON의 file_name과 비교)
+    :return: (원본 이미지 수, 원본 어노테이션 수, 남은 이미지 수, 남은 어노테이션 수)
+    """
+    json_path = str(json_path)
+    index = CocoIndex.load(json_path)
+    # prefetched: 유지할 image_id 세트를 스트리밍 전에 이미 알고 있는지
+    prefetched = index is not None
+    if prefetched:
+        with index:
+            kept_ids = {index.image_id_for_file(file_name) for file_name in image_files}
+        kept_ids.discard(None)
+    else:
+        kept_ids = set()
+    original_images = 0
+    original_annotations = 0
+
+    with CocoStreamWriter(output_path) as writer:
+        for key, value in iter_coco_items(json_path):
+            if key == 'images':
+                original_images += 1
+                if not prefetched and value['file_name'] in image_files:
+                    kept_ids.add(value['id'])
+                if value['id'] in kept_ids:
+                    writer.write_image(value)
+            elif key == 'annotations':
+                # annotations가 images보다 먼저 나오면 ID 세트를 미리 모아야 함
+                if not prefetched and not original_images:
+                    kept_ids = collect_json_image_ids(json_path, image_files)
+                    prefetched = True
+                original_annotations += 1
+                # 유효한 이미지에 대한 어노테이션만 유지
+                if value['image_id'] in kept_ids:
+                    writer.write_annotation(value)
+            else:
+                writer.write_key(key, value)
+
+    return original_images, original_annotations, writer.num_images, writer.num_annotations
 
 def main():
     base_dir = Path(__file__).parent
     
-    # train2017, val2017 폴더에서 유효한 이미지 ID들 가져오기
+    # train2017, val2017 폴더에서 실제 존재하는 이미지 파일명 가져오기
     train_images = get_image_files(base_dir / 'train2017')
     val_images = get_image_files(base_dir / 'val2017')
     
     print(f"train2017/에서 {len(train_images)}개 이미지 발견")
     print(f"val2017/에서 {len(val_images)}개 이미지 발견")
     
-    # train 어노테이션 정리
-    train_json = base_dir / 'annotations' / 'instances_train2017.json'
-    if train_json.exists():
-        clean_coco_json(
-            train_json, 
-            train_images, 
-            base_dir / 'annotations' / 'instances_train2017_cleaned.json'
-        )
-    
-    # val 어노테이션 정리
-    val_json = base_dir / 'annotations' / 'instances_val2017.json'
-    if val_json.exists():
-        clean_coco_json(
-            val_json, 
-            val_images, 
-            base_dir / 'annotations' / 'instances_val2017_cleaned.json'
-        )
+    jobs = []
+    for split, image_files in (('train2017', train_images), ('val2017', val_images)):
+        json_path = base_dir / 'annotations' / f'instances_{split}.json'
+        if json_path.exists():
+            output_path = base_dir / 'annotations' / f'instances_{split}_cleaned.json'
+            jobs.append((json_path, image_files, output_path))
+
+    # train/val 어노테이션을 동시에 정리
+    with ProcessPoolExecutor(max_workers=max(1, len(jobs))) as executor:
+        futures = [
+            (json_path, output_path, executor.submit(clean_coco_json, json_path, image_files, output_path))
+            for json_path, image_files, output_path in jobs
+        ]
+        for json_path, output_path, future in futures:
+            original_images, original_annotations, kept_images, kept_annotations = future.result()
+            print(f"처리 완료: {json_path}")
+            print(f"  원본: {original_images}개 이미지, {original_annotations}개 어노테이션")
+            print(f"  필터링 후: {kept_images}개 이미지, {kept_annotations}개 어노테이션")
+            print(f"  정리된 파일 저장: {output_path}")
     
     print("정리 완료!")
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,275 @@
+import os
+import hashlib
+import numpy as np
+
+import fast_json
+from coco_stream import iter_coco_spans
+
+def _name_hash(name):
+    """file_name(UTF-8 bytes)의 64bit 해시 (little-endian 8바이트)"""
+    return hashlib.blake2b(name, digest_size=8).digest()
+
+class CocoIndex:
+    """
+    COCO JSON에 대한 해시 인덱스 (image_id→annotations, file_name→image, category→images)
+
+    처음 열 때 JSON을 스트리밍으로 한 번 읽어 인덱스를 만들고 JSON 옆에
+    바이너리 sidecar(`<json>.index.npz`)로 저장하므로, 이후에는 JSON을 다시 파싱하지 않고
+    NumPy 배열만 로드하여 바로 조회할 수 있음
+
+    조회용 키(정렬된 image_id, file_name 64bit 해시, category_id)도 정렬된 배열로 sidecar에 저장하여
+    열 때 Python dict를 다시 만들지 않고 np.searchsorted로 찾음
+
+    이미지/어노테이션 전체 dict는 sidecar에 저장된 바이트 위치로 JSON에서 필요한 원소만 읽음
+
+    사용 예:
+        with CocoIndex.open('annotations/instances_train.json') as index:
+            image_id = index.image_id_for_file('000000581482.jpg')
+            annotations = index.annotations_for_image(image_id)
+    """
+
+    SIDECAR_SUFFIX = '.index.npz'
+    VERSION = 2
+
+    def __init__(self, json_path, arrays):
+        self.json_path = str(json_path)
+        self._arrays = arrays
+        self.image_ids = arrays['image_ids']
+        self.image_sizes = arrays['image_sizes']
+        self.annotation_ids = arrays['annotation_ids']
+        self.annotation_image_ids = arrays['annotation_image_ids']
+        self.annotation_category_ids = arrays['annotation_category_ids']
+        self.categories = fast_json.loads(arrays['categories'].tobytes())
+        self._file = None
+
+    @property
+    def num_images(self):
+        return len(self.image_ids)
+
+    @property
+    def num_annotations(self):
+        return len(self.annotation_ids)
+
+    @classmethod
+    def sidecar_path(cls, json_path):
+        return str(json_path) + cls.SIDECAR_SUFFIX
+
+    @classmethod
+    def open(cls, json_path, rebuild=False):
+        """
+        sidecar가 있고 JSON이 바뀌지 않았으면 sidecar를 로드, 아니면 새로 만들어 저장
+
+        :param json_path: COCO JSON 경로
+        :param rebuild: True이면 sidecar를 무시하고 다시 생성
+        """
+        if not rebuild:
+            index = cls.load(json_path)
+            if index is not None:
+                return index
+
+        index = cls.build(json_path)
+        index.save()
+        return index
+
+    @classmethod
+    def load(cls, json_path):
+        """JSON과 맞는 sidecar가 있으면 로드, 없거나 오래되었으면 None (JSON은 읽지 않음)"""
+        sidecar_path = cls.sidecar_path(json_path)
+        if not os.path.exists(sidecar_path):
+            return None
+        try:
+            with np.load(sidecar_path) as data:
+                arrays = {key: data[key] for key in data.files}
+        except (OSError, ValueError):
+            return None
+        if not cls._is_fresh(json_path, arrays):
+            return None
+        return cls(json_path, arrays)
+
+    @classmethod
+    def _is_fresh(cls, json_path, arrays):
+        """sidecar에 기록된 버전과 JSON 크기/수정 시각이 현재와 같은지 확인"""
+        if 'meta' not in arrays:
+            return False
+        stat = os.stat(json_path)
+        version, size, mtime_ns = arrays['meta'].tolist()
+        return version == cls.VERSION and size == stat.st_size and mtime_ns == stat.st_mtime_ns
+
+    @classmethod
+    def build(cls, json_path):
+        """COCO JSON을 스트리밍으로 한 번 읽어 인덱스 생성"""
+        stat = os.stat(json_path)
+        image_ids, image_sizes, image_spans = [], [], []
+        names = []
+        annotation_ids, annotation_image_ids, annotation_category_ids, annotation_spans = [], [], [], []
+        categories = []
+
+        for key, value, start, end in iter_coco_spans(json_path):
+            if key == 'annotations':
+                annotation_ids.append(value['id'])
+                annotation_image_ids.append(value['image_id'])
+                annotation_category_ids.append(value.get('category_id', -1))
+                annotation_spans.append((start, end))
+            elif key == 'images':
+                image_ids.append(value['id'])
+                image_sizes.append((value.get('width', 0), value.get('height', 0)))
+                image_spans.append((start, end))
+                names.append(value['file_name'].encode('utf-8'))
+            elif key == 'categories':
+                categories = value
+
+        name_offsets = np.zeros(len(names) + 1, dtype=np.int64)
+        np.cumsum([len(name) for name in names], out=name_offsets[1:])
+        name_hashes = np.frombuffer(b''.join(_name_hash(name) for name in names), dtype='<u8')
+        name_order = np.argsort(name_hashes, kind='stable')
+
+        arrays = {
+            'meta': np.array([cls.VERSION, stat.st_size, stat.st_mtime_ns], dtype=np.int64),
+            'image_ids': np.array(image_ids, dtype=np.int64),
+            'image_sizes': np.array(image_sizes, dtype=np.int32).reshape(-1, 2),
+            'image_spans': np.array(image_spans, dtype=np.int64).reshape(-1, 2),
+            'name_data': np.frombuffer(b''.join(names), dtype=np.uint8),
+            'name_offsets': name_offsets,
+            'name_order': name_order,
+            'sorted_name_hashes': name_hashes[name_order],
+            'annotation_ids': np.array(annotation_ids, dtype=np.int64),
+            'annotation_image_ids': np.array(annotation_image_ids, dtype=np.int64),
+            'annotation_category_ids': np.array(annotation_category_ids, dtype=np.int64),
+            'annotation_spans': np.array(annotation_spans, dtype=np.int64).reshape(-1, 2),
+            'categories': np.frombuffer(fast_json.dumps(categories), dtype=np.uint8),
+        }
+        arrays.update(cls._build_groups(arrays))
+        return cls(json_path, arrays)
+
+    @staticmethod
+    def _build_groups(arrays):
+        """
+        image_id→annotations, category→images 그룹을 CSR 형태(정렬된 행 번호 + 구간 offset)로 생성
+
+        image_id가 같은 어노테이션은 annotation_order[ptr[i]:ptr[i + 1]]에 원본 순서대로 모임
+        """
+        image_ids = arrays['image_ids']
+        annotation_image_ids = arrays['annotation_image_ids']
+        annotation_category_ids = arrays['annotation_category_ids']
+
+        # 이미지 행 번호 기준으로 어노테이션 정렬 (images에 없는 image_id는 제외)
+        image_order = np.argsort(image_ids, kind='stable')
+        sorted_ids = image_ids[image_order]
+        positions = np.searchsorted(sorted_ids, annotation_image_ids)
+        positions = np.minimum(positions, max(len(sorted_ids) - 1, 0))
+        valid = (sorted_ids[positions] == annotation_image_ids) if len(sorted_ids) else np.zeros(0, dtype=bool)
+        annotation_rows = np.full(len(annotation_image_ids), -1, dtype=np.int64)
+        annotation_rows[valid] = image_order[positions[valid]]
+
+        annotation_order = np.argsort(annotation_rows, kind='stable')
+        annotation_order = annotation_order[annotation_rows[annotation_order] >= 0]
+        annotation_ptr = np.zeros(len(image_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(annotation_rows[annotation_order], minlength=len(image_ids)), out=annotation_ptr[1:])
+
+        # 카테고리별로 해당 카테고리 어노테이션이 있는 이미지 행 번호 (중복 제거)
+        pairs = np.unique(np.stack([annotation_category_ids[valid], annotation_rows[valid]], axis=1), axis=0) \
+            if valid.any() else np.zeros((0, 2), dtype=np.int64)
+        category_ids, category_counts = np.unique(pairs[:, 0], return_counts=True)
+        category_ptr = np.zeros(len(category_ids) + 1, dtype=np.int64)
+        np.cumsum(category_counts, out=category_ptr[1:])
+
+        return {
+            'image_order': image_order,
+            'sorted_image_ids': sorted_ids,
+            'annotation_order': annotation_order,
+            'annotation_ptr': annotation_ptr,
+            'category_ids': category_ids,
+            'category_ptr': category_ptr,
+            'category_image_rows': pairs[:, 1].copy(),
+        }
+
+    def save(self, path=None):
+        """인덱스를 sidecar 파일로 저장 (임시 파일에 쓴 뒤 교체)"""
+        path = path or self.sidecar_path(self.json_path)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **self._arrays)
+        os.replace(tmp_path, path)
+        return path
+
+    def file_name(self, row):
+        """행 번호의 file_name 반환"""
+        offsets = self._arrays['name_offsets']
+        return self._arrays['name_data'][offsets[row]:offsets[row + 1]].tobytes().decode('utf-8')
+
+    def file_names(self):
+        """전체 file_name 리스트 (images 순서)"""
+        data = self._arrays['name_data'].tobytes()
+        offsets = self._arrays['name_offsets'].tolist()
+        return [data[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(self.num_images)]
+
+    def image_row(self, image_id):
+        """image_id의 행 번호 (없으면 None)"""
+        sorted_ids = self._arrays['sorted_image_ids']
+        i = np.searchsorted(sorted_ids, image_id)
+        if i == len(sorted_ids) or sorted_ids[i] != image_id:
+            return None
+        return int(self._arrays['image_order'][i])
+
+    def image_id_for_file(self, file_name):
+        """file_name에 해당하는 image_id (없으면 None)"""
+        sorted_hashes = self._arrays['sorted_name_hashes']
+        name_hash = np.frombuffer(_name_hash(file_name.encode('utf-8')), dtype='<u8')[0]
+        start = np.searchsorted(sorted_hashes, name_hash, side='left')
+        end = np.searchsorted(sorted_hashes, name_hash, side='right')
+        # 해시가 같은 후보 중 실제 file_name이 같은 행
+        for row in self._arrays['name_order'][start:end].tolist():
+            if self.file_name(row) == file_name:
+                return int(self.image_ids[row])
+        return None
+
+    def annotation_rows_for_image(self, image_id):
+        """image_id에 속한 어노테이션의 행 번호 배열 (원본 순서)"""
+        row = self.image_row(image_id)
+        if row is None:
+            return self._arrays['annotation_order'][:0]
+        ptr = self._arrays['annotation_ptr']
+        return self._arrays['annotation_order'][ptr[row]:ptr[row + 1]]
+
+    def annotation_ids_for_image(self, image_id):
+        return self.annotation_ids[self.annotation_rows_for_image(image_id)]
+
+    def image_ids_for_category(self, category_id):
+        """category_id 어노테이션이 있는 image_id 배열"""
+        category_ids = self._arrays['category_ids']
+        i = np.searchsorted(category_ids, category_id)
+        if i == len(category_ids) or category_ids[i] != category_id:
+            return self.image_ids[:0]
+        ptr = self._arrays['category_ptr']
+        return self.image_ids[self._arrays['category_image_rows'][ptr[i]:ptr[i + 1]]]
+
+    def _read_span(self, span):
+        if self._file is None:
+            self._file = open(self.json_path, 'rb')
+        start, end = span
+        self._file.seek(start)
+        return fast_json.loads(self._file.read(end - start))
+
+    def image(self, image_id):
+        """JSON에서 이미지 dict를 읽음 (없으면 None)"""
+        row = self.image_row(image_id)
+        if row is None:
+            return None
+        return self._read_span(self._arrays['image_spans'][row])
+
+    def annotations_for_image(self, image_id):
+        """JSON에서 image_id에 속한 어노테이션 dict들을 읽음"""
+        spans = self._arrays['annotation_spans']
+        return [self._read_span(spans[row]) for row in self.annotation_rows_for_image(image_id)]
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
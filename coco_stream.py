@@ -0,0 +1,262 @@
+import os
+import json
+import shutil
+
+import fast_json
+
+class CocoStreamWriter:
+    """
+    COCO JSON을 메모리에 모으지 않고 순차적으로 기록하는 writer
+
+    images 배열은 출력 파일에 바로 쓰고, annotations 배열은 임시 파일에 쓴 뒤
+    close 시점에 이어붙이므로 메모리 사용량은 이미지 수와 무관하게 일정함
+    직렬화는 fast_json을 사용하므로 NumPy 배열/스칼라 값도 그대로 기록할 수 있음
+
+    사용 예:
+        with CocoStreamWriter(path, {"info": ..., "licenses": ..., "categories": ...}) as writer:
+            writer.write_image(image_dict)
+            writer.write_annotation(annotation_dict)
+    """
+
+    def __init__(self, output_path, header=None, indent=None):
+        """
+        :param output_path: 출력 JSON 파일 경로
+        :param header: images/annotations 앞에 기록할 키 (info, licenses, categories 등)
+        :param indent: None이면 compact 출력, 정수면 해당 들여쓰기로 pretty 출력
+        """
+        self.output_path = str(output_path)
+        self.indent = indent
+        self.num_images = 0
+        self.num_annotations = 0
+        self._colon = b':' if indent is None else b': '
+        self._images_started = False
+        self._trailer = []
+
+        self._tmp_path = self.output_path + '.tmp'
+        self._ann_path = self.output_path + '.annotations.tmp'
+        self._file = open(self._tmp_path, 'wb')
+        self._ann_file = open(self._ann_path, 'wb')
+
+        self._file.write(b'{')
+        for key, value in (header or {}).items():
+            self.write_key(key, value)
+
+    def _newline(self, level):
+        if self.indent is None:
+            return b''
+        return b'\n' + b' ' * (self.indent * level)
+
+    def _encode_key(self, key, value):
+        encoded = fast_json.dumps(value, indent=self.indent)
+        if self.indent is not None:
+            encoded = encoded.replace(b'\n', self._newline(1))
+        return self._newline(1) + fast_json.dumps(key) + self._colon + encoded
+
+    def _encode_item(self, obj):
+        encoded = fast_json.dumps(obj, indent=self.indent)
+        if self.indent is None:
+            return encoded
+        return self._newline(2) + encoded.replace(b'\n', self._newline(2))
+
+    def _start_images(self):
+        if not self._images_started:
+            self._file.write(self._newline(1) + b'"images"' + self._colon + b'[')
+            self._images_started = True
+
+    def write_key(self, key, value):
+        """
+        images/annotations 외의 최상위 키 기록
+
+        images 기록 전이면 바로 쓰고, 이후에는 annotations 뒤에 기록
+        (원본 COCO처럼 categories가 annotations 뒤에 오는 입력을 순차 처리할 때 사용)
+        """
+        if self._images_started:
+            self._trailer.append((key, value))
+        else:
+            self._file.write(self._encode_key(key, value) + b',')
+
+    def write_image(self, image):
+        """images 배열에 이미지 1개 기록"""
+        self._start_images()
+        if self.num_images:
+            self._file.write(b',')
+        self._file.write(self._encode_item(image))
+        self.num_images += 1
+
+    def write_annotation(self, annotation):
+        """annotations 배열에 어노테이션 1개 기록 (임시 파일)"""
+        if self.num_annotations:
+            self._ann_file.write(b',')
+        self._ann_file.write(self._encode_item(annotation))
+        self.num_annotations += 1
+
+    def close(self):
+        """annotations를 이어붙이고 출력 파일을 완성"""
+        if self._file is None:
+            return
+        self._ann_file.close()
+        self._start_images()
+        self._file.write(self._newline(1) + b'],' + self._newline(1) + b'"annotations"' + self._colon + b'[')
+        with open(self._ann_path, 'rb') as f:
+            shutil.copyfileobj(f, self._file, 1024 * 1024)
+        self._file.write(self._newline(1) + b']')
+        for key, value in self._trailer:
+            self._file.write(b',' + self._encode_key(key, value))
+        self._file.write(self._newline(0) + b'}')
+        self._file.close()
+        self._file = None
+        os.remove(self._ann_path)
+        os.replace(self._tmp_path, self.output_path)
+
+    def abort(self):
+        """작성 중인 임시 파일을 삭제 (기존 출력 파일은 유지)"""
+        if self._file is None:
+            return
+        self._file.close()
+        self._ann_file.close()
+        self._file = None
+        for path in (self._tmp_path, self._ann_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+class _StreamBuffer:
+    """
+    텍스트 파일을 chunk 단위로 읽으며 JSON 토큰을 디코딩하기 위한 버퍼
+
+    byte_offsets=True이면 파일을 latin-1로 연 것으로 간주하여 문자 위치를 바이트 위치로 사용하고,
+    ASCII가 아닌 값은 UTF-8로 다시 디코딩함
+    """
+
+    def __init__(self, f, chunk_size, byte_offsets=False):
+        self._file = f
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._byte_offsets = byte_offsets
+        self.buffer = ''
+        self.pos = 0
+        # 버퍼 앞에서 버린 문자 수 (buffer[pos]의 파일 내 위치 = offset + pos)
+        self.offset = 0
+        # 마지막으로 디코딩한 값의 파일 내 [start, end) 위치
+        self.span = (0, 0)
+        self.eof = False
+
+    def _fill(self):
+        """chunk 하나를 더 읽음 (이미 소비한 앞부분은 버림)"""
+        if self.eof:
+            return False
+        chunk = self._file.read(self._chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.offset += self.pos
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """공백을 건너뛰고 다음 문자를 반환 (EOF면 '')"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"JSON 형식 오류: '{char}' 위치에서 '{self.peek()}' 발견")
+        self.pos += 1
+
+    def decode(self):
+        """다음 JSON 값 하나를 디코딩 (버퍼 끝에서 잘린 값은 더 읽은 뒤 다시 시도)"""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buffer, self.pos)
+                # 숫자 등이 버퍼 끝에서 잘렸을 수 있으므로 뒤에 문자가 남아 있을 때만 확정
+                if end < len(self.buffer) or self.eof:
+                    start = self.pos
+                    self.pos = end
+                    self.span = (self.offset + start, self.offset + end)
+                    if self._byte_offsets:
+                        segment = self.buffer[start:end]
+                        if not segment.isascii():
+                            value = fast_json.loads(segment.encode('latin-1'))
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+
+def _iter_top_level(stream, stream_keys):
+    """최상위 객체를 순회하며 (key, value, start, end) 반환 (stream_keys 배열은 원소 단위)"""
+    stream.expect('{')
+    if stream.peek() == '}':
+        return
+    while True:
+        key = stream.decode()
+        stream.expect(':')
+        if key in stream_keys and stream.peek() == '[':
+            stream.expect('[')
+            if stream.peek() == ']':
+                stream.pos += 1
+            else:
+                while True:
+                    value = stream.decode()
+                    yield (key, value) + stream.span
+                    if stream.peek() == ',':
+                        stream.pos += 1
+                        continue
+                    stream.expect(']')
+                    break
+        else:
+            value = stream.decode()
+            yield (key, value) + stream.span
+        if stream.peek() == ',':
+            stream.pos += 1
+            continue
+        stream.expect('}')
+        return
+
+
+def iter_coco_items(json_path, stream_keys=('images', 'annotations'), chunk_size=1024 * 1024):
+    """
+    COCO JSON을 전체 로드하지 않고 최상위 키 단위로 순회
+
+    stream_keys에 해당하는 배열은 원소 하나씩 (key, element)로,
+    그 외 최상위 값(info, categories 등)은 (key, value)로 반환하므로
+    메모리 사용량은 가장 큰 원소 하나 + chunk_size 수준으로 유지됨
+
+    :param json_path: COCO JSON 경로
+    :param stream_keys: 원소 단위로 반환할 배열 키
+    :param chunk_size: 한 번에 읽을 문자 수
+    """
+    with open(json_path, 'r', encoding='utf-8') as f:
+        for key, value, _, _ in _iter_top_level(_StreamBuffer(f, chunk_size), stream_keys):
+            yield key, value
+
+
+def iter_coco_spans(json_path, stream_keys=('images', 'annotations'), chunk_size=1024 * 1024):
+    """
+    iter_coco_items와 같지만 각 값의 파일 내 바이트 위치도 함께 반환
+
+    반환한 [start, end) 구간을 바이너리로 읽어 fast_json.loads하면 해당 값만 다시 읽을 수 있음
+
+    :return: (key, value, start, end) 제너레이터
+    """
+    # latin-1은 바이트와 문자가 1:1 대응하므로 문자 위치가 곧 바이트 위치
+    with open(json_path, 'r', encoding='latin-1', newline='') as f:
+        yield from _iter_top_level(_StreamBuffer(f, chunk_size, byte_offsets=True), stream_keys)
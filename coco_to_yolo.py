@@ -0,0 +1,263 @@
+import os
+import heapq
+import pickle
+import shutil
+import argparse
+import tempfile
+import time
+import yaml
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby
+from tqdm import tqdm
+
+from coco_stream import iter_coco_items
+
+def annotation_to_record(ann, task, stats=None):
+    """
+    COCO annotation에서 YOLO 변환에 필요한 필드만 남긴 record 생성 (None이면 변환 대상 아님)
+
+    :param stats: Counter를 넘기면 segment에서 bbox로 대체한 수('bbox_polygons')를 셈
+    """
+    if ann.get('iscrowd', 0):
+        return None
+
+    if task == 'segment':
+        # 여러 polygon이면 점이 가장 많은 것을 사용
+        segmentation = ann.get('segmentation')
+        polygon = max(segmentation, key=len) if isinstance(segmentation, list) and segmentation else None
+        if polygon is None or len(polygon) < 6:
+            # polygon이 없으면(bbox만 있는 어노테이션, RLE 등) bbox의 4개 꼭짓점으로 대체
+            bbox = ann.get('bbox')
+            if not bbox or bbox[2] <= 0 or bbox[3] <= 0:
+                return None
+            x, y, w, h = bbox
+            polygon = [x, y, x + w, y, x + w, y + h, x, y + h]
+            if stats is not None:
+                stats['bbox_polygons'] += 1
+        return ann['image_id'], ann['category_id'], polygon
+
+    if task == 'pose':
+        keypoints = ann.get('keypoints')
+        if not keypoints:
+            return None
+        return ann['image_id'], ann['category_id'], (ann['bbox'], keypoints)
+
+    return ann['image_id'], ann['category_id'], ann['bbox']
+
+def format_label_line(class_index, payload, width, height, task):
+    """record 1개를 정규화된 YOLO 라벨 라인으로 변환"""
+    if task == 'segment':
+        coords = ' '.join(
+            f"{value / (width if i % 2 == 0 else height):.6f}" for i, value in enumerate(payload)
+        )
+        return f"{class_index} {coords}"
+
+    if task == 'pose':
+        bbox, keypoints = payload
+    else:
+        bbox, keypoints = payload, None
+
+    x, y, w, h = bbox
+    line = f"{class_index} {(x + w / 2) / width:.6f} {(y + h / 2) / height:.6f} {w / width:.6f} {h / height:.6f}"
+    if keypoints is not None:
+        kpts = []
+        for i in range(0, len(keypoints), 3):
+            kpts.append(f"{keypoints[i] / width:.6f} {keypoints[i + 1] / height:.6f} {int(keypoints[i + 2])}")
+        line += ' ' + ' '.join(kpts)
+    return line
+
+def write_label_batch(args):
+    """이미지별 record 묶음을 YOLO 라벨 파일로 기록 (멀티프로세싱용)"""
+    labels_path, groups, category_index, task = args
+    written = 0
+    for file_name, width, height, records in groups:
+        lines = [
+            format_label_line(category_index[category_id], payload, width, height, task)
+            for category_id, payload in records
+            if category_id in category_index
+        ]
+        label_file = os.path.join(labels_path, os.path.splitext(os.path.basename(file_name))[0] + '.txt')
+        with open(label_file, 'w') as f:
+            f.write('\n'.join(lines) + '\n' if lines else '')
+        written += 1
+    return written
+
+def spill_run(records, spill_dir):
+    """image_id 순으로 정렬한 record들을 임시 파일에 기록하고 경로 반환"""
+    records.sort(key=lambda record: record[0])
+    fd, run_path = tempfile.mkstemp(suffix='.run', dir=spill_dir)
+    with os.fdopen(fd, 'wb') as f:
+        pickler = pickle.Pickler(f, protocol=pickle.HIGHEST_PROTOCOL)
+        for record in records:
+            pickler.dump(record)
+    return run_path
+
+def iter_run(run_path):
+    """spill_run으로 기록한 record를 순서대로 읽음"""
+    with open(run_path, 'rb') as f:
+        unpickler = pickle.Unpickler(f)
+        while True:
+            try:
+                yield unpickler.load()
+            except EOFError:
+                return
+
+def convert_coco_to_yolo(json_path, output_path, task='detect', max_workers=None, max_in_memory=2_000_000,
+                         batch_size=500):
+    """
+    COCO JSON을 스트리밍으로 읽어 YOLO 라벨 파일로 변환
+
+    annotations는 max_in_memory개를 넘으면 image_id 순으로 정렬하여 디스크에 spill한 뒤
+    k-way merge로 이미지별로 묶고, 라벨 파일은 batch_size개 이미지 단위로 병렬 기록
+
+    :param json_path: COCO instances JSON 경로
+    :param output_path: 라벨 파일을 기록할 디렉토리
+    :param task: 'detect'(bbox), 'segment'(polygon), 'pose'(bbox + keypoints)
+    :return: (카테고리 리스트, 라벨을 기록한 이미지 수)
+    """
+    os.makedirs(output_path, exist_ok=True)
+    if max_workers is None:
+        max_workers = min(32, os.cpu_count() + 4)
+
+    categories = []
+    images = {}
+    records = []
+    runs = []
+    num_annotations = 0
+    skipped = 0
+    stats = Counter()
+
+    spill_dir = tempfile.mkdtemp(prefix='.coco_to_yolo_', dir=output_path)
+    try:
+        print(f"Streaming {json_path}...")
+        for key, value in tqdm(iter_coco_items(json_path), desc="Reading", unit=" items"):
+            if key == 'annotations':
+                record = annotation_to_record(value, task, stats)
+                if record is None:
+                    skipped += 1
+                    continue
+                records.append(record)
+                num_annotations += 1
+                if len(records) >= max_in_memory:
+                    runs.append(spill_run(records, spill_dir))
+                    records = []
+            elif key == 'images':
+                images[value['id']] = (value['file_name'], value['width'], value['height'])
+            elif key == 'categories':
+                categories = value
+
+        # YOLO class index는 category id 오름차순
+        categories = sorted(categories, key=lambda category: category['id'])
+        category_index = {category['id']: i for i, category in enumerate(categories)}
+
+        if runs:
+            if records:
+                runs.append(spill_run(records, spill_dir))
+                records = []
+            print(f"Merging {len(runs)} sorted runs...")
+            merged = heapq.merge(*(iter_run(run) for run in runs), key=lambda record: record[0])
+        else:
+            records.sort(key=lambda record: record[0])
+            merged = iter(records)
+
+        def iter_batches():
+            batch = []
+            annotated = set()
+            for image_id, group in groupby(merged, key=lambda record: record[0]):
+                if image_id not in images:
+                    continue
+                annotated.add(image_id)
+                file_name, width, height = images[image_id]
+                batch.append((file_name, width, height, [(record[1], record[2]) for record in group]))
+                if len(batch) >= batch_size:
+                    yield (output_path, batch, category_index, task)
+                    batch = []
+            # 어노테이션이 없는 이미지도 빈 라벨 파일을 기록 (이미지마다 라벨 파일 1개)
+            for image_id, (file_name, width, height) in images.items():
+                if image_id in annotated:
+                    continue
+                batch.append((file_name, width, height, []))
+                if len(batch) >= batch_size:
+                    yield (output_path, batch, category_index, task)
+                    batch = []
+            if batch:
+                yield (output_path, batch, category_index, task)
+
+        written = 0
+        with ProcessPoolExecutor(max_workers=max_workers) as executor, \
+                tqdm(total=len(images), desc="Writing labels") as progress:
+            pending = deque()
+            for batch_args in iter_batches():
+                pending.append(executor.submit(write_label_batch, batch_args))
+                if len(pending) >= max_workers * 2:
+                    count = pending.popleft().result()
+                    written += count
+                    progress.update(count)
+            while pending:
+                count = pending.popleft().result()
+                written += count
+                progress.update(count)
+    finally:
+        # 정리 실패가 원래 예외를 가리지 않도록 spill 디렉토리는 오류를 무시하고 삭제
+        shutil.rmtree(spill_dir, ignore_errors=True)
+
+    print(f"  - Images: {len(images)} (labels written: {written})")
+    print(f"  - Annotations: {num_annotations}")
+    if stats['bbox_polygons']:
+        print(f"  - Annotations without polygon written as bbox polygons: {stats['bbox_polygons']}")
+    if skipped:
+        print(f"  - Skipped annotations (iscrowd or nothing to convert): {skipped}")
+    print(f"  - Categories: {len(categories)}")
+    return categories, written
+
+def write_data_yaml(output_path, categories, splits, task):
+    """YOLO data.yaml 생성 (카테고리 이름과 keypoint 정보 포함)"""
+    data = {split_key: f"{split}/images" for split_key, split in splits.items()}
+    data['nc'] = len(categories)
+    data['names'] = [category['name'] for category in categories]
+    if task == 'pose' and categories and categories[0].get('keypoints'):
+        data['kpt_shape'] = [len(categories[0]['keypoints']), 3]
+    with open(os.path.join(output_path, 'data.yaml'), 'w', encoding='utf-8') as f:
+        yaml.safe_dump(data, f, allow_unicode=True, sort_keys=False)
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert COCO format annotations to YOLO labels (streaming).")
+    parser.add_argument('--coco_path', type=str, default='coco_optimized_output', help="Path to the root directory of the COCO dataset (annotations/instances_{split}.json).")
+    parser.add_argument('--yolo_path', type=str, default='yolo_from_coco', help="Path to the output directory for the YOLO dataset.")
+    parser.add_argument('--splits', type=str, nargs='+', default=['train', 'valid'], help='COCO split names to convert (default: train valid)')
+    parser.add_argument('--task', type=str, choices=['detect', 'segment', 'pose'], default='detect', help='Label type to write: detect (boxes), segment (polygons) or pose (boxes + keypoints)')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes (default: auto)')
+    parser.add_argument('--max_in_memory', type=int, default=2_000_000, help='Annotations kept in memory before spilling a sorted run to disk (default: 2000000)')
+
+    args = parser.parse_args()
+
+    start_time = time.time()
+
+    categories = []
+    converted_splits = {}
+    for split in args.splits:
+        json_path = os.path.join(args.coco_path, 'annotations', f'instances_{split}.json')
+        if not os.path.exists(json_path):
+            print(f"'{json_path}' not found. Skipping.")
+            continue
+
+        print(f"Converting '{split}' set...")
+        split_categories, _ = convert_coco_to_yolo(
+            json_path,
+            os.path.join(args.yolo_path, split, 'labels'),
+            task=args.task,
+            max_workers=args.workers,
+            max_in_memory=args.max_in_memory
+        )
+        categories = categories or split_categories
+        converted_splits['val' if split in ('valid', 'val') else split] = split
+
+    if converted_splits:
+        write_data_yaml(args.yolo_path, categories, converted_splits, args.task)
+
+    elapsed_time = time.time() - start_time
+    print(f"\nTotal conversion time: {elapsed_time:.2f} seconds")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,262 @@
+import os
+import argparse
+import yaml
+
+from quarantine import load_quarantine
+
+# 데이터셋 레이아웃 명세
+# splits: 공통 split 키(train/val) → 레이아웃에서 쓰는 split 이름
+# images/labels/annotations: 데이터셋 루트 기준 경로 템플릿 ({split}에 split 이름 대입)
+# list_file: 이미지 파일명 목록 파일 (KU_SEG의 Train.txt 등)
+LAYOUTS = {
+    'ku_seg': {
+        'splits': {'train': 'Train', 'val': 'Validation'},
+        'images': 'images/{split}',
+        'labels': 'labels/{split}',
+        'list_file': '{split}.txt',
+    },
+    'spine': {
+        'splits': {'train': 'train', 'val': 'valid'},
+        'images': '{split}/images',
+        'labels': '{split}/labels',
+    },
+    'coco': {
+        'splits': {'train': 'train', 'val': 'valid'},
+        'images': '{split}',
+        'annotations': 'annotations/instances_{split}.json',
+    },
+}
+# Ultralytics 기본 구조는 Spine 구조와 같음
+LAYOUTS['ultralytics'] = LAYOUTS['spine']
+
+YOLO_LAYOUTS = ('ku_seg', 'spine', 'ultralytics')
+VIEW_MODES = ('symlink', 'list')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+def split_paths(root, layout):
+    """
+    레이아웃 명세에 따라 split별 경로 반환
+
+    :return: {'train': {'name', 'images', 'labels', 'annotations', 'list_file'}, 'val': {...}}
+             (해당 레이아웃에 없는 항목은 None)
+    """
+    spec = LAYOUTS[layout]
+    paths = {}
+    for key, split in spec['splits'].items():
+        paths[key] = {'name': split}
+        for item in ('images', 'labels', 'annotations', 'list_file'):
+            template = spec.get(item)
+            paths[key][item] = os.path.join(root, template.format(split=split)) if template else None
+    return paths
+
+def detect_layout(root):
+    """train split의 이미지 디렉토리(및 COCO annotations)가 있는 레이아웃 이름 반환 (없으면 None)"""
+    for layout in ('ku_seg', 'spine', 'coco'):
+        train = split_paths(root, layout)['train']
+        if os.path.isdir(train['images']) and (train['annotations'] is None or os.path.isfile(train['annotations'])):
+            return layout
+    return None
+
+def _normalize_names(names):
+    """data.yaml names (리스트 또는 {index: name} dict)를 리스트로 변환"""
+    if isinstance(names, dict):
+        return [str(names[key]) for key in sorted(names)]
+    return [str(name) for name in names]
+
+def load_class_names(root, layout):
+    """
+    원본 데이터셋의 클래스 이름 (YOLO 계열은 data.yaml의 names, COCO는 id 순 categories)
+
+    :return: 클래스 이름 리스트 또는 찾지 못하면 None
+    """
+    if layout == 'coco':
+        from coco_index import CocoIndex
+        from coco_stream import iter_coco_items
+        for split in split_paths(root, layout).values():
+            if not os.path.isfile(split['annotations']):
+                continue
+            # 원본에 sidecar를 만들지 않도록 이미 있는 sidecar만 사용하고, 없으면 JSON을 스트리밍으로 읽기만 함
+            index = CocoIndex.load(split['annotations'])
+            if index is not None:
+                with index:
+                    categories = index.categories
+            else:
+                categories = next((value for key, value in iter_coco_items(split['annotations'])
+                                   if key == 'categories'), [])
+            return [category['name'] for category in sorted(categories, key=lambda c: c['id'])]
+        return None
+
+    data_yaml_path = os.path.join(root, 'data.yaml')
+    if not os.path.isfile(data_yaml_path):
+        return None
+    with open(data_yaml_path, 'r', encoding='utf-8') as f:
+        data = yaml.safe_load(f) or {}
+    names = data.get('names')
+    return _normalize_names(names) if names else None
+
+def build_data_yaml(layout, names, root=None):
+    """
+    레이아웃에 맞는 data.yaml 내용 생성
+
+    :param root: 지정하면 path 키로 기록 (train/val은 root 기준 상대 경로)
+    """
+    data = {}
+    if root is not None:
+        data['path'] = os.path.abspath(root)
+    for key, split in split_paths('', layout).items():
+        data[key] = split['images'].replace(os.sep, '/')
+    data['nc'] = len(names)
+    data['names'] = list(names)
+    return data
+
+def write_data_yaml(path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        yaml.safe_dump(data, f, allow_unicode=True, sort_keys=False)
+
+def list_images(images_dir):
+    """이미지 디렉토리의 이미지 파일명 목록 (정렬)"""
+    with os.scandir(images_dir) as entries:
+        return sorted(entry.name for entry in entries
+                      if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS))
+
+def _symlink_dir(target, link_path):
+    """link_path에 target 디렉토리를 가리키는 상대 경로 symlink 생성"""
+    os.makedirs(os.path.dirname(link_path), exist_ok=True)
+    os.symlink(os.path.relpath(target, os.path.dirname(link_path)), link_path, target_is_directory=True)
+
+def _prepare_destination(dst_root):
+    if os.path.exists(dst_root) and os.listdir(dst_root):
+        raise FileExistsError(f"출력 디렉토리가 비어 있지 않습니다: {dst_root}")
+    os.makedirs(dst_root, exist_ok=True)
+
+def create_list_view(src_root, src_layout, dst_root, dst_layout, names):
+    """
+    원본 이미지의 절대 경로 목록 파일(Train.txt 등)과 이를 가리키는 data.yaml만 생성
+
+    라벨은 Ultralytics 규칙(경로의 /images/ → /labels/)으로 원본 위치에서 찾으므로 YOLO 계열 원본만 지원
+    원본 루트에 image_scanner의 격리 목록이 있으면 격리된 이미지는 목록에서 제외
+    :return: {split 키: 이미지 수}
+    """
+    if src_layout not in YOLO_LAYOUTS:
+        raise ValueError("list view는 YOLO 계열(ku_seg, spine) 원본에서만 만들 수 있습니다.")
+    _prepare_destination(dst_root)
+    quarantine = load_quarantine(src_root)
+
+    counts = {}
+    data = {'path': os.path.abspath(dst_root)}
+    dst_splits = split_paths(dst_root, dst_layout)
+    for key, src in split_paths(src_root, src_layout).items():
+        if not os.path.isdir(src['images']):
+            continue
+        list_path = dst_splits[key]['list_file'] or os.path.join(dst_root, f"{dst_splits[key]['name']}.txt")
+        images_dir = os.path.abspath(src['images'])
+        file_names = [name for name in list_images(images_dir) if os.path.join(images_dir, name) not in quarantine]
+        with open(list_path, 'w', encoding='utf-8') as f:
+            f.writelines(os.path.join(images_dir, name) + '\n' for name in file_names)
+        data[key] = os.path.basename(list_path)
+        counts[key] = len(file_names)
+    data['nc'] = len(names)
+    data['names'] = list(names)
+    write_data_yaml(os.path.join(dst_root, 'data.yaml'), data)
+    return counts
+
+def create_symlink_view(src_root, src_layout, dst_root, dst_layout, names, max_workers=None):
+    """
+    대상 레이아웃의 디렉토리 구조를 원본 디렉토리를 가리키는 symlink로 생성
+
+    YOLO 계열끼리는 split별 images/labels 디렉토리 symlink만 만들고(O(1)),
+    COCO가 포함되면 어노테이션만 변환(yolo_to_coco_optimized / coco_to_yolo)하고 이미지는 symlink로 연결
+    :return: {split 키: 이미지 수}
+    """
+    _prepare_destination(dst_root)
+    src_splits = split_paths(src_root, src_layout)
+    dst_splits = split_paths(dst_root, dst_layout)
+    counts = {}
+
+    if dst_layout == 'coco' and src_layout != 'coco':
+        # yolo_to_coco_optimized는 Spine 구조를 읽으므로 원본이 다르면 출력 안에 Spine 구조 view를 먼저 생성
+        from yolo_to_coco_optimized import convert_yolo_to_coco_splits
+        yolo_root = src_root
+        if LAYOUTS[src_layout] is not LAYOUTS['spine']:
+            yolo_root = os.path.join(dst_root, '.yolo_view')
+            create_symlink_view(src_root, src_layout, yolo_root, 'spine', names)
+        yolo_splits = split_paths(yolo_root, 'spine')
+        dataset_types = [split['name'] for split in yolo_splits.values() if os.path.isdir(split['images'])]
+        convert_yolo_to_coco_splits(yolo_root, dst_root, dataset_types, names, max_workers=max_workers,
+                                    image_mode='symlink')
+        return {key: len(list_images(split['images'])) for key, split in yolo_splits.items()
+                if os.path.isdir(split['images'])}
+
+    for key, src in src_splits.items():
+        dst = dst_splits[key]
+        if not os.path.isdir(src['images']):
+            continue
+        _symlink_dir(src['images'], dst['images'])
+        file_names = list_images(src['images'])
+        counts[key] = len(file_names)
+
+        if src_layout == 'coco' and dst_layout != 'coco':
+            # COCO 어노테이션을 YOLO 라벨로 변환 (라벨 파일은 새로 생성)
+            from coco_to_yolo import convert_coco_to_yolo
+            convert_coco_to_yolo(src['annotations'], dst['labels'], max_workers=max_workers)
+        elif dst['labels'] is not None and src['labels'] is not None and os.path.isdir(src['labels']):
+            _symlink_dir(src['labels'], dst['labels'])
+        elif dst['annotations'] is not None and src['annotations'] is not None:
+            os.makedirs(os.path.dirname(dst['annotations']), exist_ok=True)
+            os.symlink(os.path.relpath(src['annotations'], os.path.dirname(dst['annotations'])), dst['annotations'])
+
+        if dst['list_file'] is not None:
+            with open(dst['list_file'], 'w', encoding='utf-8') as f:
+                f.writelines(f"{name}\n" for name in file_names)
+
+    if dst_layout != 'coco':
+        write_data_yaml(os.path.join(dst_root, 'data.yaml'), build_data_yaml(dst_layout, names))
+    return counts
+
+def create_view(src_root, dst_root, src_layout=None, dst_layout='spine', mode='symlink', names=None,
+                max_workers=None):
+    """
+    원본 데이터셋을 옮기거나 복사하지 않고 다른 레이아웃의 view 생성
+
+    :param src_layout: None이면 자동 감지
+    :param mode: 'symlink'(대상 레이아웃 디렉토리를 symlink로 구성) 또는
+                 'list'(이미지 경로 목록 파일 + data.yaml만 생성)
+    :param names: 클래스 이름, None이면 원본(data.yaml / COCO categories)에서 읽음
+    :return: {split 키: 이미지 수}
+    """
+    src_layout = src_layout or detect_layout(src_root)
+    if src_layout is None:
+        raise ValueError(f"원본 데이터셋 레이아웃을 알 수 없습니다: {src_root}")
+    if names is None:
+        names = load_class_names(src_root, src_layout)
+    if not names:
+        raise ValueError("클래스 이름을 찾을 수 없습니다. data.yaml의 names 또는 --names를 지정하세요.")
+
+    if mode == 'list':
+        return create_list_view(src_root, src_layout, dst_root, dst_layout, names)
+    return create_symlink_view(src_root, src_layout, dst_root, dst_layout, names, max_workers)
+
+def main():
+    parser = argparse.ArgumentParser(description="Create a zero-copy view of a dataset in another layout (KU_SEG / Spine(Ultralytics) / COCO).")
+    parser.add_argument('--src', type=str, required=True, help='Path to the source dataset root')
+    parser.add_argument('--dst', type=str, required=True, help='Path to the view directory to create (must be empty)')
+    parser.add_argument('--src_layout', type=str, choices=sorted(LAYOUTS), default=None, help='Source layout (default: auto-detect)')
+    parser.add_argument('--dst_layout', type=str, choices=sorted(LAYOUTS), default='spine', help='Target layout (default: spine)')
+    parser.add_argument('--mode', type=str, choices=VIEW_MODES, default='symlink', help='symlink: directory symlinks in the target layout, list: image list files + data.yaml pointing at the original files')
+    parser.add_argument('--names', type=str, nargs='+', default=None, help='Class names (default: read from the source data.yaml or COCO categories)')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes for COCO annotation conversion (default: auto)')
+
+    args = parser.parse_args()
+
+    try:
+        counts = create_view(args.src, args.dst, args.src_layout, args.dst_layout, args.mode, args.names, args.workers)
+    except (ValueError, FileExistsError) as e:
+        print(f"ERROR: {e}")
+        return
+
+    print(f"view 생성 완료: {args.dst} ({args.dst_layout}, {args.mode})")
+    for key, count in counts.items():
+        print(f"  - {key}: {count}개 이미지")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,270 @@
+import os
+import sys
+import mmap
+import time
+import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from tqdm import tqdm
+
+import fast_json
+from quarantine import QUARANTINE_NAME
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+MANIFEST_NAME = '.dataset_manifest.json'
+MANIFEST_VERSION = 1
+# 이 크기 이상인 파일은 mmap으로 한 번에 해시 (hashlib은 큰 버퍼에서 GIL을 풀어 스레드 병렬화가 됨)
+MMAP_THRESHOLD = 64 * 1024 * 1024
+READ_CHUNK = 1024 * 1024
+# 매니페스트에 포함하지 않는 항목 (구조 변환 journal, 이미지 격리 목록 등)
+EXCLUDED_NAMES = {MANIFEST_NAME, '.structure_journal', QUARANTINE_NAME}
+ALGORITHMS = ('blake2b', 'xxh3') if xxhash is not None else ('blake2b',)
+
+def _new_hasher(algorithm):
+    if algorithm == 'xxh3':
+        if xxhash is None:
+            raise ValueError("xxh3를 사용하려면 xxhash를 설치하세요: pip install xxhash")
+        return xxhash.xxh3_128()
+    return hashlib.blake2b(digest_size=16)
+
+def hash_file(path, algorithm='blake2b'):
+    """파일 내용 해시 (큰 파일은 mmap, 그 외는 chunk 단위로 읽음)"""
+    hasher = _new_hasher(algorithm)
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                hasher.update(mm)
+        else:
+            while True:
+                chunk = f.read(READ_CHUNK)
+                if not chunk:
+                    break
+                hasher.update(chunk)
+    return hasher.hexdigest()
+
+def scan_files(root):
+    """
+    root 아래 모든 파일의 상대 경로(/ 구분)와 (크기, 수정시각) 반환
+
+    :return: {rel_path: (size, mtime_ns)}
+    """
+    root = os.path.abspath(root)
+    entries = {}
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.name in EXCLUDED_NAMES:
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file():
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        # scandir 이후 삭제/이름 변경된 파일
+                        continue
+                    rel_path = os.path.relpath(entry.path, root).replace(os.sep, '/')
+                    entries[rel_path] = (stat.st_size, stat.st_mtime_ns)
+    return entries
+
+def hash_files(root, rel_paths, algorithm='blake2b', max_workers=None, desc="Hashing"):
+    """
+    rel_paths를 스레드 풀에서 병렬로 해시
+
+    :return: {rel_path: digest}, 스캔 이후 삭제/이름 변경 등으로 읽을 수 없게 된 파일은 digest가 None
+    """
+    if max_workers is None:
+        max_workers = min(32, os.cpu_count() + 4)
+    rel_paths = list(rel_paths)
+
+    def hash_one(rel_path):
+        try:
+            return rel_path, hash_file(os.path.join(root, rel_path), algorithm)
+        except OSError:
+            return rel_path, None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(tqdm(executor.map(hash_one, rel_paths), total=len(rel_paths), desc=desc))
+
+def create_manifest(root, algorithm='blake2b', max_workers=None):
+    """
+    root 아래 모든 파일의 크기, 수정시각, 해시로 매니페스트 생성
+
+    스캔 이후 해시 전에 사라진(삭제/이름 변경) 파일은 매니페스트에서 제외하고 missing으로 반환
+
+    :return: ({"version", "algorithm", "created", "files": {rel_path: [size, mtime_ns, digest]}}, missing 경로 리스트)
+    """
+    entries = scan_files(root)
+    digests = hash_files(root, sorted(entries), algorithm, max_workers)
+    missing = sorted(path for path, digest in digests.items() if digest is None)
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "algorithm": algorithm,
+        "created": time.strftime('%Y-%m-%dT%H:%M:%S'),
+        "files": {path: [size, mtime_ns, digests[path]] for path, (size, mtime_ns) in sorted(entries.items())
+                  if digests[path] is not None}
+    }
+    return manifest, missing
+
+def save_manifest(manifest, path):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        fast_json.dump(manifest, f)
+    os.replace(tmp_path, path)
+
+def load_manifest(path):
+    with open(path, 'rb') as f:
+        manifest = fast_json.load(f)
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"지원하지 않는 매니페스트 버전입니다: {manifest.get('version')}")
+    return manifest
+
+def verify_manifest(root, manifest, full=False, max_workers=None):
+    """
+    매니페스트와 현재 파일 비교
+
+    크기/수정시각이 같은 파일은 stat만으로 통과시키고 (full=True이면 모두 해시),
+    나머지만 해시하여 내용이 바뀌었는지 확인
+
+    :return: {"ok", "touched"(수정시각만 다르고 내용 동일), "modified", "missing", "added"} 경로 리스트
+    """
+    files = manifest["files"]
+    current = scan_files(root)
+
+    report = {"ok": [], "touched": [], "modified": [], "missing": [], "added": []}
+    to_hash = []
+    for path, (size, mtime_ns, _) in files.items():
+        stat = current.get(path)
+        if stat is None:
+            report["missing"].append(path)
+        elif stat[0] != size:
+            report["modified"].append(path)
+        elif full or stat[1] != mtime_ns:
+            to_hash.append(path)
+        else:
+            report["ok"].append(path)
+    report["added"] = sorted(path for path in current if path not in files)
+
+    digests = hash_files(root, to_hash, manifest["algorithm"], max_workers, desc="Verifying") if to_hash else {}
+    for path, digest in digests.items():
+        if digest is None:
+            # 스캔 이후 해시 전에 사라진 파일
+            report["missing"].append(path)
+        elif digest != files[path][2]:
+            report["modified"].append(path)
+        elif current[path][1] != files[path][1]:
+            report["touched"].append(path)
+        else:
+            report["ok"].append(path)
+    report["modified"].sort()
+    report["missing"].sort()
+    return report
+
+def diff_manifests(old, new):
+    """
+    두 매니페스트 비교 (해시 기준)
+
+    :return: {"added", "removed", "changed", "moved"([(old_path, new_path)]), "same"}
+    """
+    if old["algorithm"] != new["algorithm"]:
+        raise ValueError(f"해시 알고리즘이 다릅니다: {old['algorithm']} / {new['algorithm']}")
+    old_files, new_files = old["files"], new["files"]
+
+    added = [path for path in new_files if path not in old_files]
+    removed = [path for path in old_files if path not in new_files]
+    changed = [path for path in new_files if path in old_files and new_files[path][2] != old_files[path][2]]
+    same = sum(1 for path in new_files if path in old_files) - len(changed)
+
+    # 삭제된 파일과 같은 내용의 추가된 파일은 이동으로 처리
+    removed_by_digest = {}
+    for path in removed:
+        removed_by_digest.setdefault(old_files[path][2], []).append(path)
+    moved = []
+    remaining_added = []
+    for path in added:
+        candidates = removed_by_digest.get(new_files[path][2])
+        if candidates:
+            moved.append((candidates.pop(), path))
+        else:
+            remaining_added.append(path)
+    moved_sources = {old_path for old_path, _ in moved}
+
+    return {
+        "added": sorted(remaining_added),
+        "removed": sorted(path for path in removed if path not in moved_sources),
+        "changed": sorted(changed),
+        "moved": sorted(moved),
+        "same": same
+    }
+
+def _print_paths(title, paths, limit=20):
+    print(f"  - {title}: {len(paths)}")
+    for path in paths[:limit]:
+        print(f"      {path}")
+    if len(paths) > limit:
+        print(f"      ... ({len(paths) - limit}개 더)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Create, verify and diff dataset integrity manifests (parallel hashing).")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    create_parser = subparsers.add_parser('create', help='Hash all files under a dataset root and write a manifest')
+    create_parser.add_argument('root', help='Dataset root directory')
+    create_parser.add_argument('-o', '--output', default=None, help=f'Manifest path (default: <root>/{MANIFEST_NAME})')
+    create_parser.add_argument('--algorithm', choices=ALGORITHMS, default=ALGORITHMS[-1], help='Hash algorithm (default: xxh3 if xxhash is installed, otherwise blake2b)')
+    create_parser.add_argument('--workers', type=int, default=None, help='Number of hashing threads (default: auto)')
+
+    verify_parser = subparsers.add_parser('verify', help='Check files against a manifest (stat first, hash only what changed)')
+    verify_parser.add_argument('root', help='Dataset root directory')
+    verify_parser.add_argument('-m', '--manifest', default=None, help=f'Manifest path (default: <root>/{MANIFEST_NAME})')
+    verify_parser.add_argument('--full', action='store_true', help='Hash every file even if size and mtime match')
+    verify_parser.add_argument('--workers', type=int, default=None, help='Number of hashing threads (default: auto)')
+
+    diff_parser = subparsers.add_parser('diff', help='Compare two manifests')
+    diff_parser.add_argument('old', help='Old manifest path')
+    diff_parser.add_argument('new', help='New manifest path')
+
+    args = parser.parse_args()
+    start_time = time.time()
+
+    if args.command == 'create':
+        output = args.output or os.path.join(args.root, MANIFEST_NAME)
+        manifest, missing = create_manifest(args.root, args.algorithm, args.workers)
+        save_manifest(manifest, output)
+        total_size = sum(entry[0] for entry in manifest["files"].values())
+        print(f"매니페스트 생성 완료: {output}")
+        print(f"  - Files: {len(manifest['files'])} ({total_size / (1024 ** 3):.2f} GB, {manifest['algorithm']})")
+        if missing:
+            _print_paths('Missing (removed while hashing, not recorded)', missing)
+        failed = False
+    elif args.command == 'verify':
+        manifest = load_manifest(args.manifest or os.path.join(args.root, MANIFEST_NAME))
+        report = verify_manifest(args.root, manifest, args.full, args.workers)
+        print(f"검증 결과: {args.root}")
+        print(f"  - OK: {len(report['ok'])}")
+        print(f"  - Touched (mtime only): {len(report['touched'])}")
+        for key in ('modified', 'missing', 'added'):
+            _print_paths(key.capitalize(), report[key])
+        failed = bool(report["modified"] or report["missing"])
+    else:
+        result = diff_manifests(load_manifest(args.old), load_manifest(args.new))
+        print(f"매니페스트 비교: {args.old} -> {args.new}")
+        print(f"  - Same: {result['same']}")
+        for key in ('added', 'removed', 'changed'):
+            _print_paths(key.capitalize(), result[key])
+        _print_paths('Moved', [f"{old_path} -> {new_path}" for old_path, new_path in result['moved']])
+        failed = bool(result["removed"] or result["changed"])
+
+    print(f"\nElapsed time: {time.time() - start_time:.2f} seconds")
+    if failed:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,258 @@
+import os
+import json
+import shutil
+
+# 데이터셋 루트 아래에 만드는 journal 디렉토리 (삭제 대상 파일과 새로 쓸 파일도 여기에 임시 보관)
+JOURNAL_DIR = '.structure_journal'
+JOURNAL_FILE = 'journal.jsonl'
+
+class RenameJournal:
+    """
+    디렉토리/파일 rename 기반 구조 변경을 위한 journal
+
+    작업을 mkdir / rename / rmdir 목록으로 계획한 뒤 journal 파일에 먼저 기록하고 순서대로 적용함.
+    파일 삭제는 journal 디렉토리로의 rename, 파일 쓰기는 journal 디렉토리에 미리 쓴 파일의 rename으로
+    표현하므로 모든 단계가 O(1)이고 되돌릴 수 있음. 중간에 중단되면 roll_forward/roll_back으로 복구.
+
+    사용 예:
+        journal = RenameJournal(dataset_path)
+        journal.begin('convert')
+        journal.mkdir(dataset_path / 'train')
+        journal.rename(dataset_path / 'images' / 'Train', dataset_path / 'train' / 'images', 'Train 이미지')
+        counts = journal.commit()
+    """
+
+    def __init__(self, dataset_path):
+        self.dataset_path = os.path.abspath(dataset_path)
+        self.journal_dir = os.path.join(self.dataset_path, JOURNAL_DIR)
+        self.journal_path = os.path.join(self.journal_dir, JOURNAL_FILE)
+        self.operation = None
+        self.ops = []
+        self.counts = {}
+        self.done = 0
+
+    def exists(self):
+        """이전 작업의 journal 디렉토리가 남아 있는지 확인"""
+        return os.path.exists(self.journal_dir)
+
+    def _rel(self, path):
+        return os.path.relpath(os.path.abspath(path), self.dataset_path)
+
+    def _abs(self, rel_path):
+        return os.path.join(self.dataset_path, rel_path)
+
+    def begin(self, operation):
+        """새 작업 시작 (이전 journal이 남아 있으면 FileExistsError)"""
+        os.mkdir(self.journal_dir)
+        self.operation = operation
+        self.ops = []
+        self.counts = {}
+        self.done = 0
+
+    def mkdir(self, path):
+        self.ops.append(['mkdir', self._rel(path)])
+
+    def rmdir(self, path):
+        self.ops.append(['rmdir', self._rel(path)])
+
+    def rename(self, src, dst, count_label=None):
+        """
+        src를 dst로 rename하도록 계획
+
+        :param count_label: 지정하면 src 디렉토리 바로 아래 파일 수를 counts[count_label]에 기록
+        """
+        if count_label is not None:
+            self.counts[count_label] = count_files(src)
+        self.ops.append(['rename', self._rel(src), self._rel(dst)])
+
+    def remove(self, path):
+        """파일/디렉토리 삭제를 journal 디렉토리로의 rename으로 계획 (commit 완료 후 실제 삭제)"""
+        stash_path = os.path.join(self.journal_dir, f"removed_{len(self.ops)}_{os.path.basename(path)}")
+        self.rename(path, stash_path)
+
+    def write_file(self, path, content):
+        """새 내용을 journal 디렉토리에 미리 쓰고, 기존 파일 교체를 rename으로 계획"""
+        staged_path = os.path.join(self.journal_dir, f"staged_{len(self.ops)}_{os.path.basename(path)}")
+        with open(staged_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        if os.path.lexists(path):
+            self.remove(path)
+        self.rename(staged_path, path)
+
+    def _write_header(self):
+        with open(self.journal_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({"operation": self.operation, "ops": self.ops, "counts": self.counts},
+                               ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _apply(self, op):
+        """op 1개 적용 (이미 적용된 op는 건너뜀)"""
+        kind = op[0]
+        if kind == 'mkdir':
+            os.makedirs(self._abs(op[1]), exist_ok=True)
+        elif kind == 'rmdir':
+            if os.path.isdir(self._abs(op[1])):
+                os.rmdir(self._abs(op[1]))
+        elif kind == 'rename':
+            src, dst = self._abs(op[1]), self._abs(op[2])
+            if os.path.lexists(src):
+                if os.path.lexists(dst):
+                    raise FileExistsError(dst)
+                os.rename(src, dst)
+            elif not os.path.lexists(dst):
+                raise FileNotFoundError(src)
+
+    def _undo(self, op):
+        """op 1개 되돌리기 (적용되지 않은 op는 건너뜀)"""
+        kind = op[0]
+        if kind == 'mkdir':
+            path = self._abs(op[1])
+            if os.path.isdir(path) and not os.listdir(path):
+                os.rmdir(path)
+        elif kind == 'rmdir':
+            os.makedirs(self._abs(op[1]), exist_ok=True)
+        elif kind == 'rename':
+            src, dst = self._abs(op[1]), self._abs(op[2])
+            if os.path.lexists(dst) and not os.path.lexists(src):
+                os.rename(dst, src)
+
+    def commit(self):
+        """
+        journal을 기록하고 op를 순서대로 적용한 뒤 journal 디렉토리 삭제
+
+        :return: 계획 시 기록한 counts
+        """
+        self._write_header()
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            for i, op in enumerate(self.ops):
+                self._apply(op)
+                f.write(json.dumps({"done": i}) + '\n')
+                f.flush()
+                self.done = i + 1
+        shutil.rmtree(self.journal_dir)
+        return self.counts
+
+    @classmethod
+    def load(cls, dataset_path):
+        """남아 있는 journal 읽기 (journal 기록 전에 중단된 경우 ops는 빈 리스트)"""
+        journal = cls(dataset_path)
+        if not os.path.exists(journal.journal_path):
+            return journal
+        with open(journal.journal_path, 'r', encoding='utf-8') as f:
+            lines = [line for line in f.read().splitlines() if line.strip()]
+        if not lines:
+            return journal
+        try:
+            header = json.loads(lines[0])
+        except ValueError:
+            # header 기록 중 중단: 적용된 op가 없음
+            return journal
+        journal.operation = header["operation"]
+        journal.ops = header["ops"]
+        journal.counts = header["counts"]
+        for line in lines[1:]:
+            try:
+                journal.done = json.loads(line)["done"] + 1
+            except ValueError:
+                break
+        return journal
+
+    def roll_forward(self):
+        """남은 op를 모두 적용하여 작업 완료"""
+        for op in self.ops:
+            self._apply(op)
+        shutil.rmtree(self.journal_dir)
+        return self.counts
+
+    def roll_back(self):
+        """적용된 op를 역순으로 되돌려 작업 전 상태로 복구"""
+        for op in reversed(self.ops):
+            self._undo(op)
+        shutil.rmtree(self.journal_dir)
+
+def count_files(directory):
+    """디렉토리 바로 아래 파일 수"""
+    with os.scandir(directory) as entries:
+        return sum(1 for entry in entries if entry.is_file())
+
+def recover(dataset_path, mode):
+    """
+    중단된 구조 변경 작업 복구
+
+    :param mode: 'forward'(남은 단계를 마저 적용) 또는 'back'(작업 전 상태로 되돌림)
+    :return: 복구할 journal이 있었으면 True
+    """
+    journal = RenameJournal.load(dataset_path)
+    if not journal.exists():
+        print("복구할 journal이 없습니다.")
+        return False
+    print(f"journal 발견: {journal.operation or '(기록 전 중단)'}, {journal.done}/{len(journal.ops)}단계 완료")
+    if mode == 'forward':
+        journal.roll_forward()
+        print("남은 단계 적용 완료 (roll forward)")
+    else:
+        journal.roll_back()
+        print("작업 전 상태로 복구 완료 (roll back)")
+    return True
+
+def backup_path_for(dataset_path):
+    """데이터셋 옆의 백업(snapshot) 경로 (<이름>_backup)"""
+    dataset_path = os.path.abspath(dataset_path)
+    return os.path.join(os.path.dirname(dataset_path), os.path.basename(dataset_path) + '_backup')
+
+def create_snapshot(source_path, snapshot_path):
+    """
+    디렉토리 트리를 그대로 만들고 파일은 hardlink로 연결한 snapshot 생성
+
+    데이터를 복사하지 않으므로 데이터셋 크기와 무관하게 파일 수에 비례한 시간만 걸리고 추가 공간이 거의 없음.
+    구조 변환 도구는 파일을 제자리에서 수정하지 않고 rename만 하므로 snapshot의 내용은 변하지 않음.
+    hardlink가 불가능한 파일(다른 파일시스템 등)은 복사.
+
+    :return: (hardlink한 파일 수, 복사한 파일 수)
+    """
+    source_path = os.path.abspath(source_path)
+    linked = copied = 0
+    for root, dirs, files in os.walk(source_path):
+        # 진행 중인 journal은 snapshot에 포함하지 않음
+        if root == source_path and JOURNAL_DIR in dirs:
+            dirs.remove(JOURNAL_DIR)
+        target_root = os.path.join(snapshot_path, os.path.relpath(root, source_path))
+        os.makedirs(target_root, exist_ok=True)
+        for name in dirs:
+            src = os.path.join(root, name)
+            if os.path.islink(src):
+                os.symlink(os.readlink(src), os.path.join(target_root, name))
+        for name in files:
+            src = os.path.join(root, name)
+            dst = os.path.join(target_root, name)
+            if os.path.islink(src):
+                os.symlink(os.readlink(src), dst)
+                continue
+            try:
+                os.link(src, dst)
+                linked += 1
+            except OSError:
+                shutil.copy2(src, dst)
+                copied += 1
+    return linked, copied
+
+def restore_snapshot(dataset_path, snapshot_path=None):
+    """
+    snapshot을 rename하여 데이터셋을 복원
+
+    현재 데이터셋은 <이름>_before_restore로 rename하여 남겨두므로 확인 후 직접 삭제
+    :return: 현재 데이터셋을 옮긴 경로 (데이터셋이 없었으면 None)
+    """
+    dataset_path = os.path.abspath(dataset_path)
+    snapshot_path = snapshot_path or backup_path_for(dataset_path)
+    if not os.path.isdir(snapshot_path):
+        raise FileNotFoundError(snapshot_path)
+    aside_path = None
+    if os.path.lexists(dataset_path):
+        aside_path = dataset_path + '_before_restore'
+        if os.path.lexists(aside_path):
+            raise FileExistsError(aside_path)
+        os.rename(dataset_path, aside_path)
+    os.rename(snapshot_path, dataset_path)
+    return aside_path
@@ -1,8 +1,15 @@
 import os
 import shutil
 import argparse
+import yaml
 from pathlib import Path
 
+from dataset_layout import build_data_yaml, load_class_names
+from dataset_ops import RenameJournal, backup_path_for, create_snapshot, recover, restore_snapshot
+
+# 기존 data.yaml에 names가 없을 때 사용하는 클래스 이름
+DEFAULT_CLASS_NAMES = ['vertebrae']
+
 def convert_dataset_structure(source_path, backup=False):
     """
     KU_SEG 형태의 데이터셋을 Spine 형태로 변경하는 함수
@@ -30,13 +37,18 @@ def convert_dataset_structure(source_path, backup=False):
     
     print(f"데이터셋 구조 변경 시작: {source_path}")
     
-    # 백업 생성
+    journal = RenameJournal(source_path)
+    if journal.exists():
+        print("ERROR: 이전 작업의 journal이 남아 있습니다. --recover forward 또는 --recover back으로 먼저 복구하세요.")
+        return False
+    
+    # 백업 생성 (파일은 hardlink로 연결한 snapshot)
     if backup:
-        backup_path = source_path.parent / f"{source_path.name}_backup"
-        if backup_path.exists():
+        backup_path = backup_path_for(source_path)
+        if os.path.exists(backup_path):
             shutil.rmtree(backup_path)
-        shutil.copytree(source_path, backup_path)
-        print(f"백업 생성 완료: {backup_path}")
+        linked, copied = create_snapshot(source_path, backup_path)
+        print(f"백업 생성 완료 (hardlink {linked}개, 복사 {copied}개): {backup_path}")
     else:
         print("백업 생성 건너뜀")
     
@@ -48,105 +60,64 @@ def convert_dataset_structure(source_path, backup=False):
         print("ERROR: images 또는 labels 디렉토리가 존재하지 않습니다.")
         return False
     
-    train_images_dir = images_dir / "Train"
-    valid_images_dir = images_dir / "Validation"
-    train_labels_dir = labels_dir / "Train"
-    valid_labels_dir = labels_dir / "Validation"
-    
-    # 새로운 구조 생성
+    # 새로운 구조
     new_train_dir = source_path / "train"
     new_valid_dir = source_path / "valid"
     
-    # 임시 디렉토리에서 작업 (충돌 방지)
-    temp_dir = source_path / "_temp_conversion"
-    if temp_dir.exists():
-        shutil.rmtree(temp_dir)
-    temp_dir.mkdir()
+    if new_train_dir.exists() or new_valid_dir.exists():
+        print("ERROR: train 또는 valid 디렉토리가 이미 존재합니다.")
+        return False
+    
+    # 디렉토리 단위 rename 계획 (파일을 복사하지 않으므로 파일 수와 무관하게 O(1))
+    moves = [
+        ("Train 이미지", images_dir / "Train", new_train_dir / "images"),
+        ("Validation 이미지", images_dir / "Validation", new_valid_dir / "images"),
+        ("Train 라벨", labels_dir / "Train", new_train_dir / "labels"),
+        ("Validation 라벨", labels_dir / "Validation", new_valid_dir / "labels"),
+    ]
     
     try:
-        # 1. 새로운 구조 생성 (임시 디렉토리)
-        temp_train = temp_dir / "train"
-        temp_valid = temp_dir / "valid"
-        
-        temp_train.mkdir()
-        temp_valid.mkdir()
-        
-        (temp_train / "images").mkdir()
-        (temp_train / "labels").mkdir()
-        (temp_valid / "images").mkdir()
-        (temp_valid / "labels").mkdir()
-        
-        print("새로운 디렉토리 구조 생성 완료")
-        
-        # 2. 파일 이동
-        # Train 이미지 이동
-        if train_images_dir.exists():
-            for file in train_images_dir.glob("*"):
-                if file.is_file():
-                    shutil.copy2(file, temp_train / "images" / file.name)
-            print(f"Train 이미지 파일 이동 완료: {len(list(train_images_dir.glob('*')))}개")
-        
-        # Validation 이미지 이동
-        if valid_images_dir.exists():
-            for file in valid_images_dir.glob("*"):
-                if file.is_file():
-                    shutil.copy2(file, temp_valid / "images" / file.name)
-            print(f"Validation 이미지 파일 이동 완료: {len(list(valid_images_dir.glob('*')))}개")
-        
-        # Train 라벨 이동
-        if train_labels_dir.exists():
-            for file in train_labels_dir.glob("*"):
-                if file.is_file():
-                    shutil.copy2(file, temp_train / "labels" / file.name)
-            print(f"Train 라벨 파일 이동 완료: {len(list(train_labels_dir.glob('*')))}개")
-        
-        # Validation 라벨 이동
-        if valid_labels_dir.exists():
-            for file in valid_labels_dir.glob("*"):
-                if file.is_file():
-                    shutil.copy2(file, temp_valid / "labels" / file.name)
-            print(f"Validation 라벨 파일 이동 완료: {len(list(valid_labels_dir.glob('*')))}개")
-        
-        # 3. 기존 구조 제거
-        if images_dir.exists():
-            shutil.rmtree(images_dir)
-        if labels_dir.exists():
-            shutil.rmtree(labels_dir)
-        
-        # Train.txt, Validation.txt 파일도 제거
-        train_txt = source_path / "Train.txt"
-        valid_txt = source_path / "Validation.txt"
-        if train_txt.exists():
-            train_txt.unlink()
-        if valid_txt.exists():
-            valid_txt.unlink()
-        
-        print("기존 구조 제거 완료")
-        
-        # 4. 새로운 구조를 원래 위치로 이동
-        shutil.move(str(temp_train), str(new_train_dir))
-        shutil.move(str(temp_valid), str(new_valid_dir))
-        
-        print("새로운 구조로 변경 완료")
-        
-        # 5. data.yaml 파일 수정
-        update_data_yaml(source_path)
-        
-        # 6. 임시 디렉토리 정리
-        if temp_dir.exists():
-            shutil.rmtree(temp_dir)
-        
-        return True
-        
+        journal.begin('convert')
+        journal.mkdir(new_train_dir)
+        journal.mkdir(new_valid_dir)
+        for label, src, dst in moves:
+            if src.is_dir():
+                journal.rename(src, dst, count_label=label)
+            else:
+                journal.mkdir(dst)
+        
+        # Train.txt, Validation.txt 파일 제거
+        for txt_path in (source_path / "Train.txt", source_path / "Validation.txt"):
+            if txt_path.exists():
+                journal.remove(txt_path)
+        
+        # 비게 되는 기존 images/labels 디렉토리 제거 (다른 파일이 있으면 유지)
+        for old_dir in (images_dir, labels_dir):
+            remaining = set(os.listdir(old_dir)) - {"Train", "Validation"}
+            if remaining:
+                print(f"WARNING: {old_dir}에 다른 항목이 있어 유지합니다: {sorted(remaining)}")
+            else:
+                journal.rmdir(old_dir)
+        
+        # data.yaml 파일 수정
+        update_data_yaml(source_path, journal)
+        
+        counts = journal.commit()
     except Exception as e:
         print(f"ERROR: 변환 중 오류 발생: {e}")
-        # 임시 디렉토리 정리
-        if temp_dir.exists():
-            shutil.rmtree(temp_dir)
+        if journal.exists():
+            journal.roll_back()
+            print("변경 사항을 되돌렸습니다.")
         return False
+    
+    for label, _, _ in moves:
+        if label in counts:
+            print(f"{label} 파일 이동 완료: {counts[label]}개")
+    print("새로운 구조로 변경 완료")
+    return True
 
-def update_data_yaml(dataset_path):
-    """data.yaml 파일을 새로운 구조에 맞게 수정"""
+def update_data_yaml(dataset_path, journal):
+    """data.yaml 파일을 새로운 구조에 맞게 수정 (journal의 rename 단계로 교체)"""
     dataset_path = Path(dataset_path)
     data_yaml_path = dataset_path / "data.yaml"
     
@@ -154,32 +125,20 @@ def update_data_yaml(dataset_path):
         print("WARNING: data.yaml 파일이 존재하지 않습니다.")
         return False
     
-    try:
-        # 기존 data.yaml 읽기
-        with open(data_yaml_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        print(f"기존 data.yaml 내용:\n{content}")
-        
-        # 새로운 data.yaml 내용 생성 (Spine 형태)
-        new_content = """train: train/images
-val: valid/images
-
-nc: 1
-names: ['vertebrae']
-"""
-        
-        # data.yaml 파일 업데이트
-        with open(data_yaml_path, 'w', encoding='utf-8') as f:
-            f.write(new_content)
-        
-        print("data.yaml 파일 업데이트 완료")
-        print(f"새로운 data.yaml 내용:\n{new_content}")
-        return True
-        
-    except Exception as e:
-        print(f"ERROR: data.yaml 업데이트 중 오류 발생: {e}")
-        return False
+    # 기존 data.yaml 읽기
+    with open(data_yaml_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    
+    print(f"기존 data.yaml 내용:\n{content}")
+    
+    # 새로운 data.yaml 내용 생성 (Spine 형태, 클래스 이름은 기존 data.yaml에서 가져옴)
+    names = load_class_names(dataset_path, 'ku_seg') or DEFAULT_CLASS_NAMES
+    new_content = yaml.safe_dump(build_data_yaml('spine', names), allow_unicode=True, sort_keys=False)
+    
+    journal.write_file(data_yaml_path, new_content)
+    
+    print(f"새로운 data.yaml 내용:\n{new_content}")
+    return True
 
 def verify_conversion(dataset_path):
     """변환 결과 검증"""
@@ -229,20 +188,33 @@ def verify_conversion(dataset_path):
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="데이터셋 구조를 KU_SEG 형태에서 Spine 형태로 변환")
     parser.add_argument("dataset_path", help="변환할 데이터셋 경로")
-    parser.add_argument("--backup", action="store_true", help="변환 전 백업 생성 (기본값: 백업 안함)")
+    parser.add_argument("--backup", action="store_true", help="변환 전 hardlink snapshot 백업 생성 (기본값: 백업 안함)")
+    parser.add_argument("--restore", action="store_true", help="<데이터셋>_backup snapshot을 rename하여 복원")
     parser.add_argument("--verify", action="store_true", default=True, help="변환 후 결과 검증 (기본값: 검증함)")
+    parser.add_argument("--recover", choices=["forward", "back"], help="중단된 변환을 journal로 복구 (forward: 마저 적용, back: 변환 전으로 되돌림)")
     
     args = parser.parse_args()
     
-    print("=== 데이터셋 구조 변환 시작 ===")
-    print(f"데이터셋 경로: {args.dataset_path}")
-    print(f"백업 생성: {'예' if args.backup else '아니오'}")
-    print(f"결과 검증: {'예' if args.verify else '아니오'}")
-    print()
-    
-    if convert_dataset_structure(args.dataset_path, backup=args.backup):
-        print("\n변환 성공!")
-        if args.verify:
+    if args.restore:
+        print("=== 백업 복원 ===")
+        aside_path = restore_snapshot(args.dataset_path)
+        print(f"복원 완료: {backup_path_for(args.dataset_path)} -> {args.dataset_path}")
+        if aside_path:
+            print(f"기존 데이터셋은 {aside_path}로 옮겼습니다. 확인 후 삭제하세요.")
+    elif args.recover:
+        print("=== 데이터셋 구조 변환 복구 ===")
+        if recover(args.dataset_path, args.recover) and args.verify and args.recover == "forward":
             verify_conversion(args.dataset_path)
     else:
-        print("\n변환 실패!")
\ No newline at end of file
+        print("=== 데이터셋 구조 변환 시작 ===")
+        print(f"데이터셋 경로: {args.dataset_path}")
+        print(f"백업 생성: {'예' if args.backup else '아니오'}")
+        print(f"결과 검증: {'예' if args.verify else '아니오'}")
+        print()
+        
+        if convert_dataset_structure(args.dataset_path, backup=args.backup):
+            print("\n변환 성공!")
+            if args.verify:
+                verify_conversion(args.dataset_path)
+        else:
+            print("\n변환 실패!")
\ No newline at end of file
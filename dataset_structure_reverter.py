@@ -1,8 +1,15 @@
 import os
 import shutil
 import argparse
+import yaml
 from pathlib import Path
 
+from dataset_layout import build_data_yaml, load_class_names
+from dataset_ops import RenameJournal, backup_path_for, create_snapshot, recover, restore_snapshot
+
+# 기존 data.yaml에 names가 없을 때 사용하는 클래스 이름
+DEFAULT_CLASS_NAMES = ['vertebrae']
+
 def revert_dataset_structure(source_path, backup=False):
     """
     Spine 형태의 데이터셋을 KU_SEG 형태로 변경하는 함수
@@ -30,13 +37,18 @@ def revert_dataset_structure(source_path, backup=False):
     
     print(f"데이터셋 구조 역변환 시작: {source_path}")
     
-    # 백업 생성
+    journal = RenameJournal(source_path)
+    if journal.exists():
+        print("ERROR: 이전 작업의 journal이 남아 있습니다. --recover forward 또는 --recover back으로 먼저 복구하세요.")
+        return False
+    
+    # 백업 생성 (파일은 hardlink로 연결한 snapshot)
     if backup:
-        backup_path = source_path.parent / f"{source_path.name}_backup"
-        if backup_path.exists():
+        backup_path = backup_path_for(source_path)
+        if os.path.exists(backup_path):
             shutil.rmtree(backup_path)
-        shutil.copytree(source_path, backup_path)
-        print(f"백업 생성 완료: {backup_path}")
+        linked, copied = create_snapshot(source_path, backup_path)
+        print(f"백업 생성 완료 (hardlink {linked}개, 복사 {copied}개): {backup_path}")
     else:
         print("백업 생성 건너뜀")
     
@@ -48,100 +60,65 @@ def revert_dataset_structure(source_path, backup=False):
         print("ERROR: train 또는 valid 디렉토리가 존재하지 않습니다.")
         return False
     
-    train_images_dir = train_dir / "images"
-    train_labels_dir = train_dir / "labels"
-    valid_images_dir = valid_dir / "images"
-    valid_labels_dir = valid_dir / "labels"
-    
-    # 새로운 구조 생성을 위한 디렉토리
+    # 새로운 구조
     new_images_dir = source_path / "images"
     new_labels_dir = source_path / "labels"
     
-    # 임시 디렉토리에서 작업 (충돌 방지)
-    temp_dir = source_path / "_temp_reversion"
-    if temp_dir.exists():
-        shutil.rmtree(temp_dir)
-    temp_dir.mkdir()
+    if new_images_dir.exists() or new_labels_dir.exists():
+        print("ERROR: images 또는 labels 디렉토리가 이미 존재합니다.")
+        return False
+    
+    # 디렉토리 단위 rename 계획 (파일을 복사하지 않으므로 파일 수와 무관하게 O(1))
+    moves = [
+        ("Train 이미지", train_dir / "images", new_images_dir / "Train"),
+        ("Valid 이미지", valid_dir / "images", new_images_dir / "Validation"),
+        ("Train 라벨", train_dir / "labels", new_labels_dir / "Train"),
+        ("Valid 라벨", valid_dir / "labels", new_labels_dir / "Validation"),
+    ]
     
     try:
-        # 1. 새로운 구조 생성 (임시 디렉토리)
-        temp_images = temp_dir / "images"
-        temp_labels = temp_dir / "labels"
-        
-        temp_images.mkdir()
-        temp_labels.mkdir()
-        
-        (temp_images / "Train").mkdir()
-        (temp_images / "Validation").mkdir()
-        (temp_labels / "Train").mkdir()
-        (temp_labels / "Validation").mkdir()
-        
-        print("새로운 디렉토리 구조 생성 완료")
-        
-        # 2. 파일 이동
-        # Train 이미지 이동
-        if train_images_dir.exists():
-            for file in train_images_dir.glob("*"):
-                if file.is_file():
-                    shutil.copy2(file, temp_images / "Train" / file.name)
-            print(f"Train 이미지 파일 이동 완료: {len(list(train_images_dir.glob('*')))}개")
-        
-        # Valid 이미지를 Validation으로 이동
-        if valid_images_dir.exists():
-            for file in valid_images_dir.glob("*"):
-                if file.is_file():
-                    shutil.copy2(file, temp_images / "Validation" / file.name)
-            print(f"Valid 이미지 파일 이동 완료: {len(list(valid_images_dir.glob('*')))}개")
-        
-        # Train 라벨 이동
-        if train_labels_dir.exists():
-            for file in train_labels_dir.glob("*"):
-                if file.is_file():
-                    shutil.copy2(file, temp_labels / "Train" / file.name)
-            print(f"Train 라벨 파일 이동 완료: {len(list(train_labels_dir.glob('*')))}개")
-        
-        # Valid 라벨을 Validation으로 이동
-        if valid_labels_dir.exists():
-            for file in valid_labels_dir.glob("*"):
-                if file.is_file():
-                    shutil.copy2(file, temp_labels / "Validation" / file.name)
-            print(f"Valid 라벨 파일 이동 완료: {len(list(valid_labels_dir.glob('*')))}개")
-        
-        # 3. 기존 구조 제거
-        if train_dir.exists():
-            shutil.rmtree(train_dir)
-        if valid_dir.exists():
-            shutil.rmtree(valid_dir)
-        
-        print("기존 구조 제거 완료")
-        
-        # 4. 새로운 구조를 원래 위치로 이동
-        shutil.move(str(temp_images), str(new_images_dir))
-        shutil.move(str(temp_labels), str(new_labels_dir))
-        
-        print("새로운 구조로 변경 완료")
-        
-        # 5. data.yaml 파일 수정
-        update_data_yaml(source_path)
-        
-        # 6. Train.txt, Validation.txt 파일 생성
-        create_txt_files(source_path)
-        
-        # 7. 임시 디렉토리 정리
-        if temp_dir.exists():
-            shutil.rmtree(temp_dir)
-        
-        return True
-        
+        journal.begin('revert')
+        journal.mkdir(new_images_dir)
+        journal.mkdir(new_labels_dir)
+        for label, src, dst in moves:
+            if src.is_dir():
+                journal.rename(src, dst, count_label=label)
+            else:
+                journal.mkdir(dst)
+        
+        # 비게 되는 기존 train/valid 디렉토리 제거 (다른 파일이 있으면 유지)
+        for old_dir in (train_dir, valid_dir):
+            remaining = set(os.listdir(old_dir)) - {"images", "labels"}
+            if remaining:
+                print(f"WARNING: {old_dir}에 다른 항목이 있어 유지합니다: {sorted(remaining)}")
+            else:
+                journal.rmdir(old_dir)
+        
+        # data.yaml 파일 수정
+        update_data_yaml(source_path, journal)
+        
+        # Train.txt, Validation.txt 파일 생성 (이동 전 디렉토리 목록 사용)
+        create_txt_files(source_path, journal, {"Train.txt": train_dir / "images", "Validation.txt": valid_dir / "images"})
+        
+        counts = journal.commit()
     except Exception as e:
         print(f"ERROR: 역변환 중 오류 발생: {e}")
-        # 임시 디렉토리 정리
-        if temp_dir.exists():
-            shutil.rmtree(temp_dir)
+        if journal.exists():
+            journal.roll_back()
+            print("변경 사항을 되돌렸습니다.")
         return False
+    
+    for label, _, _ in moves:
+        if label in counts:
+            print(f"{label} 파일 이동 완료: {counts[label]}개")
+    for txt_name in ("Train.txt", "Validation.txt"):
+        if txt_name in counts:
+            print(f"{txt_name} 파일 생성 완료: {counts[txt_name]}개 파일")
+    print("새로운 구조로 변경 완료")
+    return True
 
-def update_data_yaml(dataset_path):
-    """data.yaml 파일을 KU_SEG 구조에 맞게 수정"""
+def update_data_yaml(dataset_path, journal):
+    """data.yaml 파일을 KU_SEG 구조에 맞게 수정 (journal의 rename 단계로 교체)"""
     dataset_path = Path(dataset_path)
     data_yaml_path = dataset_path / "data.yaml"
     
@@ -149,67 +126,38 @@ def update_data_yaml(dataset_path):
         print("WARNING: data.yaml 파일이 존재하지 않습니다.")
         return False
     
-    try:
-        # 기존 data.yaml 읽기
-        with open(data_yaml_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        print(f"기존 data.yaml 내용:\n{content}")
-        
-        # 새로운 data.yaml 내용 생성 (KU_SEG 형태)
-        new_content = """train: images/Train
-val: images/Validation
+    # 기존 data.yaml 읽기
+    with open(data_yaml_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    
+    print(f"기존 data.yaml 내용:\n{content}")
+    
+    # 새로운 data.yaml 내용 생성 (KU_SEG 형태, 클래스 이름은 기존 data.yaml에서 가져옴)
+    names = load_class_names(dataset_path, 'spine') or DEFAULT_CLASS_NAMES
+    new_content = yaml.safe_dump(build_data_yaml('ku_seg', names), allow_unicode=True, sort_keys=False)
+    
+    journal.write_file(data_yaml_path, new_content)
+    
+    print(f"새로운 data.yaml 내용:\n{new_content}")
+    return True
 
-nc: 1
-names: ['vertebrae']
-"""
-        
-        # data.yaml 파일 업데이트
-        with open(data_yaml_path, 'w', encoding='utf-8') as f:
-            f.write(new_content)
-        
-        print("data.yaml 파일 업데이트 완료")
-        print(f"새로운 data.yaml 내용:\n{new_content}")
-        return True
-        
-    except Exception as e:
-        print(f"ERROR: data.yaml 업데이트 중 오류 발생: {e}")
-        return False
+def create_txt_files(dataset_path, journal, image_dirs):
+    """
+    Train.txt, Validation.txt 파일 생성 (journal의 rename 단계로 기록)
 
-def create_txt_files(dataset_path):
-    """Train.txt, Validation.txt 파일 생성"""
+    :param image_dirs: {txt 파일명: 이미지 디렉토리}, 파일 수는 journal counts에 기록
+    """
     dataset_path = Path(dataset_path)
     
-    try:
-        # Train.txt 생성
-        train_images_dir = dataset_path / "images" / "Train"
-        if train_images_dir.exists():
-            train_files = [f.name for f in train_images_dir.glob("*") if f.is_file()]
-            train_txt_path = dataset_path / "Train.txt"
-            
-            with open(train_txt_path, 'w', encoding='utf-8') as f:
-                for file_name in sorted(train_files):
-                    f.write(f"{file_name}\n")
-            
-            print(f"Train.txt 파일 생성 완료: {len(train_files)}개 파일")
-        
-        # Validation.txt 생성
-        valid_images_dir = dataset_path / "images" / "Validation"
-        if valid_images_dir.exists():
-            valid_files = [f.name for f in valid_images_dir.glob("*") if f.is_file()]
-            valid_txt_path = dataset_path / "Validation.txt"
-            
-            with open(valid_txt_path, 'w', encoding='utf-8') as f:
-                for file_name in sorted(valid_files):
-                    f.write(f"{file_name}\n")
-            
-            print(f"Validation.txt 파일 생성 완료: {len(valid_files)}개 파일")
-        
-        return True
-        
-    except Exception as e:
-        print(f"ERROR: txt 파일 생성 중 오류 발생: {e}")
-        return False
+    for txt_name, images_dir in image_dirs.items():
+        if not images_dir.is_dir():
+            continue
+        with os.scandir(images_dir) as entries:
+            file_names = sorted(entry.name for entry in entries if entry.is_file())
+        journal.write_file(dataset_path / txt_name, ''.join(f"{file_name}\n" for file_name in file_names))
+        journal.counts[txt_name] = len(file_names)
+    
+    return True
 
 def verify_reversion(dataset_path):
     """역변환 결과 검증"""
@@ -275,20 +223,33 @@ def verify_reversion(dataset_path):
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="데이터셋 구조를 Spine 형태에서 KU_SEG 형태로 역변환")
     parser.add_argument("dataset_path", help="역변환할 데이터셋 경로")
-    parser.add_argument("--backup", action="store_true", help="변환 전 백업 생성 (기본값: 백업 안함)")
+    parser.add_argument("--backup", action="store_true", help="변환 전 hardlink snapshot 백업 생성 (기본값: 백업 안함)")
+    parser.add_argument("--restore", action="store_true", help="<데이터셋>_backup snapshot을 rename하여 복원")
     parser.add_argument("--verify", action="store_true", default=True, help="변환 후 결과 검증 (기본값: 검증함)")
+    parser.add_argument("--recover", choices=["forward", "back"], help="중단된 역변환을 journal로 복구 (forward: 마저 적용, back: 역변환 전으로 되돌림)")
     
     args = parser.parse_args()
     
-    print("=== 데이터셋 구조 역변환 시작 ===")
-    print(f"데이터셋 경로: {args.dataset_path}")
-    print(f"백업 생성: {'예' if args.backup else '아니오'}")
-    print(f"결과 검증: {'예' if args.verify else '아니오'}")
-    print()
-    
-    if revert_dataset_structure(args.dataset_path, backup=args.backup):
-        print("\n역변환 성공!")
-        if args.verify:
+    if args.restore:
+        print("=== 백업 복원 ===")
+        aside_path = restore_snapshot(args.dataset_path)
+        print(f"복원 완료: {backup_path_for(args.dataset_path)} -> {args.dataset_path}")
+        if aside_path:
+            print(f"기존 데이터셋은 {aside_path}로 옮겼습니다. 확인 후 삭제하세요.")
+    elif args.recover:
+        print("=== 데이터셋 구조 역변환 복구 ===")
+        if recover(args.dataset_path, args.recover) and args.verify and args.recover == "forward":
             verify_reversion(args.dataset_path)
     else:
-        print("\n역변환 실패!")
\ No newline at end of file
+        print("=== 데이터셋 구조 역변환 시작 ===")
+        print(f"데이터셋 경로: {args.dataset_path}")
+        print(f"백업 생성: {'예' if args.backup else '아니오'}")
+        print(f"결과 검증: {'예' if args.verify else '아니오'}")
+        print()
+        
+        if revert_dataset_structure(args.dataset_path, backup=args.backup):
+            print("\n역변환 성공!")
+            if args.verify:
+                verify_reversion(args.dataset_path)
+        else:
+            print("\n역변환 실패!")
\ No newline at end of file
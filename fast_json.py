@@ -0,0 +1,57 @@
+import json
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 사용 중인 JSON 백엔드 이름 ('orjson' 또는 'json')
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+
+def _default(obj):
+    """NumPy 배열/스칼라 직렬화 (orjson이 직접 처리하지 못하는 dtype과 stdlib fallback용)"""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj, indent=None):
+    """
+    객체를 UTF-8 JSON 바이트로 직렬화
+
+    orjson이 있으면 사용하고 (NumPy 배열/스칼라는 Python 리스트로 바꾸지 않고 바로 직렬화),
+    없거나 orjson이 지원하지 않는 들여쓰기면 stdlib json 사용
+
+    :param indent: None이면 compact(공백 없는 구분자), 정수면 해당 들여쓰기로 pretty 출력
+    """
+    if orjson is not None and indent in (None, 2):
+        option = orjson.OPT_SERIALIZE_NUMPY
+        if indent == 2:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_default, option=option)
+    if indent is None:
+        text = json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=_default)
+    else:
+        text = json.dumps(obj, ensure_ascii=False, indent=indent, default=_default)
+    return text.encode('utf-8')
+
+
+def loads(data):
+    """JSON 문자열/바이트를 역직렬화"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dump(obj, f, indent=None):
+    """바이너리 모드로 연 파일에 JSON 기록"""
+    f.write(dumps(obj, indent=indent))
+
+
+def load(f):
+    """바이너리 모드로 연 파일에서 JSON 읽기"""
+    return loads(f.read())
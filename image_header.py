@@ -0,0 +1,162 @@
+import struct
+
+# EXIF orientation 5~8은 90도 회전이 포함되어 가로/세로가 바뀜
+_TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+# 크기 정보가 있는 JPEG SOFn 마커 (DHT=C4, JPG=C8, DAC=CC 제외)
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+# 길이 필드가 없는 JPEG 마커 (TEM, RSTn, SOI)
+_JPEG_STANDALONE_MARKERS = {0x01, 0xD0, 0xD1, 0xD2, 0xD3, 0xD4, 0xD5, 0xD6, 0xD7, 0xD8}
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# 헤더만 읽을 때 한 번에 읽는 크기
+_HEAD_SIZE = 4096
+
+
+def _parse_exif_orientation(tiff):
+    """EXIF(TIFF) 블록의 IFD0에서 Orientation(0x0112) 태그 값을 반환"""
+    if len(tiff) < 8:
+        return 1
+    if tiff[:2] == b'II':
+        endian = '<'
+    elif tiff[:2] == b'MM':
+        endian = '>'
+    else:
+        return 1
+    ifd_offset = struct.unpack(endian + 'I', tiff[4:8])[0]
+    if ifd_offset + 2 > len(tiff):
+        return 1
+    num_entries = struct.unpack(endian + 'H', tiff[ifd_offset:ifd_offset + 2])[0]
+    for i in range(num_entries):
+        entry = ifd_offset + 2 + i * 12
+        if entry + 12 > len(tiff):
+            break
+        tag, value_type = struct.unpack(endian + 'HH', tiff[entry:entry + 4])
+        if tag == 0x0112 and value_type == 3:
+            orientation = struct.unpack(endian + 'H', tiff[entry + 8:entry + 10])[0]
+            return orientation if 1 <= orientation <= 8 else 1
+    return 1
+
+
+def _parse_jpeg(f):
+    """JPEG 마커를 따라가며 SOFn의 크기와 APP1(EXIF)의 orientation을 읽음"""
+    orientation = 1
+    f.seek(2)
+    while True:
+        byte = f.read(1)
+        if not byte:
+            return None
+        if byte != b'\xff':
+            continue
+        # 0xFF 채움 바이트 건너뛰기
+        marker = 0xFF
+        while marker == 0xFF:
+            byte = f.read(1)
+            if not byte:
+                return None
+            marker = byte[0]
+        if marker in _JPEG_STANDALONE_MARKERS:
+            continue
+        if marker in (0xD9, 0xDA):
+            # EOI/SOS 이전에 SOF가 없으면 헤더만으로는 알 수 없음
+            return None
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack('>H', length_bytes)[0]
+        if length < 2:
+            return None
+        if marker in _JPEG_SOF_MARKERS:
+            data = f.read(5)
+            if len(data) < 5:
+                return None
+            height, width = struct.unpack('>HH', data[1:5])
+            return 'jpeg', width, height, orientation
+        if marker == 0xE1:
+            data = f.read(length - 2)
+            if data[:6] == b'Exif\x00\x00':
+                orientation = _parse_exif_orientation(data[6:])
+            continue
+        f.seek(length - 2, 1)
+
+
+def _parse_png(head):
+    """PNG 시그니처 바로 뒤의 IHDR 청크에서 크기를 읽음"""
+    if len(head) < 24 or head[12:16] != b'IHDR':
+        return None
+    width, height = struct.unpack('>II', head[16:24])
+    return 'png', width, height, 1
+
+
+def _parse_bmp(head):
+    """BMP DIB 헤더에서 크기를 읽음 (top-down BMP는 높이가 음수)"""
+    if len(head) < 26:
+        return None
+    dib_size = struct.unpack('<I', head[14:18])[0]
+    if dib_size == 12:
+        width, height = struct.unpack('<HH', head[18:22])
+    else:
+        width, height = struct.unpack('<ii', head[18:26])
+    return 'bmp', abs(width), abs(height), 1
+
+
+def sniff_image_header(image_path):
+    """
+    파일 앞부분만 읽어 이미지 포맷, 크기, EXIF orientation을 확인
+
+    :param image_path: 이미지 경로
+    :return: (format, width, height, orientation) 또는 지원하지 않는 포맷/손상된 헤더면 None
+             width, height는 orientation 적용 전 저장된 크기
+    """
+    with open(image_path, 'rb') as f:
+        head = f.read(_HEAD_SIZE)
+        if head[:2] == b'\xff\xd8':
+            return _parse_jpeg(f)
+    if head[:8] == _PNG_SIGNATURE:
+        return _parse_png(head)
+    if head[:2] == b'BM':
+        return _parse_bmp(head)
+    return None
+
+
+def _read_image_size_pil(image_path):
+    """PIL로 크기와 EXIF orientation을 읽는 fallback"""
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    with Image.open(image_path) as img:
+        width, height = img.width, img.height
+        try:
+            orientation = img.getexif().get(0x0112, 1)
+        except Exception:
+            orientation = 1
+    return width, height, orientation
+
+
+def read_image_size(image_path, apply_orientation=True):
+    """
+    이미지 크기를 헤더만 읽어 반환 (JPEG SOFn / PNG IHDR / BMP, 그 외 포맷은 PIL fallback)
+
+    apply_orientation=True이면 cv2.imread와 같이 EXIF orientation을 적용한 크기를 반환
+
+    :param image_path: 이미지 경로
+    :param apply_orientation: EXIF orientation 적용 여부
+    :return: (width, height) 또는 읽기 실패시 None
+    """
+    try:
+        header = sniff_image_header(image_path)
+    except OSError:
+        return None
+    if header is not None:
+        _, width, height, orientation = header
+    else:
+        try:
+            result = _read_image_size_pil(image_path)
+        except Exception:
+            return None
+        if result is None:
+            return None
+        width, height, orientation = result
+
+    if apply_orientation and orientation in _TRANSPOSED_ORIENTATIONS:
+        return height, width
+    return width, height
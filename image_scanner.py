@@ -0,0 +1,194 @@
+import os
+import sys
+import time
+import mmap
+import zlib
+import struct
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+from tqdm import tqdm
+
+from image_header import _JPEG_SOF_MARKERS, _JPEG_STANDALONE_MARKERS
+from quarantine import QUARANTINE_NAME, save_quarantine
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp', '.tif', '.tiff')
+# 격리 대상 상태 (truncated는 디코더가 부분 데이터도 받아들이는 경우가 많아 디코드 없이 격리)
+BAD_STATUSES = ('corrupt', 'truncated')
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+def _check_jpeg(f, size):
+    """
+    마커 segment를 길이로 건너뛰며 SOF와 첫 SOS까지 확인하고, 그 뒤에서 EOI 마커를 찾음
+
+    압축 데이터 안의 0xFF는 0xFF00/RSTn으로만 나타나므로 SOS 뒤 첫 FFD9가 EOI이고,
+    EXIF 썸네일처럼 APPn segment 안에 든 FFD9는 segment 단위로 건너뛰어 무시됨.
+    EOI 뒤에 붙은 데이터(motion photo, MPF 등)는 정상으로 판단하고, EOI가 없으면 잘린 파일로 판단
+    (잘린 JPEG도 디코더는 대부분 읽어버리므로 디코드로는 구분할 수 없음)
+    """
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        pos = 2
+        has_sof = False
+        while True:
+            if pos + 4 > size:
+                return 'truncated', 'JPEG header cut off'
+            if mm[pos] != 0xFF:
+                return 'suspicious', 'JPEG marker expected'
+            marker = mm[pos + 1]
+            if marker == 0xFF:
+                # 0xFF 채움 바이트
+                pos += 1
+                continue
+            if marker in _JPEG_STANDALONE_MARKERS:
+                pos += 2
+                continue
+            if marker == 0xD9:
+                return 'suspicious', 'JPEG EOI before image data'
+            length = struct.unpack('>H', mm[pos + 2:pos + 4])[0]
+            if length < 2:
+                return 'suspicious', 'JPEG segment length invalid'
+            has_sof = has_sof or marker in _JPEG_SOF_MARKERS
+            pos += 2 + length
+            if marker == 0xDA:
+                break
+        if pos > size:
+            return 'truncated', 'JPEG scan header cut off'
+        if not has_sof:
+            return 'suspicious', 'JPEG SOF marker not found'
+        if mm.find(b'\xff\xd9', pos) < 0:
+            return 'truncated', 'JPEG EOI marker missing'
+    return 'ok', ''
+
+def _check_png(f, size):
+    """청크를 따라가며 길이와 CRC 확인 (IEND까지)"""
+    f.seek(len(_PNG_SIGNATURE))
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            return 'truncated', 'PNG IEND chunk missing'
+        length, chunk_type = struct.unpack('>I4s', header)
+        data = f.read(length)
+        crc = f.read(4)
+        if len(data) < length or len(crc) < 4:
+            return 'truncated', f'PNG {chunk_type.decode("latin-1")} chunk cut off'
+        if zlib.crc32(data, zlib.crc32(chunk_type)) != struct.unpack('>I', crc)[0]:
+            return 'suspicious', f'PNG {chunk_type.decode("latin-1")} chunk CRC mismatch'
+        if chunk_type == b'IEND':
+            break
+    if f.tell() != size:
+        return 'suspicious', f'PNG has {size - f.tell()} bytes after IEND'
+    return 'ok', ''
+
+def _check_bmp(head, size):
+    """BITMAPFILEHEADER의 파일 크기(bfSize)와 픽셀 데이터 위치(bfOffBits)를 실제 크기와 비교"""
+    if len(head) < 14:
+        return 'truncated', 'BMP header cut off'
+    file_size, data_offset = struct.unpack('<I4xI', head[2:14])
+    if size < file_size or size <= data_offset:
+        return 'truncated', f'BMP header size {file_size} > file size {size}'
+    return 'ok', ''
+
+def check_image(path):
+    """
+    디코드 없이 파일 구조만 확인
+
+    JPEG: SOI/SOF/SOS 마커와 압축 데이터 뒤의 EOI 마커, PNG: 모든 청크의 길이/CRC와 IEND, BMP: 헤더의 파일 크기 vs 실제 크기
+
+    :return: (status, reason), status는 'ok', 'truncated', 'suspicious'(디코드로 확인 필요) 중 하나
+    """
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return 'truncated', 'empty file'
+        head = f.read(18)
+        if head[:3] == b'\xff\xd8\xff':
+            return _check_jpeg(f, size)
+        if head[:8] == _PNG_SIGNATURE:
+            return _check_png(f, size)
+        if head[:2] == b'BM':
+            return _check_bmp(head, size)
+    return 'suspicious', 'unknown or unsupported signature'
+
+def decode_ok(path):
+    """cv2.imdecode로 실제 디코드가 되는지 확인 (한글 경로도 읽을 수 있도록 np.fromfile 사용)"""
+    try:
+        image = cv2.imdecode(np.fromfile(path, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+    except (cv2.error, OSError, ValueError):
+        return False
+    return image is not None and image.size > 0
+
+def scan_image(path, decode=True):
+    """
+    이미지 1개 검사: 구조 검사 후 suspicious인 파일만 디코드로 판정
+
+    :param decode: False이면 suspicious를 그대로 반환
+    :return: (status, reason), status는 'ok', 'truncated', 'corrupt' (decode=False이면 'suspicious' 포함)
+    """
+    try:
+        status, reason = check_image(path)
+    except OSError as e:
+        return 'corrupt', f'read error: {e}'
+    if status == 'suspicious' and decode:
+        if decode_ok(path):
+            return 'ok', ''
+        return 'corrupt', f'{reason}, decode failed'
+    return status, reason
+
+def find_images(root):
+    """root 아래 모든 이미지 파일 경로 (정렬)"""
+    paths = []
+    for directory, _, files in os.walk(root):
+        paths.extend(os.path.join(directory, name) for name in files if name.lower().endswith(IMAGE_EXTENSIONS))
+    return sorted(paths)
+
+def scan_images(paths, decode=True, max_workers=None):
+    """
+    이미지들을 스레드 풀에서 병렬로 검사 (파일 읽기, crc32, imdecode는 GIL을 풀어 병렬화됨)
+
+    :return: {path: (status, reason)}
+    """
+    if max_workers is None:
+        max_workers = min(32, os.cpu_count() + 4)
+    paths = list(paths)
+
+    def scan_one(path):
+        return path, scan_image(path, decode)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(tqdm(executor.map(scan_one, paths), total=len(paths), desc="Scanning images"))
+
+def main():
+    parser = argparse.ArgumentParser(description="Find corrupt or truncated images with cheap structural checks and write a quarantine list.")
+    parser.add_argument('root', help='Dataset root directory to scan')
+    parser.add_argument('-o', '--output', default=None, help=f'Quarantine list path (default: <root>/{QUARANTINE_NAME})')
+    parser.add_argument('--no_decode', action='store_true', help='Do not decode suspicious files; report them without quarantining')
+    parser.add_argument('--workers', type=int, default=None, help='Number of scanning threads (default: auto)')
+
+    args = parser.parse_args()
+    start_time = time.time()
+
+    results = scan_images(find_images(args.root), decode=not args.no_decode, max_workers=args.workers)
+    output = args.output or os.path.join(args.root, QUARANTINE_NAME)
+    count = save_quarantine(((p, status, reason) for p, (status, reason) in results.items()
+                             if status in BAD_STATUSES), output)
+
+    counts = {}
+    for status, _ in results.values():
+        counts[status] = counts.get(status, 0) + 1
+    print(f"검사 완료: {args.root} ({len(results)}개 이미지)")
+    for status in ('ok', 'suspicious', 'truncated', 'corrupt'):
+        if status in counts:
+            print(f"  - {status.capitalize()}: {counts[status]}")
+    bad = sorted((p, reason) for p, (status, reason) in results.items() if status != 'ok')
+    for p, reason in bad[:20]:
+        print(f"      {os.path.relpath(p, args.root)}: {reason}")
+    if len(bad) > 20:
+        print(f"      ... ({len(bad) - 20}개 더)")
+    print(f"격리 목록: {output} ({count}개)")
+
+    print(f"\nElapsed time: {time.time() - start_time:.2f} seconds")
+    if count:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
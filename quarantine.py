@@ -0,0 +1,44 @@
+import os
+
+# image_scanner.py가 데이터셋 루트에 만드는 격리 목록 파일 이름
+QUARANTINE_NAME = '.quarantine.txt'
+
+
+def save_quarantine(entries, path):
+    """
+    격리 목록을 탭 구분 텍스트(경로, 상태, 사유)로 저장
+
+    경로는 목록 파일이 있는 디렉토리 기준 상대 경로로 기록하여 데이터셋을 옮겨도 그대로 사용 가능
+    :param entries: (이미지 경로, status, reason) iterable
+    :return: 기록한 항목 수
+    """
+    base = os.path.dirname(os.path.abspath(path))
+    entries = sorted(entries)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write("# path\tstatus\treason (paths relative to this file)\n")
+        for p, status, reason in entries:
+            rel_path = os.path.relpath(os.path.abspath(p), base).replace(os.sep, '/')
+            f.write(f"{rel_path}\t{status}\t{reason}\n")
+    os.replace(tmp_path, path)
+    return len(entries)
+
+
+def load_quarantine(path):
+    """
+    격리 목록 읽기 (path가 디렉토리면 그 아래 .quarantine.txt)
+
+    :return: 격리된 이미지의 절대 경로 set (목록이 없으면 빈 set)
+    """
+    if os.path.isdir(path):
+        path = os.path.join(path, QUARANTINE_NAME)
+    if not os.path.isfile(path):
+        return set()
+    base = os.path.dirname(os.path.abspath(path))
+    quarantined = set()
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip() or line.startswith('#'):
+                continue
+            quarantined.add(os.path.normpath(os.path.join(base, line.split('\t', 1)[0].rstrip('\n'))))
+    return quarantined
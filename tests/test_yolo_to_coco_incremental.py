@@ -0,0 +1,52 @@
+import os
+import sys
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fast_json
+from yolo_to_coco_optimized import ConversionState, convert_yolo_to_coco_splits
+
+
+def _make_yolo_dataset(root, count=3):
+    images_path = root / 'train' / 'images'
+    labels_path = root / 'train' / 'labels'
+    images_path.mkdir(parents=True)
+    labels_path.mkdir(parents=True)
+    for i in range(count):
+        cv2.imwrite(str(images_path / f'{i:03d}.jpg'), np.zeros((32, 48, 3), dtype=np.uint8))
+        (labels_path / f'{i:03d}.txt').write_text('0 0.5 0.5 0.25 0.25\n')
+
+
+def _convert(yolo_path, coco_path, image_mode, incremental):
+    os.makedirs(coco_path / 'annotations', exist_ok=True)
+    state = ConversionState(str(coco_path / 'annotations' / '.conversion_state.sqlite'))
+    try:
+        convert_yolo_to_coco_splits(str(yolo_path), str(coco_path), ['train'], ['a'], max_workers=1,
+                                    state=state, incremental=incremental, image_mode=image_mode)
+    finally:
+        state.close()
+    with open(coco_path / 'annotations' / 'instances_train.json', 'rb') as f:
+        return fast_json.load(f)
+
+
+def test_incremental_image_mode_switch_rebuilds(tmp_path):
+    yolo_path, coco_path = tmp_path / 'yolo', tmp_path / 'coco'
+    _make_yolo_dataset(yolo_path)
+
+    first = _convert(yolo_path, coco_path, 'copy', incremental=False)
+    assert [image['file_name'] for image in first['images']] == ['000.jpg', '001.jpg', '002.jpg']
+
+    # file_name 형식이 바뀌면 변경 없는 이미지도 새 형식으로 다시 기록되어야 함 (0개로 비워지면 안 됨)
+    second = _convert(yolo_path, coco_path, 'none', incremental=True)
+    assert [image['file_name'] for image in second['images']] == \
+        ['train/images/000.jpg', 'train/images/001.jpg', 'train/images/002.jpg']
+    assert len(second['annotations']) == 3
+    assert [image['id'] for image in second['images']] == [image['id'] for image in first['images']]
+
+    # 같은 image_mode로 다시 incremental 실행하면 기존 출력을 그대로 유지
+    third = _convert(yolo_path, coco_path, 'none', incremental=True)
+    assert third['images'] == second['images']
+    assert len(third['annotations']) == 3
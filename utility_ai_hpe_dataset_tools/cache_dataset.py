@@ -0,0 +1,219 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+import utils
+import const
+from zoom_dataset import PAD_COLOR, read_image, target_size, letterbox_image, transform_labels
+
+IMAGE_EXTS = ('.jpg', '.jpeg', '.png', '.bmp')
+CACHE_VERSION = 2
+IMAGES_SUFFIX = '.npy'
+INDEX_SUFFIX = '.index.npz'
+
+# 워커 프로세스별로 한 번만 여는 이미지 memmap과 옵션
+_worker_images = None
+_worker_options = None
+
+
+class TrainingCache:
+    """
+    cache_dataset으로 만든 학습용 캐시 reader
+
+    이미지는 (N, H, W, 3) uint8 memmap(BGR, letterbox 적용)에서 복사 없이 바로 읽고,
+    라벨/원본 크기/파일명은 sidecar(<prefix>.index.npz)에서 읽음
+
+    캐시 생성 중 디코드에 실패한 이미지는 sidecar의 valid 마스크로 제외하므로
+    index는 유효한 이미지만 0..len-1로 가리킴 (memmap의 행 번호는 rows[index])
+
+    사용 예:
+        cache = TrainingCache('dataset_cache/train')
+        image, labels = cache[0]   # image: (H, W, 3) memmap view, labels: 줄별 float32 배열 리스트
+    """
+
+    def __init__(self, prefix):
+        self.prefix = str(prefix)
+        self.images = np.load(self.prefix + IMAGES_SUFFIX, mmap_mode='r')
+        with np.load(self.prefix + INDEX_SUFFIX) as data:
+            self._arrays = {key: data[key] for key in data.files}
+        version, num_images = self._arrays['meta'].tolist()[:2]
+        if version != CACHE_VERSION or num_images != len(self.images):
+            raise ValueError(f"캐시 버전 또는 이미지 수가 맞지 않습니다: {self.prefix}")
+        # 유효한 이미지의 memmap 행 번호
+        self.valid = self._arrays['valid']
+        self.rows = np.flatnonzero(self.valid)
+        # 원본 크기 (h, w), letterbox 변환 (ax, ay, bx, by) (유효한 이미지만), 라벨 CSR
+        self.orig_shapes = self._arrays['orig_shapes'][self.rows]
+        self.transforms = self._arrays['transforms'][self.rows]
+        self._label_values = self._arrays['label_values']
+        self._label_row_ptr = self._arrays['label_row_ptr']
+        self._label_image_ptr = self._arrays['label_image_ptr']
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, index):
+        return self.image(index), self.labels(index)
+
+    def image(self, index):
+        """index번째 이미지 (memmap view, 복사하지 않음)"""
+        return self.images[self.rows[index]]
+
+    def labels(self, index):
+        """index번째 이미지의 라벨 줄별 float32 배열 리스트 (letterbox 기준 정규화 좌표, view)"""
+        row_ptr = self._label_row_ptr
+        image_row = self.rows[index]
+        start, end = self._label_image_ptr[image_row], self._label_image_ptr[image_row + 1]
+        return [self._label_values[row_ptr[row]:row_ptr[row + 1]] for row in range(start, end)]
+
+    def file_name(self, index):
+        offsets = self._arrays['name_offsets']
+        image_row = self.rows[index]
+        return self._arrays['name_data'][offsets[image_row]:offsets[image_row + 1]].tobytes().decode('utf-8')
+
+
+def _init_worker(images_path, options):
+    global _worker_images, _worker_options
+    _worker_images = np.load(images_path, mmap_mode='r+')
+    _worker_options = options
+
+
+def _cache_image(task):
+    """
+    워커 프로세스에서 이미지 1개를 memmap의 index번째 칸에 바로 letterbox하여 기록
+
+    :return: (원본 크기 (h, w), 변환 (ax, ay, bx, by), 라벨 줄별 배열 리스트), 읽을 수 없는 이미지면 None
+    """
+    index, image_path, label_path = task
+    options = _worker_options
+    size = options['size']
+    canvas = _worker_images[index]
+    try:
+        input_image, (width, height) = read_image(image_path, [size], None, options['full_decode'], True)
+    except ValueError:
+        # 읽을 수 없는 이미지는 여백 색으로 채우고 valid 마스크에서 제외 (라벨도 기록하지 않음)
+        canvas[:] = options['pad_color']
+        return None
+
+    content_size = target_size(width, height, size, None, True)
+    _, (left, top) = letterbox_image(input_image, content_size, size, options['pad_color'], canvas)
+    transform = (content_size[0] / size[0], content_size[1] / size[1], left / size[0], top / size[1])
+
+    rows = []
+    if os.path.exists(label_path):
+        with open(label_path, 'r') as f:
+            num_rows, groups = transform_labels(f.readlines(), transform, options['kpt_shape'])
+        rows = [None] * num_rows
+        for indices, data, _ in groups:
+            for idx, row in zip(indices, data.astype(np.float32)):
+                rows[idx] = row
+    return (height, width), transform, rows
+
+
+def cache_dataset(input_dataset, split, size, output_prefix, full_decode=False, pad_color=PAD_COLOR, workers=None):
+    """
+    YOLO split의 이미지를 letterbox하여 (N, H, W, 3) uint8 memmap(<prefix>.npy)에 기록하고
+    원본 크기, 변환, 라벨을 sidecar(<prefix>.index.npz)에 저장
+
+    디코드에 실패한 이미지는 memmap 칸을 여백으로 채우고 sidecar의 valid 마스크에 False로 기록하여
+    TrainingCache가 학습 샘플로 내보내지 않게 함 (image_scanner.py 격리 목록의 이미지는 처음부터 제외)
+
+    :param size: 캐시 이미지 크기 (w, h)
+    :return: 유효한 이미지 수
+    """
+    images_folder = os.path.join(input_dataset, split, const.IMAGES_FOLDER_NAME)
+    labels_folder = os.path.join(input_dataset, split, const.LABELS_FOLDER_NAME)
+    # image_scanner.py로 격리된 이미지는 캐시에 넣지 않음
+    file_names = sorted(name for name in utils.list_images(images_folder, utils.load_quarantine(input_dataset))
+                        if name.lower().endswith(IMAGE_EXTS))
+    size = (int(size[0]), int(size[1]))
+
+    utils.directory_check(os.path.dirname(os.path.abspath(output_prefix)))
+    images_path = output_prefix + IMAGES_SUFFIX
+    tmp_images_path = images_path + '.tmp'
+    images = np.lib.format.open_memmap(tmp_images_path, mode='w+', dtype=np.uint8,
+                                       shape=(len(file_names), size[1], size[0], 3))
+    del images
+
+    options = {'size': size, 'full_decode': full_decode, 'pad_color': pad_color,
+               'kpt_shape': utils.load_kpt_shape(input_dataset)}
+    tasks = [(index, os.path.join(images_folder, name),
+              os.path.join(labels_folder, os.path.splitext(name)[0] + '.txt'))
+             for index, name in enumerate(file_names)]
+
+    orig_shapes, transforms, label_rows, rows_per_image, valid = [], [], [], [], []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(tmp_images_path, options)) as executor:
+        for result in executor.map(_cache_image, tasks, chunksize=16):
+            valid.append(result is not None)
+            orig_shape, transform, rows = result or ((0, 0), (0.0, 0.0, 0.0, 0.0), [])
+            orig_shapes.append(orig_shape)
+            transforms.append(transform)
+            label_rows.extend(rows)
+            rows_per_image.append(len(rows))
+
+    names = [name.encode('utf-8') for name in file_names]
+    name_offsets = np.zeros(len(names) + 1, dtype=np.int64)
+    np.cumsum([len(name) for name in names], out=name_offsets[1:])
+    label_row_ptr = np.zeros(len(label_rows) + 1, dtype=np.int64)
+    np.cumsum([len(row) for row in label_rows], out=label_row_ptr[1:])
+    label_image_ptr = np.zeros(len(file_names) + 1, dtype=np.int64)
+    np.cumsum(rows_per_image, out=label_image_ptr[1:])
+
+    arrays = {
+        'meta': np.array([CACHE_VERSION, len(file_names), size[0], size[1]], dtype=np.int64),
+        'valid': np.array(valid, dtype=bool),
+        'orig_shapes': np.array(orig_shapes, dtype=np.int32).reshape(-1, 2),
+        'transforms': np.array(transforms, dtype=np.float64).reshape(-1, 4),
+        'name_data': np.frombuffer(b''.join(names), dtype=np.uint8),
+        'name_offsets': name_offsets,
+        'label_values': np.concatenate(label_rows) if label_rows else np.zeros(0, dtype=np.float32),
+        'label_row_ptr': label_row_ptr,
+        'label_image_ptr': label_image_ptr,
+    }
+    index_path = output_prefix + INDEX_SUFFIX
+    with open(index_path + '.tmp', 'wb') as f:
+        np.savez(f, **arrays)
+    # 이미지 배열을 먼저 교체하고 sidecar는 마지막에 교체
+    os.replace(tmp_images_path, images_path)
+    os.replace(index_path + '.tmp', index_path)
+
+    failed = len(valid) - sum(valid)
+    if failed:
+        print(f"Warning: 읽을 수 없는 이미지 {failed}개는 캐시에서 제외 (valid=False)")
+        for name, ok in zip(file_names, valid):
+            if not ok:
+                print(f"  - {name}")
+    return len(file_names) - failed
+
+
+def main(input_dataset, output_dataset='', size=(640, 640), splits=None, full_decode=False, pad_color=PAD_COLOR,
+         workers=None):
+    if output_dataset == '':
+        output_dataset = f'{input_dataset}_cache'
+
+    if splits is None:
+        splits = [i for i in (const.TRAIN_FOLDER_NAME, const.VALID_FOLDER_NAME, const.TEST_FOLDER_NAME)
+                  if os.path.isdir(os.path.join(input_dataset, i, const.IMAGES_FOLDER_NAME))]
+
+    for i in splits:
+        output_prefix = os.path.join(output_dataset, i)
+        count = cache_dataset(input_dataset, i, size, output_prefix, full_decode, pad_color, workers)
+        print(f"{i}: {count}개 이미지 -> {output_prefix}{IMAGES_SUFFIX}, {output_prefix}{INDEX_SUFFIX}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--input', type=str, required=True, help="입력 데이터셋 폴더")
+    parser.add_argument('--output', type=str, required=False, default="", help="캐시 폴더 (default: <input>_cache)")
+    parser.add_argument('--size', type=int, required=False, default=[640, 640], nargs=2, help="캐시 이미지 크기 (w h), letterbox 적용")
+    parser.add_argument('--splits', type=str, required=False, default=None, nargs='+', help="캐시할 split (default: 있는 train/valid/test 전부)")
+    parser.add_argument('--full_decode', action='store_true', help="JPEG 축소 디코드를 사용하지 않고 원본 해상도로 디코드")
+    parser.add_argument('--pad_color', type=int, required=False, default=PAD_COLOR, help="letterbox 여백 색 (0~255)")
+    parser.add_argument('--workers', type=int, required=False, default=None, help="워커 프로세스 수 (default: CPU 수)")
+
+    args = parser.parse_args()
+    print(args)
+    main(args.input, args.output, args.size, args.splits, args.full_decode, args.pad_color, args.workers)
@@ -176,6 +176,9 @@ def main(input_dataset, angle, bound, output_dataset=''):
     if const.TEST_FOLDER_NAME in os.listdir(input_dataset):
         folder_list = [const.TEST_FOLDER_NAME, const.VALID_FOLDER_NAME, const.TRAIN_FOLDER_NAME]
     
+    # image_scanner.py로 찾은 손상/잘린 이미지는 제외
+    quarantine = utils.load_quarantine(input_dataset)
+    
     for i in folder_list:
         #makedir
         __input_images_folder = os.path.join(input_dataset,i,const.IMAGES_FOLDER_NAME)
@@ -187,7 +190,7 @@ def main(input_dataset, angle, bound, output_dataset=''):
         utils.directory_check(__output_images_folder)
         utils.directory_check(__output_labels_folder)
         
-        for j in os.listdir(__input_images_folder):
+        for j in utils.list_images(__input_images_folder, quarantine):
             __file_name,image_ext = os.path.splitext(j)
             
             __input_image_path = os.path.join(__input_images_folder, f'{__file_name}{image_ext}')
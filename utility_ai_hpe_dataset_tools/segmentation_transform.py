@@ -261,6 +261,9 @@ def process_flip_dataset(input_dataset, output_dataset='', flip_type=1):
     if const.TEST_FOLDER_NAME in os.listdir(input_dataset):
         folder_list = [const.TEST_FOLDER_NAME, const.VALID_FOLDER_NAME, const.TRAIN_FOLDER_NAME]
     
+    # image_scanner.py로 찾은 손상/잘린 이미지는 제외
+    quarantine = utils.load_quarantine(input_dataset)
+    
     for folder in folder_list:
         # 폴더 경로 설정
         input_images_folder = os.path.join(input_dataset, folder, const.IMAGES_FOLDER_NAME)
@@ -277,7 +280,7 @@ def process_flip_dataset(input_dataset, output_dataset='', flip_type=1):
             continue
             
         # 각 이미지 파일 처리
-        for image_file in os.listdir(input_images_folder):
+        for image_file in utils.list_images(input_images_folder, quarantine):
             file_name, image_ext = os.path.splitext(image_file)
             
             input_image_path = os.path.join(input_images_folder, f'{file_name}{image_ext}')
@@ -318,6 +321,9 @@ def process_rotate_dataset(input_dataset, angle, use_bound=True, output_dataset=
     if const.TEST_FOLDER_NAME in os.listdir(input_dataset):
         folder_list = [const.TEST_FOLDER_NAME, const.VALID_FOLDER_NAME, const.TRAIN_FOLDER_NAME]
     
+    # image_scanner.py로 찾은 손상/잘린 이미지는 제외
+    quarantine = utils.load_quarantine(input_dataset)
+    
     for folder in folder_list:
         # 폴더 경로 설정
         input_images_folder = os.path.join(input_dataset, folder, const.IMAGES_FOLDER_NAME)
@@ -334,7 +340,7 @@ def process_rotate_dataset(input_dataset, angle, use_bound=True, output_dataset=
             continue
             
         # 각 이미지 파일 처리
-        for image_file in os.listdir(input_images_folder):
+        for image_file in utils.list_images(input_images_folder, quarantine):
             file_name, image_ext = os.path.splitext(image_file)
             
             input_image_path = os.path.join(input_images_folder, f'{file_name}{image_ext}')
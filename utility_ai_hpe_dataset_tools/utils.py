@@ -5,6 +5,11 @@ import cv2
 import pandas as pd
 import numpy as np
 import shutil
+import sys
+
+# 저장소 루트의 공용 모듈(image_header.py, quarantine.py)을 같이 사용
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from quarantine import load_quarantine
 
 def get_kpt_shape(input):
     """
@@ -30,6 +35,38 @@ def get_kpt_shape(input):
     
     return len(yaml_data.get("flip_idx"))
 
+def load_kpt_shape(input):
+    """
+    인풋 폴더의 yaml(yml) 파일에서 keypoint shape 확인 (get_kpt_shape와 달리 없으면 None)
+
+    :return: [keypoint 갯수, 차원(2: x,y / 3: x,y,v)] 또는 None
+    """
+    input_path = os.path.realpath(input)
+    yaml_path_list = glob.glob(f"{input_path}{os.path.sep}*.yaml") + glob.glob(f"{input_path}{os.path.sep}*.yml")
+    
+    for yaml_path in yaml_path_list:
+        with open(yaml_path) as f:
+            yaml_data = yaml.safe_load(f) or {}
+        if yaml_data.get("kpt_shape"):
+            return [int(v) for v in yaml_data["kpt_shape"]]
+        if yaml_data.get("flip_idx"):
+            return [len(yaml_data["flip_idx"]), 3]
+    return None
+
+def list_images(images_folder, quarantine=None):
+    """
+    images_folder의 파일명 목록 (image_scanner.py 격리 목록에 있는 이미지는 제외)
+
+    :param quarantine: load_quarantine(데이터셋 경로)의 결과 (격리된 이미지의 절대 경로 set)
+    """
+    names = os.listdir(images_folder)
+    if not quarantine:
+        return names
+    kept = [name for name in names if os.path.abspath(os.path.join(images_folder, name)) not in quarantine]
+    if len(kept) < len(names):
+        print(f"격리된 이미지 {len(names) - len(kept)}개 제외: {images_folder}")
+    return kept
+
 def directory_check(output):
     try:
         if not os.path.exists(output):
@@ -1,42 +1,290 @@
 import cv2
 import os
-import imutils
-import shutil
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 
 import utils
 import const
 
+# 저장소 루트의 image_header.py(JPEG 헤더/EXIF orientation 파서)를 같이 사용 (utils에서 sys.path에 추가)
+from image_header import _TRANSPOSED_ORIENTATIONS, sniff_image_header
 
-def zoom_dataset(images, size = None, ratio = None):
+
+# JPEG은 DCT 단계에서 1/2, 1/4, 1/8 크기로 디코드 가능 (큰 축소 배율부터 확인)
+_REDUCED_FLAGS = ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4), (2, cv2.IMREAD_REDUCED_COLOR_2))
+_JPEG_EXTS = ('.jpg', '.jpeg')
+# letterbox 여백 색 (Ultralytics 기본값과 동일)
+PAD_COLOR = 114
+
+# 워커 프로세스별로 재사용하는 letterbox canvas {(h, w, c): 배열}
+_canvases = {}
+
+
+def target_size(width, height, size=None, ratio=None, letterbox=False):
+    """
+    원본 크기에 대한 리사이즈 결과 크기 (w, h)
+
+    :param size: 픽셀사이즈 (w,h), 너비 기준으로 비율 유지 (imutils.resize와 동일)
+    :param ratio: 비율 (x,y)
+    :param letterbox: True이면 비율을 유지하며 size 안에 들어가는 크기 (여백 제외한 이미지 영역)
+    """
+    if size is not None and letterbox:
+        scale = min(int(size[0]) / width, int(size[1]) / height)
+        return max(1, round(width * scale)), max(1, round(height * scale))
+    if size is not None:
+        zoom_width = int(size[0])
+        return zoom_width, int(height * (zoom_width / float(width)))
+    if ratio is not None:
+        return round(width * float(ratio[0])), round(height * float(ratio[1]))
+    raise Exception(f"size, ratio중 최소 하나는 있어야함")
+
+
+def _required_size(width, height, sizes=None, ratio=None, letterbox=False):
+    """sizes의 모든 결과(또는 ratio 결과)를 만들 수 있는 최소 크기 (w, h)"""
+    if sizes is None:
+        return target_size(width, height, None, ratio)
+    targets = [target_size(width, height, size, None, letterbox) for size in sizes]
+    return max(w for w, _ in targets), max(h for _, h in targets)
+
+
+def read_image(images, sizes=None, ratio=None, full_decode=False, letterbox=False):
+    """
+    리사이즈 결과 크기 이상이 되는 가장 작은 해상도로 이미지 디코드
+
+    JPEG은 헤더의 크기로 결과 크기 이상을 유지하는 가장 큰 축소 배율(1/8, 1/4, 1/2)을 골라
+    IMREAD_REDUCED_COLOR_*로 디코드하고, 그 외 포맷이나 full_decode=True이면 cv2.imread로 전체 디코드
+
+    :param sizes: 결과 크기 (w,h) 리스트 (가장 큰 결과 기준으로 디코드)
+    :return: (디코드한 이미지, 원본 크기 (w, h))
+    """
+    header = None
+    if not full_decode and images.lower().endswith(_JPEG_EXTS):
+        header = sniff_image_header(images)
+    if header is not None and header[0] == 'jpeg':
+        _, width, height, orientation = header
+        # cv2.imread는 EXIF orientation을 적용하므로 가로/세로가 바뀌는 경우 원본 크기도 바꿈
+        if orientation in _TRANSPOSED_ORIENTATIONS:
+            width, height = height, width
+        out_width, out_height = _required_size(width, height, sizes, ratio, letterbox)
+        for factor, flag in _REDUCED_FLAGS:
+            if width // factor < out_width or height // factor < out_height:
+                continue
+            reduced_image = cv2.imread(images, flag)
+            if reduced_image is None:
+                break
+            if reduced_image.shape[1] >= out_width and reduced_image.shape[0] >= out_height:
+                return reduced_image, (width, height)
+            break
+
+    input_image = cv2.imread(images)
+    if input_image is None:
+        raise ValueError(f"이미지를 읽을 수 없습니다: {images}")
+    height, width = input_image.shape[:2]
+    return input_image, (width, height)
+
+
+def _get_canvas(height, width, channels):
+    canvas = _canvases.get((height, width, channels))
+    if canvas is None:
+        canvas = _canvases[(height, width, channels)] = np.empty((height, width, channels), dtype=np.uint8)
+    return canvas
+
+
+def letterbox_image(input_image, content_size, size, pad_color=PAD_COLOR, canvas=None):
+    """
+    이미지를 content_size로 리사이즈하여 size 크기 canvas 가운데에 배치하고 나머지는 pad_color로 채움
+
+    canvas를 주지 않으면 같은 크기끼리 재사용하는 canvas를 사용하므로 반환된 이미지는 다음 호출 전에 저장해야 함
+
+    :param content_size: 여백을 제외한 이미지 영역 크기 (w, h), target_size(letterbox=True)의 결과
+    :param size: canvas 크기 (w, h)
+    :param canvas: 결과를 기록할 (h, w, c) uint8 배열 (memmap 등)
+    :return: (canvas, (left, top))
+    """
+    out_width, out_height = int(size[0]), int(size[1])
+    content_width, content_height = content_size
+    left = (out_width - content_width) // 2
+    top = (out_height - content_height) // 2
+    bottom, right = top + content_height, left + content_width
+
+    if canvas is None:
+        canvas = _get_canvas(out_height, out_width, input_image.shape[2] if input_image.ndim == 3 else 1)
+    # 이미지 영역 밖의 여백만 채움
+    canvas[:top] = pad_color
+    canvas[bottom:] = pad_color
+    canvas[top:bottom, :left] = pad_color
+    canvas[top:bottom, right:] = pad_color
+    if input_image.shape[1] == content_width and input_image.shape[0] == content_height:
+        resized_image = input_image
+    else:
+        resized_image = cv2.resize(input_image, dsize=(content_width, content_height), interpolation=cv2.INTER_AREA)
+    canvas[top:bottom, left:right] = resized_image.reshape(content_height, content_width, -1)
+    return canvas, (left, top)
+
+
+def transform_labels(lines, transform, kpt_shape=None):
+    """
+    YOLO 정규화 좌표 라벨에 x' = x * ax + bx, y' = y * ay + by 적용
+
+    필드 수가 같은 줄끼리 묶어 NumPy 배열로 한 번에 변환
+    - 5개: cls cx cy w h (w, h는 배율만 적용)
+    - 5 + keypoint 수 * 차원: bbox + keypoints (보이지 않는 keypoint(v=0, 2차원이면 0,0)는 그대로 둠)
+    - 그 외: cls x1 y1 x2 y2 ... (polygon)
+
+    :param lines: 라벨 파일의 줄 리스트
+    :param transform: (ax, ay, bx, by)
+    :param kpt_shape: [keypoint 수, 차원] 또는 None
+    :return: (줄 수, [(줄 번호 리스트, 변환된 배열 (줄 수, 필드 수), 필드별 출력 포맷)])
+    """
+    ax, ay, bx, by = transform
+    rows = [line.split() for line in lines if line.strip()]
+    groups = {}
+    for idx, row in enumerate(rows):
+        groups.setdefault(len(row), []).append(idx)
+
+    result = []
+    for length, indices in groups.items():
+        data = np.array([rows[idx] for idx in indices], dtype=np.float64)
+        fmt = ['%d'] + ['%.6f'] * (length - 1)
+        if length == 5 or (kpt_shape is not None and length == 5 + kpt_shape[0] * kpt_shape[1]):
+            data[:, 1] = data[:, 1] * ax + bx
+            data[:, 2] = data[:, 2] * ay + by
+            data[:, 3] *= ax
+            data[:, 4] *= ay
+            if length > 5:
+                dims = kpt_shape[1]
+                kpt_x = data[:, 5::dims]
+                kpt_y = data[:, 6::dims]
+                visible = data[:, 7::dims] > 0 if dims == 3 else (kpt_x != 0) | (kpt_y != 0)
+                data[:, 5::dims] = np.where(visible, kpt_x * ax + bx, kpt_x)
+                data[:, 6::dims] = np.where(visible, kpt_y * ay + by, kpt_y)
+                if dims == 3:
+                    fmt[7::3] = ['%d'] * kpt_shape[0]
+        else:
+            data[:, 1::2] = data[:, 1::2] * ax + bx
+            data[:, 2::2] = data[:, 2::2] * ay + by
+        result.append((indices, data, fmt))
+    return len(rows), result
+
+
+def adjust_labels(lines, transform, kpt_shape=None):
+    """
+    라벨 줄에 transform_labels를 적용한 텍스트 줄 반환
+
+    :return: 변환된 줄 리스트 (원래 순서)
+    """
+    num_rows, groups = transform_labels(lines, transform, kpt_shape)
+    result = [None] * num_rows
+    for indices, data, fmt in groups:
+        for idx, row in zip(indices, data):
+            result[idx] = ' '.join(f % v for f, v in zip(fmt, row))
+    return result
+
+
+def _resize_to(source, width, height, size=None, ratio=None, letterbox=False, pad_color=PAD_COLOR):
+    """
+    원본 크기 (width, height) 기준 결과 크기로 source 이미지를 리사이즈
+
+    :return: (결과 이미지, 여백을 제외한 이미지 영역, 라벨 좌표 변환 (ax, ay, bx, by))
+    """
+    out_width, out_height = target_size(width, height, size, ratio, letterbox)
+
+    if letterbox:
+        output_image, (left, top) = letterbox_image(source, (out_width, out_height), size, pad_color)
+        canvas_width, canvas_height = int(size[0]), int(size[1])
+        content = output_image[top:top + out_height, left:left + out_width]
+        return output_image, content, (out_width / canvas_width, out_height / canvas_height,
+                                       left / canvas_width, top / canvas_height)
+    if source.shape[1] == out_width and source.shape[0] == out_height:
+        output_image = source
+    else:
+        output_image = cv2.resize(source, dsize=(out_width, out_height), interpolation=cv2.INTER_AREA)
+    return output_image, output_image, (1.0, 1.0, 0.0, 0.0)
+
+
+def zoom_dataset(images, size = None, ratio = None, full_decode = False, letterbox = False, pad_color = PAD_COLOR):
     """
     zoom dataset
 
     :param images: 이미지 경로
     :param size: 픽셀사이즈 로 리사이징 (h,w)
     :param ratio: 비율로 리사이징 (h,w)
+    :param full_decode: True이면 JPEG도 원본 해상도로 디코드 (축소 디코드 사용 안 함)
+    :param letterbox: True이면 비율을 유지하며 size 크기 canvas에 맞추고 여백은 pad_color로 채움
+    :return: (결과 이미지, 라벨 좌표 변환 (ax, ay, bx, by))
     """
-    input_image = cv2.imread(images)
-    height, width = input_image.shape[:2]
+    input_image, (width, height) = read_image(images, [size] if size is not None else None, ratio, full_decode, letterbox)
+    output_image, _, transform = _resize_to(input_image, width, height, size, ratio, letterbox, pad_color)
+    return output_image, transform
 
-    if size is not None:
-        zoom_width = int(size[0])
-        zoom_height = int(size[1])
-        
-        if height == zoom_height and width == zoom_width:
-            output_image = input_image
+
+def zoom_pyramid(images, sizes, full_decode = False, letterbox = False, pad_color = PAD_COLOR):
+    """
+    이미지를 한 번만 디코드하여 여러 size 결과 생성
+
+    가장 큰 결과부터 INTER_AREA로 줄이면서 바로 앞 결과(letterbox면 여백을 제외한 이미지 영역)를 다음 결과의 입력으로 사용
+
+    :param sizes: 픽셀사이즈 (w,h) 리스트 (크기가 서로 달라야 함, letterbox canvas를 크기별로 재사용)
+    :return: [(결과 이미지, 라벨 좌표 변환)] (sizes 순서)
+    """
+    input_image, (width, height) = read_image(images, sizes, None, full_decode, letterbox)
+    order = sorted(range(len(sizes)), key=lambda k: target_size(width, height, sizes[k], None, letterbox), reverse=True)
+
+    results = [None] * len(sizes)
+    source = input_image
+    for k in order:
+        out_width, out_height = target_size(width, height, sizes[k], None, letterbox)
+        # 가로/세로 비율이 다른 size가 섞여 앞 결과가 더 작으면 디코드한 이미지에서 다시 줄임
+        if source.shape[1] < out_width or source.shape[0] < out_height:
+            source = input_image
+        output_image, source, transform = _resize_to(source, width, height, sizes[k], None, letterbox, pad_color)
+        results[k] = (output_image, transform)
+    return results
+
+def _zoom_file(task):
+    """
+    워커 프로세스에서 이미지 1개를 size별로 리사이즈 후 저장
+
+    라벨은 한 번만 읽어 letterbox면 size별로 좌표 변환, 아니면 그대로 각 출력에 기록
+    """
+    input_image_path, input_label_path, outputs, options = task
+    try:
+        if options['sizes'] is None:
+            results = [zoom_dataset(input_image_path, None, options['ratio'], options['full_decode'])]
         else:
-            output_image = imutils.resize(input_image, width=zoom_width, height=zoom_height)
-    elif ratio is not None:
-        x_ratio = float(ratio[0])
-        y_ratio = float(ratio[1])
-        
-        output_image = cv2.resize(input_image, dsize=(0, 0), fx=x_ratio, fy=y_ratio, interpolation=cv2.INTER_AREA)
-    else:
-        raise Exception(f"size, ratio중 최소 하나는 있어야함")
-    
-    return output_image
+            results = zoom_pyramid(input_image_path, options['sizes'], options['full_decode'], options['letterbox'],
+                                   options['pad_color'])
+    except ValueError as e:
+        # 격리 목록에 없는 손상 이미지도 전체 작업을 멈추지 않고 건너뜀 (출력은 아직 기록 전)
+        print(f"Warning: {e}")
+        return
+
+    lines = None
+    if os.path.exists(input_label_path):
+        with open(input_label_path, 'r') as f:
+            lines = f.readlines()
+
+    for (img_data, transform), (output_image_path, output_label_path) in zip(results, outputs):
+        utils.save_images(output_image_path, img_data)
+        if lines is None:
+            continue
+        with open(output_label_path, 'w') as f:
+            if options['letterbox']:
+                f.writelines(line + '\n' for line in adjust_labels(lines, transform, options['kpt_shape']))
+            else:
+                f.writelines(lines)
+
+def size_label(size):
+    """size별 출력 폴더 접미사 (정사각형이면 640, 아니면 640x480)"""
+    return str(size[0]) if size[0] == size[1] else f'{size[0]}x{size[1]}'
 
-def main(input_dataset, output_dataset='', size = None, ratio = None):
+def parse_size(value):
+    """'640' 또는 '640x480' 형식의 크기를 (w, h)로 변환"""
+    width, _, height = value.lower().partition('x')
+    return int(width), int(height or width)
+
+def main(input_dataset, output_dataset='', size = None, ratio = None, full_decode = False, letterbox = False,
+         pad_color = PAD_COLOR, workers = None, sizes = None):
     _SUFFIX = "zoom"
     TEXT_EXT = ".txt"
     
@@ -48,37 +296,65 @@ def main(input_dataset, output_dataset='', size = None, ratio = None):
     if const.TEST_FOLDER_NAME in os.listdir(input_dataset):
         folder_list = [const.TEST_FOLDER_NAME, const.VALID_FOLDER_NAME, const.TRAIN_FOLDER_NAME]
     
+    # sizes가 있으면 size별로 <output>_<size> 폴더에 출력
+    if sizes:
+        sizes = list(dict.fromkeys(tuple(s) for s in sizes))
+        output_datasets = [f'{output_dataset}_{size_label(s)}' for s in sizes]
+    else:
+        sizes = [size] if size is not None else None
+        output_datasets = [output_dataset]
+    
+    options = {
+        'sizes': sizes, 'ratio': ratio, 'full_decode': full_decode, 'letterbox': letterbox, 'pad_color': pad_color,
+        # bbox + keypoint 라벨과 polygon 라벨 구분용
+        'kpt_shape': utils.load_kpt_shape(input_dataset) if letterbox else None,
+    }
+    tasks = []
+    # image_scanner.py로 찾은 손상/잘린 이미지는 작업 목록에서 제외
+    quarantine = utils.load_quarantine(input_dataset)
+    
     for i in folder_list:
         #makedir
         __input_images_folder = os.path.join(input_dataset,i,const.IMAGES_FOLDER_NAME)
         __input_labels_folder = os.path.join(input_dataset,i,const.LABELS_FOLDER_NAME)
         
-        __output_images_folder = os.path.join(output_dataset,i,const.IMAGES_FOLDER_NAME)
-        __output_labels_folder = os.path.join(output_dataset,i,const.LABELS_FOLDER_NAME)
-        
-        utils.directory_check(__output_images_folder)
-        utils.directory_check(__output_labels_folder)
+        __output_folders = []
+        for __output_dataset in output_datasets:
+            __output_images_folder = os.path.join(__output_dataset,i,const.IMAGES_FOLDER_NAME)
+            __output_labels_folder = os.path.join(__output_dataset,i,const.LABELS_FOLDER_NAME)
+            
+            utils.directory_check(__output_images_folder)
+            utils.directory_check(__output_labels_folder)
+            __output_folders.append((__output_images_folder, __output_labels_folder))
         
-        for j in os.listdir(__input_images_folder):
+        for j in utils.list_images(__input_images_folder, quarantine):
             __file_name,image_ext = os.path.splitext(j)
             
             __input_image_path = os.path.join(__input_images_folder, f'{__file_name}{image_ext}')
             __input_label_path = os.path.join(__input_labels_folder, f'{__file_name}{TEXT_EXT}')
             
-            __output_image_path = os.path.join(__output_images_folder, f'{__file_name}_{_SUFFIX}{image_ext}')
-            __output_label_path = os.path.join(__output_labels_folder, f'{__file_name}_{_SUFFIX}{TEXT_EXT}')
-            
-            img_data = zoom_dataset(__input_image_path, size, ratio)
-            
-            utils.save_images(__output_image_path, img_data)
-            shutil.copyfile(__input_label_path, __output_label_path)
+            __outputs = [
+                (os.path.join(__output_images_folder, f'{__file_name}_{_SUFFIX}{image_ext}'),
+                 os.path.join(__output_labels_folder, f'{__file_name}_{_SUFFIX}{TEXT_EXT}'))
+                for __output_images_folder, __output_labels_folder in __output_folders
+            ]
             
-    utils.copy_yaml(input_dataset, output_dataset)
+            tasks.append((__input_image_path, __input_label_path, __outputs, options))
+    
+    # 이미지 디코드/리사이즈/인코딩을 프로세스 풀에서 병렬 처리 (letterbox canvas는 워커별로 재사용)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for _ in executor.map(_zoom_file, tasks, chunksize=16):
+            pass
+    
+    for __output_dataset in output_datasets:
+        utils.copy_yaml(input_dataset, __output_dataset)
     
 
 def valitate_parser(args):
-    if args.size == None and args.ratio == None:
-        raise Exception("size, ratio 중 하나는 값이 있어야합니다")
+    if args.size == None and args.ratio == None and args.sizes == None:
+        raise Exception("size, ratio, sizes 중 하나는 값이 있어야합니다")
+    if args.letterbox and args.size == None and args.sizes == None:
+        raise Exception("letterbox는 size 또는 sizes 값이 있어야합니다")
 
 if __name__ == "__main__":
     import argparse
@@ -88,10 +364,16 @@ if __name__ == "__main__":
     parser.add_argument('--output', type=str, required=False, default="", help="결과 데이터셋 폴더")
     parser.add_argument('--size', type=int, required=False, default=None, nargs=2, help="고정사이즈로 리사이징")
     parser.add_argument('--ratio', type=float, required=False, default=None, nargs=2, help="비율로 리사이징")
+    parser.add_argument('--sizes', type=parse_size, required=False, default=None, nargs='+', help="여러 크기로 한 번에 리사이징 (640 또는 640x480), 크기별로 <output>_<size> 폴더에 출력")
+    parser.add_argument('--full_decode', action='store_true', help="JPEG 축소 디코드를 사용하지 않고 원본 해상도로 디코드")
+    parser.add_argument('--letterbox', action='store_true', help="비율을 유지하며 size 크기에 맞추고 남는 부분은 여백으로 채움 (라벨 좌표도 변환)")
+    parser.add_argument('--pad_color', type=int, required=False, default=PAD_COLOR, help="letterbox 여백 색 (0~255)")
+    parser.add_argument('--workers', type=int, required=False, default=None, help="워커 프로세스 수 (default: CPU 수)")
     
     args = parser.parse_args()
     
     #데이터 검증
     valitate_parser(args)
     print(args)
-    main(args.input, args.output, args.size, args.ratio)
\ No newline at end of file
+    main(args.input, args.output, args.size, args.ratio, args.full_decode, args.letterbox, args.pad_color, args.workers,
+         args.sizes)
@@ -29,7 +29,8 @@ from utils import (
     get_dataset_structure,
     create_output_directories,
     copy_yaml_file,
-    get_corresponding_files
+    get_corresponding_files,
+    load_quarantine
 )
 
 def rotate_dataset_split(input_path: str, output_path: str, split: str,
@@ -53,8 +54,8 @@ def rotate_dataset_split(input_path: str, output_path: str, split: str,
     output_images_dir = os.path.join(output_path, split, 'images')
     output_labels_dir = os.path.join(output_path, split, 'labels')
     
-    # Get corresponding image and label files
-    file_pairs = get_corresponding_files(images_dir, labels_dir)
+    # Get corresponding image and label files (skipping images quarantined by image_scanner.py)
+    file_pairs = get_corresponding_files(images_dir, labels_dir, load_quarantine(input_path))
     
     if not file_pairs:
         print(f"No matching image-label pairs found in {split} split")
@@ -23,7 +23,8 @@ from .image_utils import (
     get_dataset_structure,
     create_output_directories,
     copy_yaml_file,
-    get_corresponding_files
+    get_corresponding_files,
+    load_quarantine
 )
 
 __all__ = [
@@ -45,5 +46,6 @@ __all__ = [
     'get_dataset_structure',
     'create_output_directories',
     'copy_yaml_file',
-    'get_corresponding_files'
+    'get_corresponding_files',
+    'load_quarantine'
 ]
\ No newline at end of file
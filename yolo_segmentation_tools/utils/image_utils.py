@@ -1,10 +1,15 @@
 import cv2
 import os
+import sys
 import shutil
 import numpy as np
-from typing import List, Tuple, Optional
+from typing import List, Tuple, Optional, Set
 from pathlib import Path
 
+# Quarantine list written by image_scanner.py at the dataset root (shared reader in the repo root quarantine.py)
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from quarantine import QUARANTINE_NAME, load_quarantine
+
 def load_image(image_path: str) -> Optional[np.ndarray]:
     """
     Load image from file
@@ -200,13 +205,15 @@ def copy_yaml_file(input_path: str, output_path: str):
             except Exception as e:
                 print(f"Warning: Failed to copy {yaml_file}: {e}")
 
-def get_corresponding_files(images_dir: str, labels_dir: str) -> List[Tuple[str, str]]:
+def get_corresponding_files(images_dir: str, labels_dir: str,
+                            quarantine: Optional[Set[str]] = None) -> List[Tuple[str, str]]:
     """
     Get corresponding image and label file pairs
     
     Args:
         images_dir: Directory containing images
         labels_dir: Directory containing labels
+        quarantine: Absolute image paths to skip (see load_quarantine)
         
     Returns:
         List of (image_path, label_path) tuples
@@ -227,6 +234,10 @@ def get_corresponding_files(images_dir: str, labels_dir: str) -> List[Tuple[str,
         image_path = os.path.join(images_dir, image_file)
         label_path = os.path.join(labels_dir, label_file)
         
+        if quarantine and os.path.abspath(image_path) in quarantine:
+            print(f"Skipping quarantined image: {image_file}")
+            continue
+        
         # Only include if both files exist
         if os.path.exists(label_path):
             file_pairs.append((image_path, label_path))
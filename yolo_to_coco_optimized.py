@@ -1,31 +1,34 @@
 import os
-import json
 import shutil
-import pickle
+import sqlite3
 import argparse
 import yaml
-from PIL import Image
+import numpy as np
 from tqdm import tqdm
 from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from collections import deque
+from contextlib import ExitStack
 from functools import partial
 import time
 
+from coco_stream import CocoStreamWriter, iter_coco_items
+from image_header import read_image_size
+from quarantine import QUARANTINE_NAME, load_quarantine
+
 def get_image_info_cached(image_path, cache_dict=None):
-    """캐시된 이미지 정보를 반환하거나 새로 읽어서 캐시에 저장"""
+    """캐시된 이미지 정보를 반환하거나 헤더만 읽어서 캐시에 저장 (EXIF orientation 적용 크기)"""
     if cache_dict is not None and image_path in cache_dict:
         return cache_dict[image_path]
     
-    try:
-        with Image.open(image_path) as img:
-            width, height = img.width, img.height
-        
-        if cache_dict is not None:
-            cache_dict[image_path] = (width, height)
-        
-        return width, height
-    except Exception as e:
-        print(f"이미지 파일을 여는 데 실패했습니다: {image_path}. 오류: {e}")
+    image_info = read_image_size(image_path)
+    if image_info is None:
+        print(f"이미지 파일을 여는 데 실패했습니다: {image_path}")
         return None
+    
+    if cache_dict is not None:
+        cache_dict[image_path] = image_info
+    
+    return image_info
 
 def yolo_to_coco_bbox(yolo_bbox, img_width, img_height):
     """YOLO 형식의 바운딩 박스를 COCO 형식으로 변환"""
@@ -40,14 +43,180 @@ def yolo_to_coco_bbox(yolo_bbox, img_width, img_height):
     
     return [x_top_left, y_top_left, w, h]
 
+def _ranges(lengths):
+    """[3, 2] -> [0, 1, 2, 0, 1] 형태로 각 길이만큼의 0부터 시작하는 인덱스를 이어붙임"""
+    total = int(lengths.sum())
+    offsets = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return np.arange(total) - offsets
+
+def polygons_to_coco(coords, point_counts, img_width, img_height):
+    """
+    정규화된 polygon 좌표들을 한 번에 절대 좌표로 변환하고 bbox, 면적 계산
+    
+    :param coords: 모든 polygon의 점을 이어붙인 (N, 2) 배열
+    :param point_counts: polygon별 점 개수 배열
+    :return: (polygon별 절대 좌표 flat 배열 리스트, (P, 4) COCO bbox 배열, (P,) 면적 배열)
+    """
+    points = coords * np.array([img_width, img_height], dtype=np.float64)
+    starts = np.concatenate(([0], np.cumsum(point_counts)[:-1]))
+    
+    x, y = points[:, 0], points[:, 1]
+    x_min = np.minimum.reduceat(x, starts)
+    y_min = np.minimum.reduceat(y, starts)
+    x_max = np.maximum.reduceat(x, starts)
+    y_max = np.maximum.reduceat(y, starts)
+    bboxes = np.stack([x_min, y_min, x_max - x_min, y_max - y_min], axis=1)
+    
+    # shoelace: 각 점의 다음 점 (polygon의 마지막 점은 같은 polygon의 첫 점과 연결)
+    next_index = np.arange(1, len(points) + 1)
+    next_index[np.cumsum(point_counts) - 1] = starts
+    cross = x * y[next_index] - x[next_index] * y
+    areas = 0.5 * np.abs(np.add.reduceat(cross, starts))
+    
+    segmentations = np.split(points.ravel(), np.cumsum(point_counts)[:-1] * 2)
+    return segmentations, bboxes, areas
+
+def keypoints_to_coco(keypoints, img_width, img_height):
+    """
+    정규화된 keypoint 블록을 한 번에 COCO keypoints로 변환
+    
+    :param keypoints: (L, K, D) 배열, D=3이면 (x, y, v), D=2이면 (x, y)
+    :return: (길이 K*3인 COCO keypoints 리스트 L개 (v는 int), (L,) int num_keypoints 배열)
+    """
+    xy = keypoints[:, :, :2] * np.array([img_width, img_height], dtype=np.float64)
+    if keypoints.shape[2] >= 3:
+        visibility = np.rint(keypoints[:, :, 2])
+    else:
+        # visibility가 없으면 (0, 0)이 아닌 점을 보이는 점으로 간주
+        visibility = np.where(np.any(keypoints[:, :, :2] != 0, axis=2), 2.0, 0.0)
+    # COCO 규칙: 라벨링되지 않은 점(v=0)의 좌표는 0
+    xy[visibility == 0] = 0.0
+    coco_keypoints = np.concatenate([xy, visibility[:, :, None]], axis=2).reshape(len(keypoints), -1).tolist()
+    # COCO의 visibility는 정수 (0, 1, 2)
+    for kpts, v in zip(coco_keypoints, visibility.astype(np.int64).tolist()):
+        kpts[2::3] = v
+    return coco_keypoints, np.count_nonzero(visibility > 0, axis=1).astype(np.int64)
+
+def parse_yolo_label_file(label_path, img_width, img_height, image_id, task='auto', kpt_shape=None):
+    """
+    YOLO 레이블 파일 전체를 한 번에 COCO annotation 리스트로 변환
+    
+    :param task: 'detect'(5개 필드 bbox만), 'segment'(polygon만), 'pose'(bbox + keypoint만),
+                 'auto'(필드 수로 판별, kpt_shape가 있으면 keypoint 라인 우선)
+    :param kpt_shape: (keypoint 수, 차원 2 또는 3), pose 라인 판별에 사용
+    :return: 파일 내 순서대로 정렬된 annotation 리스트 (id는 None, 부모 프로세스에서 할당)
+    """
+    with open(label_path, 'r') as f:
+        lines = [line.split() for line in f.read().splitlines()]
+    lines = [parts for parts in lines if parts]
+    if not lines:
+        return []
+    
+    counts = np.array([len(parts) for parts in lines])
+    values = np.array([value for parts in lines for value in parts], dtype=np.float64)
+    line_starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    
+    is_bbox = counts == 5
+    # class_id + 3개 이상의 (x, y) 점
+    is_polygon = (counts >= 7) & (counts % 2 == 1)
+    # class_id + bbox + keypoint 블록
+    is_pose = np.zeros(len(lines), dtype=bool)
+    if kpt_shape is not None:
+        pose_count = 5 + kpt_shape[0] * kpt_shape[1]
+        is_pose = counts == pose_count
+        is_polygon &= ~is_pose
+    if task == 'detect':
+        is_polygon[:] = False
+        is_pose[:] = False
+    elif task == 'segment':
+        is_bbox[:] = False
+        is_pose[:] = False
+    elif task == 'pose':
+        is_bbox[:] = False
+        is_polygon[:] = False
+    
+    class_ids = values[line_starts].astype(np.int64)
+    annotations = [None] * len(lines)
+    
+    # 바운딩 박스 라인
+    bbox_lines = np.flatnonzero(is_bbox)
+    if bbox_lines.size:
+        boxes = values[line_starts[bbox_lines][:, None] + np.arange(1, 5)]
+        widths = boxes[:, 2] * img_width
+        heights = boxes[:, 3] * img_height
+        x_top_left = boxes[:, 0] * img_width - (widths / 2)
+        y_top_left = boxes[:, 1] * img_height - (heights / 2)
+        bboxes = np.stack([x_top_left, y_top_left, widths, heights], axis=1).tolist()
+        for line_index, bbox in zip(bbox_lines.tolist(), bboxes):
+            annotations[line_index] = {
+                "id": None,
+                "image_id": image_id,
+                "category_id": int(class_ids[line_index]) + 1,
+                "bbox": bbox,
+                "area": bbox[2] * bbox[3],
+                "iscrowd": 0,
+                "segmentation": [],
+                "attributes": {"occluded": False, "rotation": 0.0}
+            }
+    
+    # polygon 라인: 모든 좌표를 한 배열로 모아 한 번에 변환
+    polygon_lines = np.flatnonzero(is_polygon)
+    if polygon_lines.size:
+        point_counts = (counts[polygon_lines] - 1) // 2
+        coord_mask = np.zeros(len(values), dtype=bool)
+        coord_mask[np.repeat(line_starts[polygon_lines] + 1, point_counts * 2)
+                   + _ranges(point_counts * 2)] = True
+        coords = values[coord_mask].reshape(-1, 2)
+        segmentations, bboxes, areas = polygons_to_coco(coords, point_counts, img_width, img_height)
+        for line_index, segmentation, bbox, area in zip(polygon_lines.tolist(), segmentations,
+                                                        bboxes.tolist(), areas.tolist()):
+            annotations[line_index] = {
+                "id": None,
+                "image_id": image_id,
+                "category_id": int(class_ids[line_index]) + 1,
+                "bbox": bbox,
+                "area": area,
+                "iscrowd": 0,
+                # NumPy 배열 그대로 전달 (pickle 크기가 작고 fast_json이 바로 직렬화)
+                "segmentation": [segmentation],
+                "attributes": {"occluded": False, "rotation": 0.0}
+            }
+    
+    # keypoint 라인: 파일 내 모든 keypoint 블록을 한 번에 변환
+    pose_lines = np.flatnonzero(is_pose)
+    if pose_lines.size:
+        rows = values[line_starts[pose_lines][:, None] + np.arange(pose_count)]
+        widths = rows[:, 3] * img_width
+        heights = rows[:, 4] * img_height
+        x_top_left = rows[:, 1] * img_width - (widths / 2)
+        y_top_left = rows[:, 2] * img_height - (heights / 2)
+        bboxes = np.stack([x_top_left, y_top_left, widths, heights], axis=1).tolist()
+        keypoints, num_keypoints = keypoints_to_coco(rows[:, 5:].reshape(len(rows), *kpt_shape), img_width, img_height)
+        for line_index, bbox, kpts, num_kpts in zip(pose_lines.tolist(), bboxes, keypoints,
+                                                    num_keypoints.tolist()):
+            annotations[line_index] = {
+                "id": None,
+                "image_id": image_id,
+                "category_id": int(class_ids[line_index]) + 1,
+                "bbox": bbox,
+                "area": bbox[2] * bbox[3],
+                "iscrowd": 0,
+                "segmentation": [],
+                "keypoints": kpts,
+                "num_keypoints": num_kpts,
+                "attributes": {"occluded": False, "rotation": 0.0}
+            }
+    
+    return [ann for ann in annotations if ann is not None]
+
 def process_single_image(args):
     """단일 이미지와 레이블을 처리하는 함수 (멀티프로세싱용)"""
-    image_filename, images_path, labels_path, image_id, annotation_id_start = args
+    image_filename, images_path, labels_path, image_id, cached_info, task, kpt_shape = args
     
     image_path = os.path.join(images_path, image_filename)
     
-    # 이미지 정보 가져오기
-    image_info = get_image_info_cached(image_path)
+    # 이미지 정보 가져오기 (부모 프로세스에서 캐시 히트한 경우 파일을 열지 않음)
+    image_info = cached_info if cached_info is not None else get_image_info_cached(image_path)
     if image_info is None:
         return None
     
@@ -65,34 +234,15 @@ def process_single_image(args):
         "date_captured": 0
     }
     
-    # 레이블 파일 처리
+    # 레이블 파일 처리 (annotation ID는 부모 프로세스에서 결과 순서대로 할당)
     label_filename = os.path.splitext(image_filename)[0] + '.txt'
     label_path = os.path.join(labels_path, label_filename)
     
     annotations = []
-    annotation_id_counter = annotation_id_start
     
     if os.path.exists(label_path):
         try:
-            with open(label_path, 'r') as f:
-                for line in f.readlines():
-                    parts = line.strip().split()
-                    if len(parts) == 5:
-                        class_id, x_center, y_center, w, h = map(float, parts)
-                        
-                        coco_bbox = yolo_to_coco_bbox([x_center, y_center, w, h], img_width, img_height)
-                        
-                        annotations.append({
-                            "id": annotation_id_counter,
-                            "image_id": image_id,
-                            "category_id": int(class_id) + 1,
-                            "bbox": coco_bbox,
-                            "area": coco_bbox[2] * coco_bbox[3],
-                            "iscrowd": 0,
-                            "segmentation": [],
-                            "attributes": {"occluded": False, "rotation": 0.0}
-                        })
-                        annotation_id_counter += 1
+            annotations = parse_yolo_label_file(label_path, img_width, img_height, image_id, task, kpt_shape)
         except Exception as e:
             print(f"레이블 파일 읽기 실패: {label_path}. 오류: {e}")
     
@@ -102,12 +252,40 @@ def process_single_image(args):
         "num_annotations": len(annotations)
     }
 
-def copy_images_parallel(image_files, src_path, dst_path, max_workers=None):
-    """이미지 파일들을 병렬로 복사"""
+IMAGE_MODES = ('auto', 'copy', 'hardlink', 'symlink', 'none')
+
+def resolve_image_mode(image_mode, src_path, dst_path):
+    """'auto'이면 원본과 출력이 같은 파일시스템일 때 'hardlink', 아니면 'copy'"""
+    if image_mode != 'auto':
+        return image_mode
+    os.makedirs(dst_path, exist_ok=True)
+    return 'hardlink' if os.stat(src_path).st_dev == os.stat(dst_path).st_dev else 'copy'
+
+def place_image_file(src_file, dst_file, image_mode='copy'):
+    """
+    이미지 파일을 출력 위치에 복사/hardlink/symlink (기존 파일은 교체)
+    
+    hardlink가 불가능하면(다른 파일시스템 등) 복사
+    """
+    if os.path.lexists(dst_file):
+        os.remove(dst_file)
+    if image_mode == 'hardlink':
+        try:
+            os.link(src_file, dst_file)
+            return
+        except OSError:
+            pass
+    elif image_mode == 'symlink':
+        os.symlink(os.path.relpath(src_file, os.path.dirname(dst_file)), dst_file)
+        return
+    shutil.copy2(src_file, dst_file)
+
+def copy_images_parallel(image_files, src_path, dst_path, max_workers=None, image_mode='copy'):
+    """이미지 파일들을 병렬로 복사 (image_mode: 'copy', 'hardlink', 'symlink')"""
     def copy_single_image(image_filename):
         src_file = os.path.join(src_path, image_filename)
         dst_file = os.path.join(dst_path, image_filename)
-        shutil.copy2(src_file, dst_file)
+        place_image_file(src_file, dst_file, image_mode)
         return image_filename
     
     if max_workers is None:
@@ -117,48 +295,387 @@ def copy_images_parallel(image_files, src_path, dst_path, max_workers=None):
         list(tqdm(
             executor.map(copy_single_image, image_files),
             total=len(image_files),
-            desc="Copying images"
+            desc=f"Placing images ({image_mode})"
         ))
 
-def load_or_create_cache(cache_file):
-    """캐시 파일을 로드하거나 새로 생성"""
-    if os.path.exists(cache_file):
-        try:
-            with open(cache_file, 'rb') as f:
-                return pickle.load(f)
-        except:
-            print(f"캐시 파일 로드 실패: {cache_file}. 새로 생성합니다.")
-    return {}
-
-def save_cache(cache_dict, cache_file):
-    """캐시를 파일로 저장"""
+def imap_ordered(executor, fn, iterable, window):
+    """
+    executor.map과 같이 입력 순서대로 결과를 반환하되,
+    동시에 대기 중인 작업을 window개로 제한하여 메모리 사용량을 일정하게 유지
+    """
+    pending = deque()
+    for item in iterable:
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+class ImageMetaCache:
+    """
+    SQLite 기반 이미지 메타데이터(width, height) 캐시
+
+    (경로, 파일 크기, 수정시각)이 일치하는 항목만 히트로 취급하며,
+    새 항목은 batch_size개씩 모아서 기록함. 부모 프로세스에서만 사용.
+    """
+    
+    # 크기 계산 방식이 바뀌면 올려서 기존 캐시를 무효화 (2: EXIF orientation 적용)
+    SCHEMA_VERSION = 2
+    
+    def __init__(self, db_path, batch_size=1000):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self._pending = []
+        self._conn = sqlite3.connect(db_path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] != self.SCHEMA_VERSION:
+            self._conn.execute("DROP TABLE IF EXISTS image_meta")
+            self._conn.execute(f"PRAGMA user_version={self.SCHEMA_VERSION}")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS image_meta ("
+            "path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, "
+            "width INTEGER NOT NULL, height INTEGER NOT NULL)"
+        )
+        self._conn.commit()
+    
+    def load_dir(self, directory):
+        """directory 바로 아래 파일들의 캐시 항목을 {path: (size, mtime_ns, width, height)}로 반환"""
+        prefix = os.path.join(os.path.abspath(directory), '')
+        rows = self._conn.execute(
+            "SELECT path, size, mtime_ns, width, height FROM image_meta WHERE path >= ? AND path < ?",
+            (prefix, prefix + '\U0010ffff')
+        )
+        return {path: (size, mtime_ns, width, height) for path, size, mtime_ns, width, height in rows}
+    
+    def put(self, path, size, mtime_ns, width, height):
+        """새 항목 추가 (batch_size개가 모이면 기록)"""
+        self._pending.append((os.path.abspath(path), size, mtime_ns, width, height))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+    
+    def flush(self):
+        """대기 중인 항목 기록"""
+        if not self._pending:
+            return
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO image_meta (path, size, mtime_ns, width, height) VALUES (?, ?, ?, ?, ?)",
+                self._pending
+            )
+        self._pending = []
+    
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+class ConversionState:
+    """
+    SQLite 기반 변환 상태 저장소 (split별 file_name → image_id 매핑과 ID high-water mark)
+
+    재실행해도 같은 파일은 같은 image_id를 받고, 새 파일은 이전 최대값 다음 ID를 받음.
+    이미지/라벨 파일의 (크기, 수정시각)을 함께 저장하여 --incremental에서 변경 여부를 판단함.
+    출력 JSON의 file_name 접두사(image_mode에 따라 다름)도 저장하여 바뀌면 전체를 다시 변환함.
+    """
+    
+    SCHEMA_VERSION = 2
+    
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version == 1:
+            # v1 상태는 ID 매핑을 유지하고 접두사는 알 수 없음(NULL)으로 두어 다음 incremental을 전체 변환으로 처리
+            self._conn.execute("ALTER TABLE counters ADD COLUMN file_name_prefix TEXT")
+            self._conn.execute(f"PRAGMA user_version={self.SCHEMA_VERSION}")
+        elif version != self.SCHEMA_VERSION:
+            self._conn.execute("DROP TABLE IF EXISTS images")
+            self._conn.execute("DROP TABLE IF EXISTS counters")
+            self._conn.execute(f"PRAGMA user_version={self.SCHEMA_VERSION}")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS images ("
+            "split TEXT NOT NULL, file_name TEXT NOT NULL, image_id INTEGER NOT NULL, "
+            "image_size INTEGER NOT NULL, image_mtime_ns INTEGER NOT NULL, "
+            "label_size INTEGER NOT NULL, label_mtime_ns INTEGER NOT NULL, "
+            "PRIMARY KEY (split, file_name))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS counters ("
+            "split TEXT PRIMARY KEY, next_image_id INTEGER NOT NULL, next_annotation_id INTEGER NOT NULL, "
+            "file_name_prefix TEXT)"
+        )
+        self._conn.commit()
+    
+    def load_split(self, split):
+        """
+        :return: ({file_name: (image_id, image_size, image_mtime_ns, label_size, label_mtime_ns)},
+                  next_image_id, next_annotation_id, file_name_prefix), 기록이 없으면 ({}, 0, 0, None)
+        """
+        rows = self._conn.execute(
+            "SELECT file_name, image_id, image_size, image_mtime_ns, label_size, label_mtime_ns "
+            "FROM images WHERE split = ?", (split,)
+        )
+        entries = {row[0]: tuple(row[1:]) for row in rows}
+        counters = self._conn.execute(
+            "SELECT next_image_id, next_annotation_id, file_name_prefix FROM counters WHERE split = ?", (split,)
+        ).fetchone()
+        next_image_id, next_annotation_id, file_name_prefix = counters if counters is not None else (0, 0, None)
+        return entries, next_image_id, next_annotation_id, file_name_prefix
+    
+    def save_split(self, split, rows, next_image_id, next_annotation_id, file_name_prefix=''):
+        """
+        split의 매핑과 high-water mark를 한 트랜잭션으로 기록 (rows: (file_name, image_id, 크기/수정시각 4개))
+
+        :param file_name_prefix: 출력 JSON의 file_name 접두사 (image_mode 'none'이면 YOLO 루트 기준 경로)
+        """
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO images (split, file_name, image_id, image_size, image_mtime_ns, "
+                "label_size, label_mtime_ns) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(split,) + tuple(row) for row in rows]
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO counters (split, next_image_id, next_annotation_id, file_name_prefix) "
+                "VALUES (?, ?, ?, ?)",
+                (split, next_image_id, next_annotation_id, file_name_prefix)
+            )
+    
+    def close(self):
+        self._conn.close()
+
+def process_image_chunk(args):
+    """이미지 묶음을 처리하는 함수 (작업당 pickle 왕복을 줄이기 위해 chunk 단위로 전달)"""
+    split_index, start, images_path, labels_path, items, task, kpt_shape = args
+    results = [
+        process_single_image((image_filename, images_path, labels_path, image_id, cached_info, task, kpt_shape))
+        for image_filename, image_id, cached_info in items
+    ]
+    return split_index, start, results
+
+def iter_chunk_tasks(split_jobs, chunk_size, task='auto', kpt_shape=None):
+    """
+    split별 처리 대상 이미지를 chunk_size개씩 나누어 split을 번갈아가며 작업 인자로 반환
+
+    start는 job["process_indices"] 안에서의 위치
+    """
+    offsets = [0] * len(split_jobs)
+    remaining = True
+    while remaining:
+        remaining = False
+        for split_index, job in enumerate(split_jobs):
+            start = offsets[split_index]
+            process_indices = job["process_indices"]
+            if start >= len(process_indices):
+                continue
+            end = min(start + chunk_size, len(process_indices))
+            items = [
+                (job["image_entries"][i][0], job["image_ids"][i], job["cached_infos"][i])
+                for i in process_indices[start:end]
+            ]
+            offsets[split_index] = end
+            remaining = True
+            yield split_index, start, job["images_path"], job["labels_path"], items, task, kpt_shape
+
+def _file_stat(path):
+    """(크기, 수정시각), 파일이 없으면 (-1, -1)"""
     try:
-        with open(cache_file, 'wb') as f:
-            pickle.dump(cache_dict, f)
-    except Exception as e:
-        print(f"캐시 저장 실패: {e}")
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return -1, -1
+    return stat.st_size, stat.st_mtime_ns
 
-def convert_yolo_to_coco_optimized(yolo_dataset_path, output_path, dataset_type, class_names, max_workers=None):
-    """최적화된 YOLO to COCO 변환"""
-    print(f"Converting '{dataset_type}' set with optimization...")
-    
+def prepare_split_job(yolo_dataset_path, output_path, dataset_type, image_cache=None, state=None, incremental=False,
+                      image_mode='copy', quarantine=None):
+    """
+    split의 이미지 목록, image_id, 캐시 히트 정보를 준비 (split이 없으면 None)
+
+    state가 있으면 이전 실행의 file_name → image_id 매핑을 재사용하고 새 이미지는 high-water mark 다음 ID를 부여.
+    incremental이면 기존 출력이 있을 때 새로 추가되었거나 이미지/라벨이 바뀐 이미지만 처리 대상으로 함
+    image_mode가 'none'이면 이미지를 출력 폴더에 두지 않고 file_name을 YOLO 루트 기준 상대 경로로 기록
+    quarantine(image_scanner 격리 목록의 절대 경로 set)에 있는 이미지는 제외
+    """
     images_path = os.path.join(yolo_dataset_path, dataset_type, 'images')
     labels_path = os.path.join(yolo_dataset_path, dataset_type, 'labels')
     
     if not os.path.exists(images_path):
         print(f"'{dataset_type}' directory not found in {yolo_dataset_path}. Skipping.")
-        return
-    
-    # 캐시 파일 설정
-    cache_file = os.path.join(yolo_dataset_path, f'.image_cache_{dataset_type}.pkl')
-    image_cache = load_or_create_cache(cache_file)
+        return None
     
     # COCO 출력 폴더 구조 생성
     coco_images_path = os.path.join(output_path, dataset_type)
-    os.makedirs(coco_images_path, exist_ok=True)
+    if image_mode == 'none':
+        file_name_prefix = os.path.relpath(images_path, yolo_dataset_path).replace(os.sep, '/') + '/'
+    else:
+        file_name_prefix = ''
+        os.makedirs(coco_images_path, exist_ok=True)
+    
+    # 이미지 파일 목록 가져오기 (캐시 키 비교용 크기/수정시각 포함)
+    image_entries = []
+    skipped = 0
+    abs_images_path = os.path.abspath(images_path)
+    for entry in os.scandir(images_path):
+        if entry.name.lower().endswith(('.jpg', '.jpeg', '.png')):
+            if quarantine and os.path.join(abs_images_path, entry.name) in quarantine:
+                skipped += 1
+                continue
+            stat = entry.stat()
+            image_entries.append((entry.name, stat.st_size, stat.st_mtime_ns))
+    # 상태가 없을 때도 실행마다 같은 ID가 나오도록 파일명 순으로 정렬
+    image_entries.sort()
+    print(f"'{dataset_type}': found {len(image_entries)} images")
+    if skipped:
+        print(f"'{dataset_type}': skipped {skipped} quarantined images")
+    
+    label_stats = [
+        _file_stat(os.path.join(labels_path, os.path.splitext(name)[0] + '.txt'))
+        for name, _, _ in image_entries
+    ]
+    
+    # 이전 실행의 매핑을 재사용하여 image_id 부여
+    known, next_image_id, next_annotation_id, stored_prefix = \
+        state.load_split(dataset_type) if state is not None else ({}, 0, 0, None)
+    image_ids = []
+    for name, _, _ in image_entries:
+        previous = known.get(name)
+        if previous is not None:
+            image_ids.append(previous[0])
+        else:
+            image_ids.append(next_image_id)
+            next_image_id += 1
+    
+    output_json_path = os.path.join(output_path, 'annotations', f'instances_{dataset_type}.json')
+    if incremental and known and stored_prefix != file_name_prefix:
+        # 기존 출력의 file_name 형식이 다르면 변경 없는 이미지를 옮길 수 없으므로 전체 다시 변환
+        print(f"'{dataset_type}': image_mode changed since the last run, rebuilding the whole split")
+        incremental = False
+    incremental = incremental and bool(known) and os.path.exists(output_json_path)
+    if incremental:
+        process_indices = [
+            i for i, ((name, size, mtime_ns), label_stat) in enumerate(zip(image_entries, label_stats))
+            if known.get(name, (None,))[1:] != (size, mtime_ns) + label_stat
+        ]
+        print(f"'{dataset_type}': incremental, {len(process_indices)} new or changed images")
+    else:
+        process_indices = list(range(len(image_entries)))
+    
+    # 캐시 히트는 부모에서 미리 채워 워커에는 미스만 이미지를 열도록 함
+    cached = image_cache.load_dir(images_path) if image_cache is not None else {}
+    cached_infos = []
+    for name, size, mtime_ns in image_entries:
+        entry = cached.get(os.path.join(abs_images_path, name))
+        if entry is not None and entry[0] == size and entry[1] == mtime_ns:
+            cached_infos.append((entry[2], entry[3]))
+        else:
+            cached_infos.append(None)
+    del cached
+    if image_cache is not None:
+        hits = sum(info is not None for info in cached_infos)
+        print(f"'{dataset_type}': image metadata cache {hits} hits, {len(image_entries) - hits} misses")
     
-    # COCO 데이터 구조 초기화
-    coco_data = {
+    return {
+        "dataset_type": dataset_type,
+        "images_path": images_path,
+        "labels_path": labels_path,
+        "coco_images_path": coco_images_path,
+        "file_name_prefix": file_name_prefix,
+        "image_entries": image_entries,
+        "label_stats": label_stats,
+        "image_ids": image_ids,
+        "process_indices": process_indices,
+        "failed_indices": set(),
+        "incremental": incremental,
+        "cached_infos": cached_infos,
+        "output_json_path": output_json_path,
+        "next_image_id": next_image_id,
+        # incremental이면 기존 annotation ID 다음부터 할당
+        "annotation_id_counter": next_annotation_id if incremental else 0,
+        "writer": None
+    }
+
+def carry_over_split(job):
+    """
+    incremental 모드에서 기존 출력 JSON의 변경되지 않은 이미지/어노테이션을 새 writer로 옮김
+
+    처리 대상(새로 추가/변경)이거나 더 이상 존재하지 않는 이미지와 그 어노테이션은 제외
+    :return: 옮긴 이미지 수
+    """
+    prefix = job["file_name_prefix"]
+    reprocessed = {prefix + job["image_entries"][i][0] for i in job["process_indices"]}
+    current = {prefix + name for name, _, _ in job["image_entries"]}
+    writer = job["writer"]
+    kept_ids = set()
+    for key, value in iter_coco_items(job["output_json_path"]):
+        if key == 'images':
+            if value["file_name"] in current and value["file_name"] not in reprocessed:
+                writer.write_image(value)
+                kept_ids.add(value["id"])
+        elif key == 'annotations':
+            if value["image_id"] in kept_ids:
+                writer.write_annotation(value)
+    return len(kept_ids)
+
+def save_split_state(state, job):
+    """변환이 끝난 split의 매핑과 high-water mark 기록 (실패한 이미지는 다음 실행에서 다시 처리되도록 크기 -1)"""
+    rows = []
+    for i, ((name, size, mtime_ns), label_stat) in enumerate(zip(job["image_entries"], job["label_stats"])):
+        if i in job["failed_indices"]:
+            rows.append((name, job["image_ids"][i], -1, -1, -1, -1))
+        else:
+            rows.append((name, job["image_ids"][i], size, mtime_ns) + tuple(label_stat))
+    state.save_split(job["dataset_type"], rows, job["next_image_id"], job["annotation_id_counter"],
+                     job["file_name_prefix"])
+
+def write_split_result(job, index, result, image_cache=None):
+    """워커 결과 1개에 annotation ID를 할당하고 split의 writer에 기록 (index는 image_entries 위치)"""
+    if result is None:
+        job["failed_indices"].add(index)
+        return
+    image_data = result["image"]
+    if image_cache is not None and job["cached_infos"][index] is None:
+        name, size, mtime_ns = job["image_entries"][index]
+        image_cache.put(os.path.join(job["images_path"], name), size, mtime_ns,
+                        image_data["width"], image_data["height"])
+    if job["file_name_prefix"]:
+        image_data["file_name"] = job["file_name_prefix"] + image_data["file_name"]
+    writer = job["writer"]
+    writer.write_image(image_data)
+    for ann in result["annotations"]:
+        ann["id"] = job["annotation_id_counter"]
+        job["annotation_id_counter"] += 1
+        writer.write_annotation(ann)
+
+def convert_yolo_to_coco_splits(yolo_dataset_path, output_path, dataset_types, class_names, max_workers=None,
+                                indent=None, image_cache=None, chunk_size=256, task='auto', pose_info=None,
+                                state=None, incremental=False, image_mode='auto', quarantine=None):
+    """
+    여러 split을 하나의 프로세스 풀에서 동시에 YOLO to COCO 변환
+    
+    이미지는 chunk_size개씩 묶어 작업당 pickle 왕복을 줄이고, split을 번갈아 제출하며,
+    결과는 순서대로 받아 split별 JSON에 스트리밍 기록
+    
+    task: 'detect'(bbox), 'segment'(polygon → COCO segmentation), 'pose'(keypoint → COCO keypoints),
+          'auto'(라인 필드 수로 판별)
+    pose_info: load_pose_info()의 결과 (keypoint 수/차원, 이름, skeleton), 있으면 person 형식 카테고리 생성
+    state: ConversionState, 있으면 실행 간 image_id를 유지하고 변환 후 매핑을 갱신
+    incremental: 새로 추가/변경된 이미지만 처리하여 기존 출력에 추가하고 해당 이미지 파일만 복사
+    image_mode: 'copy', 'hardlink', 'symlink', 'none'(이미지를 두지 않고 YOLO 트리 기준 상대 경로 기록),
+                'auto'(같은 파일시스템이면 hardlink, 아니면 copy)
+    quarantine: image_scanner.load_quarantine()의 결과, 여기에 있는 손상된 이미지는 변환에서 제외
+    """
+    print(f"Converting {', '.join(dataset_types)} sets with optimization...")
+    
+    split_jobs = [
+        job for job in (prepare_split_job(yolo_dataset_path, output_path, dataset_type, image_cache,
+                                          state, incremental, image_mode, quarantine)
+                        for dataset_type in dataset_types)
+        if job is not None
+    ]
+    if not split_jobs:
+        return
+    
+    # COCO 헤더 (images, annotations는 스트리밍으로 기록)
+    coco_header = {
         "info": {
             "contributor": "",
             "date_created": "",
@@ -168,84 +685,99 @@ def convert_yolo_to_coco_optimized(yolo_dataset_path, output_path, dataset_type,
             "year": ""
         },
         "licenses": [{"name": "", "id": 0, "url": ""}],
-        "categories": [{"id": i+1, "name": name, "supercategory": ""} for i, name in enumerate(class_names)],
-        "images": [],
-        "annotations": []
+        "categories": [{"id": i+1, "name": name, "supercategory": ""} for i, name in enumerate(class_names)]
     }
     
-    # 이미지 파일 목록 가져오기
-    image_files = [f for f in os.listdir(images_path) if f.lower().endswith(('.jpg', '.jpeg', '.png'))]
-    print(f"Found {len(image_files)} images")
+    kpt_shape = None
+    if pose_info is not None:
+        kpt_shape = pose_info["kpt_shape"]
+        # COCO person 형식 카테고리 (skeleton은 1부터 시작하는 keypoint 번호)
+        for category in coco_header["categories"]:
+            category["keypoints"] = pose_info["keypoint_names"]
+            category["skeleton"] = [[a + 1, b + 1] for a, b in pose_info["skeleton"]]
     
     if max_workers is None:
         max_workers = min(32, os.cpu_count() + 4)
     
-    # 병렬 처리를 위한 인자 준비
-    annotation_id_counter = 0
-    process_args = []
-    
-    for image_id, image_filename in enumerate(image_files):
-        process_args.append((
-            image_filename,
-            images_path,
-            labels_path,
-            image_id,
-            annotation_id_counter
-        ))
+    os.makedirs(os.path.join(output_path, 'annotations'), exist_ok=True)
+    total_images = sum(len(job["process_indices"]) for job in split_jobs)
+    
+    print(f"Processing {total_images} images with {max_workers} workers (chunk size {chunk_size})...")
+    
+    # 멀티프로세싱으로 이미지 처리, 결과는 split별로 순서대로 도착하는 즉시 ID 할당 후 기록
+    with ExitStack() as stack:
+        for job in split_jobs:
+            job["writer"] = stack.enter_context(
+                CocoStreamWriter(job["output_json_path"], coco_header, indent=indent)
+            )
+            if job["incremental"]:
+                carried = carry_over_split(job)
+                print(f"'{job['dataset_type']}': kept {carried} unchanged images from existing output")
+        executor = stack.enter_context(ProcessPoolExecutor(max_workers=max_workers))
         
-        # 대략적인 annotation 수 추정 (정확하지 않지만 ID 충돌 방지용)
-        label_filename = os.path.splitext(image_filename)[0] + '.txt'
-        label_path = os.path.join(labels_path, label_filename)
-        if os.path.exists(label_path):
-            try:
-                with open(label_path, 'r') as f:
-                    annotation_id_counter += len(f.readlines())
-            except:
-                annotation_id_counter += 10  # 기본값
+        tasks = iter_chunk_tasks(split_jobs, chunk_size, task, kpt_shape)
+        with tqdm(total=total_images, desc="Processing images") as progress:
+            for split_index, start, results in imap_ordered(executor, process_image_chunk, tasks, window=max_workers * 2):
+                job = split_jobs[split_index]
+                for offset, result in enumerate(results):
+                    write_split_result(job, job["process_indices"][start + offset], result, image_cache)
+                progress.update(len(results))
+    
+    if image_cache is not None:
+        image_cache.flush()
+    if state is not None:
+        for job in split_jobs:
+            save_split_state(state, job)
+    
+    for job in split_jobs:
+        dataset_type = job["dataset_type"]
+        # incremental이면 새로 추가/변경된 이미지만 복사
+        image_files = [job["image_entries"][i][0] for i in job["process_indices"] if i not in job["failed_indices"]]
         
-    print(f"Processing images with {max_workers} workers...")
-    
-    # 멀티프로세싱으로 이미지 처리
-    with ProcessPoolExecutor(max_workers=max_workers) as executor:
-        results = list(tqdm(
-            executor.map(process_single_image, process_args),
-            total=len(process_args),
-            desc=f"Processing {dataset_type} images"
-        ))
+        # 이미지 파일 병렬 복사/링크 ('none'이면 원본 경로를 그대로 참조)
+        if image_mode != 'none':
+            split_image_mode = resolve_image_mode(image_mode, job["images_path"], job["coco_images_path"])
+            print(f"Placing '{dataset_type}' images ({split_image_mode})...")
+            copy_images_parallel(image_files, job["images_path"], job["coco_images_path"], max_workers,
+                                 split_image_mode)
+        
+        print(f"'{dataset_type}' set conversion complete!")
+        print(f"  - Images: {job['writer'].num_images}")
+        print(f"  - Annotations: {job['writer'].num_annotations}")
+        print(f"  - Categories: {len(coco_header['categories'])}")
+        print(f"  - Output: {job['output_json_path']}")
+
+def convert_yolo_to_coco_optimized(yolo_dataset_path, output_path, dataset_type, class_names, max_workers=None, indent=None,
+                                   image_cache=None, task='auto', pose_info=None, state=None, incremental=False,
+                                   image_mode='auto'):
+    """최적화된 YOLO to COCO 변환 (단일 split)"""
+    convert_yolo_to_coco_splits(yolo_dataset_path, output_path, [dataset_type], class_names,
+                                max_workers=max_workers, indent=indent, image_cache=image_cache, task=task,
+                                pose_info=pose_info, state=state, incremental=incremental, image_mode=image_mode)
+
+def load_pose_info(data):
+    """
+    data.yaml 내용에서 keypoint 정보를 읽음 (kpt_shape가 없으면 flip_idx 길이로 keypoint 수 결정)
+    
+    :return: {"kpt_shape", "keypoint_names", "skeleton"} 또는 keypoint 정보가 없으면 None
+    """
+    kpt_shape = data.get('kpt_shape')
+    if kpt_shape is None:
+        flip_idx = data.get('flip_idx')
+        if not flip_idx:
+            return None
+        kpt_shape = [len(flip_idx), 3]
+    num_keypoints, dims = int(kpt_shape[0]), int(kpt_shape[1])
+    
+    keypoint_names = data.get('kpt_names')
+    if not isinstance(keypoint_names, list) or len(keypoint_names) != num_keypoints:
+        keypoint_names = [f"kpt_{i}" for i in range(num_keypoints)]
     
-    # 결과 수집
-    annotation_id_counter = 0
-    for result in results:
-        if result is not None:
-            coco_data["images"].append(result["image"])
-            
-            # annotation ID 재할당
-            for ann in result["annotations"]:
-                ann["id"] = annotation_id_counter
-                annotation_id_counter += 1
-                coco_data["annotations"].append(ann)
-    
-    # 이미지 파일 병렬 복사
-    print("Copying images...")
-    copy_images_parallel(image_files, images_path, coco_images_path, max_workers)
-    
-    # JSON 파일 저장
-    coco_annotations_path = os.path.join(output_path, 'annotations')
-    os.makedirs(coco_annotations_path, exist_ok=True)
-    output_json_path = os.path.join(coco_annotations_path, f'instances_{dataset_type}.json')
-    
-    print("Saving JSON file...")
-    with open(output_json_path, 'w', encoding='utf-8') as f:
-        json.dump(coco_data, f, ensure_ascii=False, indent=2)
-    
-    # 캐시 저장
-    save_cache(image_cache, cache_file)
-    
-    print(f"'{dataset_type}' set conversion complete!")
-    print(f"  - Images: {len(coco_data['images'])}")
-    print(f"  - Annotations: {len(coco_data['annotations'])}")
-    print(f"  - Categories: {len(coco_data['categories'])}")
-    print(f"  - Output: {output_json_path}")
+    return {
+        "kpt_shape": (num_keypoints, dims),
+        "keypoint_names": [str(name) for name in keypoint_names],
+        "skeleton": [[int(a), int(b)] for a, b in data.get('skeleton', [])]
+    }
 
 def main():
     parser = argparse.ArgumentParser(description="Convert YOLO format dataset to COCO format (Optimized).")
@@ -253,6 +785,15 @@ def main():
     parser.add_argument('--coco_path', type=str, default='coco_optimized_output', help="Path to the output directory for the COCO dataset.")
     parser.add_argument('--yaml_file', type=str, default='yolo/KEPCO_OD_V7_T8_224592_AG10_2_plus_CLAHE.yaml', help='Path to the YAML file containing class names.')
     parser.add_argument('--workers', type=int, default=None, help='Number of worker processes (default: auto)')
+    parser.add_argument('--task', type=str, choices=['auto', 'detect', 'segment', 'pose'], default='auto', help='Label type: detect (5-field boxes), segment (polygons), pose (boxes + keypoints) or auto (by field count)')
+    parser.add_argument('--chunk_size', type=int, default=256, help='Number of images per worker task (default: 256)')
+    parser.add_argument('--pretty', action='store_true', help='Write indented JSON (default: compact separators)')
+    parser.add_argument('--cache_file', type=str, default=None, help='Path to the SQLite image metadata cache (default: <coco_path>/annotations/.image_meta_cache.sqlite)')
+    parser.add_argument('--no_cache', action='store_true', help='Disable the image metadata cache')
+    parser.add_argument('--state_file', type=str, default=None, help='Path to the SQLite conversion state (file_name -> image_id, default: <coco_path>/annotations/.conversion_state.sqlite)')
+    parser.add_argument('--image_mode', '--image-mode', type=str, choices=IMAGE_MODES, default='auto', help='How to place images in the COCO tree: copy, hardlink, symlink, none (file_name relative to the YOLO tree) or auto (hardlink on the same filesystem, otherwise copy)')
+    parser.add_argument('--incremental', action='store_true', help='Only process new or changed images/labels and append them to the existing COCO output')
+    parser.add_argument('--quarantine', type=str, default=None, help=f'Quarantine list from image_scanner.py; listed images are skipped (default: <yolo_path>/{QUARANTINE_NAME} if it exists)')
     
     args = parser.parse_args()
     
@@ -267,19 +808,56 @@ def main():
         print(f"YAML 파일을 읽는 중 오류 발생: {e}")
         return
     
+    # keypoint 정보 (kpt_shape / flip_idx / skeleton)
+    pose_info = load_pose_info(data) if args.task in ('auto', 'pose') else None
+    if args.task == 'pose' and pose_info is None:
+        print("YAML 파일에 kpt_shape 또는 flip_idx가 없어 pose 변환을 할 수 없습니다.")
+        return
+    
     print(f"Starting optimized conversion...")
     print(f"Workers: {args.workers if args.workers else 'auto'}")
     print(f"Classes: {len(class_names)}")
+    if pose_info is not None:
+        print(f"Keypoints: {pose_info['kpt_shape'][0]} (dims {pose_info['kpt_shape'][1]})")
+    
+    os.makedirs(os.path.join(args.coco_path, 'annotations'), exist_ok=True)
+    
+    # 이미지 메타데이터 캐시 (원본 데이터셋을 건드리지 않도록 출력 쪽에 저장)
+    image_cache = None
+    if not args.no_cache:
+        cache_file = args.cache_file or os.path.join(args.coco_path, 'annotations', '.image_meta_cache.sqlite')
+        image_cache = ImageMetaCache(cache_file)
     
-    # train, valid 세트 변환
-    for dataset_type in ['train', 'valid']:
-        convert_yolo_to_coco_optimized(
+    # 실행 간 image_id 유지를 위한 변환 상태
+    state = ConversionState(args.state_file or os.path.join(args.coco_path, 'annotations', '.conversion_state.sqlite'))
+    
+    # image_scanner로 찾은 손상된 이미지 목록
+    quarantine = load_quarantine(args.quarantine or args.yolo_path)
+    if quarantine:
+        print(f"Quarantined images: {len(quarantine)}")
+    
+    # train, valid 세트를 하나의 프로세스 풀에서 동시에 변환
+    try:
+        convert_yolo_to_coco_splits(
             args.yolo_path, 
             args.coco_path, 
-            dataset_type, 
+            ['train', 'valid'], 
             class_names, 
-            max_workers=args.workers
+            max_workers=args.workers,
+            indent=2 if args.pretty else None,
+            image_cache=image_cache,
+            chunk_size=args.chunk_size,
+            task=args.task,
+            pose_info=pose_info,
+            state=state,
+            incremental=args.incremental,
+            image_mode=args.image_mode,
+            quarantine=quarantine
         )
+    finally:
+        if image_cache is not None:
+            image_cache.close()
+        state.close()
     
     elapsed_time = time.time() - start_time
     print(f"\nTotal conversion time: {elapsed_time:.2f} seconds")